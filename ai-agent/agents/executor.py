@@ -1,93 +1,155 @@
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 from tools.mocks import get_automation_tools
+from tools.registry import ToolRegistry
+from tools.result_cache import ToolResultCache
 from memory.conversation_memory import get_memory
+from services.llm_gateway import ainvoke_chain
+from services.retry import retry_async
+from services.llm_provider import get_groq_llm, DEFAULT_GROQ_MODEL
+from agents.plan_executor import PlanExecutor, GATED_RISK_LEVELS
+from schemas.base import EnhancedPlan
+from services.cache import TTLCache
+from typing import Optional
 import os
 import time
 import json
+import uuid
+import asyncio
+
+# Plans awaiting confirmation; confirming runs exactly the plan that was shown
+PENDING_PLAN_TTL = int(os.getenv("PENDING_PLAN_TTL", "900"))
+
+AGENT_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are an intelligent automation agent. 
+
+Available tools:
+{tool_descriptions}
+
+When you need to use a tool, respond with JSON in this format:
+{{"action": "tool_name", "action_input": "input_string"}}
+
+Otherwise, provide a direct answer."""),
+    ("user", "{input}")
+])
 
 class AgentSystem:
     def __init__(self):
-        self.tools = get_automation_tools()
-        self.llm = ChatGroq(
-            model="llama3-70b-8192", 
-            temperature=0,
-            api_key=os.getenv("GROQ_API_KEY")
-        )
-        
-    def execute(self, command: str, user_id: str = "default", max_retries: int = 2):
-        """Execute a command with simplified tool calling"""
+        self.registry = ToolRegistry(get_automation_tools())
+        self.tools = self.registry.tools()
+        self.llm = get_groq_llm(temperature=0)
+        # Tool descriptions never change after start-up, so bind them once
+        self.prompt = AGENT_PROMPT.partial(tool_descriptions=self.registry.descriptions)
+        self.result_cache = ToolResultCache(self.registry)
+        self.plan_executor = PlanExecutor(self.tools, result_cache=self.result_cache, registry=self.registry)
+        self.pending_plans = TTLCache("pending_plan", maxsize=1024, ttl=PENDING_PLAN_TTL)
+    
+    async def aexecute(self, command: str, user_id: str = "default", max_retries: int = 2):
+        """Execute a command with simplified tool calling, retrying transient LLM errors"""
         
         # Get user memory
         memory = get_memory(user_id)
+        messages = self.prompt.format_messages(input=command)
+        start_time = time.time()
+        
+        try:
+            response, attempts = await retry_async(
+                lambda: ainvoke_chain(self.llm, messages, tool="agent_execute", model=DEFAULT_GROQ_MODEL),
+                max_retries=max_retries
+            )
+        except Exception as e:
+            attempts = getattr(e, "attempts", [])
+            return {
+                "output": f"Failed after {len(attempts)} attempts: {str(e)}",
+                "success": False,
+                "error": str(e),
+                "attempts": len(attempts),
+                "attempt_timings": attempts
+            }
         
-        # Build tool descriptions
-        tool_descriptions = "\n".join([
-            f"- {tool.name}: {tool.description}" 
-            for tool in self.tools
-        ])
+        result_text = response.content
         
-        # Create prompt
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", f"""You are an intelligent automation agent. 
+        # Try to parse as tool call
+        try:
+            if "{" in result_text and "action" in result_text:
+                action_data = json.loads(result_text)
+                tool_name = action_data.get("action")
+                tool = self.registry.get(tool_name)
+                if tool is not None:
+                    tool_result = await self.result_cache.ainvoke(tool, action_data.get("action_input"), user_id)
+                    result_text = f"Tool '{tool_name}' executed successfully. Result: {tool_result}"
+        except Exception:
+            # Not a tool call, just return the response
+            pass
+        
+        execution_time = time.time() - start_time
+        
+        # Save to memory
+        memory.add_interaction(command, result_text)
+        
+        return {
+            "output": result_text,
+            "success": True,
+            "execution_time": execution_time,
+            "attempts": len(attempts),
+            "attempt_timings": attempts
+        }
+    
+    def execute(self, command: str, user_id: str = "default", max_retries: int = 2):
+        """Blocking wrapper around aexecute for callers outside an event loop"""
+        return asyncio.run(self.aexecute(command, user_id, max_retries))
+    
+    def assess_plan(self, plan: EnhancedPlan) -> EnhancedPlan:
+        """Raise step risk levels to the registered tool risk and set the plan's overall risk and gating"""
+        plan.steps = [self.plan_executor.with_tool_risk(step) for step in plan.steps]
+        levels = {step.risk_level for step in plan.steps}
+        plan.overall_risk = "high" if "high" in levels else "medium" if "medium" in levels else "low"
+        plan.requires_confirmation = plan.overall_risk in GATED_RISK_LEVELS
+        return plan
+    
+    def hold_plan(self, plan: EnhancedPlan, user_id: str) -> str:
+        """Keep a plan that is waiting for confirmation; returns its plan_id"""
+        plan_id = uuid.uuid4().hex
+        self.pending_plans.set(plan_id, (user_id, plan))
+        return plan_id
+    
+    def take_plan(self, plan_id: str, user_id: str) -> Optional[EnhancedPlan]:
+        """The held plan for a confirmation, or None if unknown, expired or another user's (single use)"""
+        held = self.pending_plans.get(plan_id)
+        if held is None or held[0] != user_id:
+            return None
+        # invalidate() succeeds once, so two concurrent confirmations cannot both run the plan
+        if not self.pending_plans.invalidate(plan_id):
+            return None
+        return held[1]
+    
+    async def execute_plan(self, plan: EnhancedPlan, user_id: str = "default",
+                           confirmed: bool = False, requires_confirmation: bool = None):
+        """
+        Execute every step of a plan, running independent steps concurrently
+        
+        Args:
+            plan: Plan produced by PlannerAgent.create_plan
+            user_id: User the plan belongs to
+            confirmed: Whether the user confirmed medium/high-risk steps
+            requires_confirmation: PlannerAgent.requires_confirmation(plan)
+        """
+        result = await self.plan_executor.execute(plan, confirmed=confirmed,
+                                                  requires_confirmation=requires_confirmation,
+                                                  user_id=user_id)
+        
+        if result["status"] != "requires_confirmation":
+            summary = "; ".join(f"{step['tool']}: {step['status']}" for step in result["steps"])
+            get_memory(user_id).add_interaction(plan.original_command, summary)
+        
+        return result
 
-Available tools:
-{tool_descriptions}
 
-When you need to use a tool, respond with JSON in this format:
-{{"action": "tool_name", "action_input": "input_string"}}
+# Created on first use so importing the service does not build the executor
+_agent_system = None
 
-Otherwise, provide a direct answer."""),
-            ("user", "{input}")
-        ])
-        
-        # Execute with retry logic
-        for attempt in range(max_retries + 1):
-            try:
-                start_time = time.time()
-                
-                # Get LLM response
-                chain = prompt | self.llm
-                response = chain.invoke({"input": command})
-                
-                result_text = response.content
-                
-                # Try to parse as tool call
-                try:
-                    if "{" in result_text and "action" in result_text:
-                        action_data = json.loads(result_text)
-                        tool_name = action_data.get("action")
-                        tool_input = action_data.get("action_input")
-                        
-                        # Find and execute tool
-                        for tool in self.tools:
-                            if tool.name == tool_name:
-                                tool_result = tool.invoke(tool_input)
-                                result_text = f"Tool '{tool_name}' executed successfully. Result: {tool_result}"
-                                break
-                except:
-                    # Not a tool call, just return the response
-                    pass
-                
-                execution_time = time.time() - start_time
-                
-                # Save to memory
-                memory.add_interaction(command, result_text)
-                
-                return {
-                    "output": result_text,
-                    "success": True,
-                    "execution_time": execution_time,
-                    "attempts": attempt + 1
-                }
-            except Exception as e:
-                if attempt == max_retries:
-                    return {
-                        "output": f"Failed after {max_retries + 1} attempts: {str(e)}",
-                        "success": False,
-                        "error": str(e),
-                        "attempts": attempt + 1
-                    }
-                # Wait before retry
-                time.sleep(1)
-                continue
+def get_agent_system() -> AgentSystem:
+    """Get or create the global agent system"""
+    global _agent_system
+    if _agent_system is None:
+        _agent_system = AgentSystem()
+    return _agent_system
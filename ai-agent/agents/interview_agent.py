@@ -1,26 +1,53 @@
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
-from tools.interview_tool import generate_interview_questions, evaluate_interview_response, generate_interview_analytics
+from tools.interview_tool import (
+    generate_interview_questions,
+    generate_next_interview_question,
+    evaluate_interview_response,
+    generate_interview_analytics
+)
 from tools.conversational_interview_tool import (
     generate_followup_question, 
     evaluate_response_realtime,
     adjust_difficulty,
     generate_conversation_summary
 )
-from services.resume_parser import parse_resume_structure, format_resume_context
+from services.resume_parser import parse_resume_structure, format_resume_context, detect_skills
+from services.question_index import get_question_index
+from services.heuristic_scorer import score_response
+from services.metrics import record_json_fallback, ACTIVE_INTERVIEW_SESSIONS
+from services.tracing import traced, set_span_attributes
+from services.llm_provider import get_groq_llm
+from services.llm_scheduler import llm_priority
 import os
 import json
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 from datetime import datetime
 
+# Skill-specific openers for instant starts, filled from keywords detected in the resume
+SKILL_QUESTION_TEMPLATES = [
+    "Your resume mentions {skill}. Walk me through a recent project where you used it and the key decisions you made.",
+    "How have you used {skill} in practice, and what problem were you solving with it?",
+]
+
+# Lazy interviews generate one question ahead on this pool while the candidate answers
+_prefetch_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("QUESTION_PREFETCH_WORKERS", "8")),
+    thread_name_prefix="question-prefetch"
+)
+LOOKAHEAD_WAIT = float(os.getenv("QUESTION_LOOKAHEAD_WAIT", "20"))
+# Instant starts upgrade their bank questions on this pool; a burst of starts queues here
+_upgrade_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("QUESTION_UPGRADE_WORKERS", "4")),
+    thread_name_prefix="question-upgrade"
+)
+
 class InterviewAgent:
     """Specialized agent for conducting conversational AI interviews"""
     
     def __init__(self):
-        self.llm = ChatGroq(
-            model="llama3-70b-8192",
-            temperature=0.7,
-            api_key=os.getenv("GROQ_API_KEY")
-        )
         self.current_question_index = 0
         self.questions = []
         self.responses = []
@@ -33,6 +60,8 @@ class InterviewAgent:
         # Conversational state
         self.conversation_history = []
         self.interview_type = "general"  # hr, technical, behavioral, situational
+        self.job_role = ""
+        self.initial_difficulty = "medium"
         self.current_difficulty = "medium"
         self.evaluation_metrics = {
             "confidence": [],
@@ -40,24 +69,124 @@ class InterviewAgent:
             "relevance": []
         }
         self.session_state = "active"  # active, paused, completed
+        self.questions_source = "none"  # bank, reused, llm, fallback
+        
+        # Guards the question queue against the background upgrade of an instant start
+        self._questions_lock = threading.Lock()
+        self._question_generation = 0
+        
+        # Lazy pipeline: questions are generated one at a time, one ahead of the candidate
+        self.lazy = False
+        self.target_questions = 5
+        self._lookahead = None
+        self._resume_parsed = False
+    
+    @property
+    def llm(self):
+        """Shared Groq client, created on first use"""
+        return get_groq_llm(temperature=0.7)
     
+    @traced("InterviewAgent.start_interview")
     def start_interview(
         self, 
         resume_text: str, 
         job_role: str, 
         difficulty: str = "medium",
-        interview_type: str = "general"
+        interview_type: str = "general",
+        instant: bool = False,
+        lazy: bool = False,
+        num_questions: int = 5
     ):
-        """Initialize conversational interview with resume-based questions"""
+        """
+        Initialize conversational interview with resume-based questions
+        
+        Args:
+            instant: Return a question from the local bank right away and
+                generate the resume-based questions in the background
+            lazy: Generate questions one at a time (with one prefetched ahead),
+                each conditioned on the answers so far, instead of all upfront
+            num_questions: Planned main questions (follow-ups come on top)
+        """
         self.interview_type = interview_type
+        self.job_role = job_role
+        self.initial_difficulty = difficulty
         self.current_difficulty = difficulty
         self.resume_text = resume_text
+        set_span_attributes(**{
+            "interview.job_role": job_role,
+            "interview.type": interview_type,
+            "interview.difficulty": difficulty,
+            "interview.instant": instant,
+            "interview.lazy": lazy
+        })
         
+        self.current_question_index = 0
+        self.responses = []
+        self.conversation_history = []
+        self.evaluation_metrics = {"confidence": [], "clarity": [], "relevance": []}
+        self.session_state = "active"
+        self._question_generation += 1
+        self.lazy = lazy
+        self.target_questions = num_questions
+        self._lookahead = None
+        
+        if lazy:
+            if instant:
+                skills = detect_skills(resume_text)
+                self.parsed_resume = {"skills": skills, "technologies": skills}
+                self.resume_context = format_resume_context(self.parsed_resume)
+                self._resume_parsed = False  # The first prefetch parses the resume
+                first = self._get_instant_questions(interview_type, job_role, difficulty, skills)[0]
+            else:
+                self.parsed_resume = parse_resume_structure(resume_text)
+                self.resume_context = format_resume_context(self.parsed_resume)
+                self._resume_parsed = True
+                first = self._generate_next(self._question_generation, [], "", difficulty)
+            self.questions = [first]
+            self.questions_source = "lazy"
+            set_span_attributes(**{"interview.questions_source": "lazy"})
+            self._schedule_lookahead()
+        elif instant:
+            skills = detect_skills(resume_text)
+            self.parsed_resume = {"skills": skills, "technologies": skills}
+            self.resume_context = format_resume_context(self.parsed_resume)
+            self.questions = self._get_instant_questions(interview_type, job_role, difficulty, skills)
+            self.questions_source = "bank"
+            set_span_attributes(**{"interview.questions_source": "bank"})
+            
+            # Carry the trace context into the worker so the upgrade shows up under this request
+            context = contextvars.copy_context()
+            _upgrade_pool.submit(
+                context.run, self._upgrade_questions, self._question_generation, resume_text, job_role,
+                difficulty, interview_type
+            )
+        else:
+            prepared = self._prepare_questions(resume_text, job_role, difficulty, interview_type)
+            self.parsed_resume = prepared["parsed_resume"]
+            self.resume_context = prepared["resume_context"]
+            self.questions = prepared["questions"]
+            self.questions_source = prepared["source"]
+        
+        return {**self.get_next_question(), "questions_source": self.questions_source}
+    
+    def _prepare_questions(self, resume_text: str, job_role: str, difficulty: str, interview_type: str):
+        """Parse the resume and get resume-based questions (reused, generated or fallback)"""
         # Parse resume into structured data
         print("Parsing resume...")
-        self.parsed_resume = parse_resume_structure(resume_text)
-        self.resume_context = format_resume_context(self.parsed_resume)
-        print(f"Resume parsed. Found {len(self.parsed_resume.get('skills', []))} skills, {len(self.parsed_resume.get('projects', []))} projects")
+        parsed_resume = parse_resume_structure(resume_text)
+        resume_context = format_resume_context(parsed_resume)
+        print(f"Resume parsed. Found {len(parsed_resume.get('skills', []))} skills, {len(parsed_resume.get('projects', []))} projects")
+        prepared = {"parsed_resume": parsed_resume, "resume_context": resume_context}
+        
+        # Reuse questions generated for a near-identical resume when there is one
+        question_index = get_question_index()
+        reused = question_index.find(parsed_resume, job_role, difficulty, interview_type, 5)
+        if reused:
+            set_span_attributes(**{
+                "interview.questions_source": "reused",
+                "interview.reuse_similarity": reused["similarity"]
+            })
+            return {**prepared, "questions": reused["questions"], "source": "reused"}
         
         # Generate initial questions based on resume content
         questions_json = generate_interview_questions.invoke({
@@ -65,21 +194,149 @@ class InterviewAgent:
             "job_role": job_role,
             "difficulty": difficulty,
             "num_questions": 5,
-            "resume_context": self.resume_context
+            "resume_context": resume_context
         })
         
         try:
-            self.questions = json.loads(questions_json)
-        except:
+            questions = json.loads(questions_json)
+            set_span_attributes(**{"interview.questions_source": "llm"})
+        except ValueError:
+            set_span_attributes(**{"interview.questions_source": "fallback"})
             # Fallback questions based on interview type
-            self.questions = self._get_fallback_questions(interview_type, job_role, difficulty)
+            record_json_fallback("generate_interview_questions")
+            return {**prepared, "questions": self._get_fallback_questions(interview_type, job_role, difficulty),
+                    "source": "fallback"}
         
-        self.current_question_index = 0
-        self.responses = []
-        self.conversation_history = []
-        self.evaluation_metrics = {"confidence": [], "clarity": [], "relevance": []}
+        try:
+            question_index.add(parsed_resume, job_role, difficulty, interview_type, questions)
+        except Exception as e:
+            print(f"Question index update failed: {e}")
+        return {**prepared, "questions": questions, "source": "llm"}
+    
+    @traced("InterviewAgent._upgrade_questions")
+    def _upgrade_questions(self, generation: int, resume_text: str, job_role: str, difficulty: str,
+                           interview_type: str):
+        """Background half of an instant start: swap the bank questions still queued for resume-based ones"""
+        try:
+            # The candidate already has a question; live turns are admitted first
+            with llm_priority("background"):
+                prepared = self._prepare_questions(resume_text, job_role, difficulty, interview_type)
+        except Exception as e:
+            print(f"Question upgrade failed: {e}")
+            return
+        if prepared["source"] == "fallback":
+            return  # The bank questions are at least as good
         
-        return self.get_next_question()
+        with self._questions_lock:
+            # A restarted or finished session keeps its own questions
+            if generation != self._question_generation or self.session_state != "active":
+                return
+            # Questions already asked (including the one on screen) and queued follow-ups stay;
+            # the rest of the queue is replaced
+            asked = self.questions[:self.current_question_index + 1]
+            followups = [q for q in self.questions[self.current_question_index + 1:]
+                         if isinstance(q, dict) and q.get("is_followup")]
+            main_asked = sum(1 for q in asked if not (isinstance(q, dict) and q.get("is_followup")))
+            upgraded = [q for q in prepared["questions"] if isinstance(q, dict) and q.get("question")]
+            self.questions = asked + followups + upgraded[:max(len(upgraded) - main_asked, 0)]
+            self.parsed_resume = prepared["parsed_resume"]
+            self.resume_context = prepared["resume_context"]
+            self.questions_source = prepared["source"]
+        set_span_attributes(**{"interview.questions_upgraded": True, "interview.questions_asked": len(asked)})
+    
+    def _main_questions(self) -> int:
+        return sum(1 for q in self.questions if not (isinstance(q, dict) and q.get("is_followup")))
+    
+    def _planned_total(self) -> int:
+        if not self.lazy:
+            return len(self.questions)
+        return len(self.questions) + max(self.target_questions - self._main_questions(), 0)
+    
+    def _schedule_lookahead(self):
+        """Prefetch the next main question, conditioned on the answers given so far"""
+        if not self.lazy or self._lookahead is not None or self._main_questions() >= self.target_questions:
+            return
+        asked = [q.get("question", "") if isinstance(q, dict) else str(q) for q in self.questions]
+        recent_answers = "\n".join(
+            f"Q: {item['question']}\nA: {item['response']}" for item in self.conversation_history[-3:]
+        )
+        context = contextvars.copy_context()
+        self._lookahead = _prefetch_pool.submit(
+            context.run, self._generate_next, self._question_generation, asked, recent_answers,
+            self.current_difficulty
+        )
+    
+    def _take_lookahead(self):
+        """Append the prefetched question to the queue, waiting for it if it is still being generated"""
+        future, self._lookahead = self._lookahead, None
+        if future is None:
+            return
+        try:
+            question = future.result(timeout=LOOKAHEAD_WAIT)
+        except Exception as e:
+            print(f"Question prefetch failed: {e}")
+            asked = [q.get("question", "") if isinstance(q, dict) else str(q) for q in self.questions]
+            question = self._bank_question(asked, self.current_difficulty)
+        with self._questions_lock:
+            self.questions.append(question)
+    
+    @traced("InterviewAgent._generate_next")
+    def _generate_next(self, generation: int, asked: list, recent_answers: str, difficulty: str):
+        """One resume-based question; input is bounded so every turn costs the same"""
+        if not self._resume_parsed:
+            parsed_resume = parse_resume_structure(self.resume_text)
+            with self._questions_lock:
+                if generation == self._question_generation:
+                    self.parsed_resume = parsed_resume
+                    self.resume_context = format_resume_context(parsed_resume)
+                    self._resume_parsed = True
+        
+        try:
+            question_json = generate_next_interview_question.invoke({
+                "resume_context": self.resume_context,
+                "job_role": self.job_role,
+                "interview_type": self.interview_type,
+                "difficulty": difficulty,
+                "asked_questions": "\n".join(f"- {q}" for q in asked[-20:]),
+                "recent_answers": recent_answers
+            })
+            question = json.loads(question_json)
+            if not isinstance(question, dict) or not question.get("question"):
+                raise ValueError("Empty question")
+            return {
+                "question": question["question"],
+                "category": question.get("category", self.interview_type),
+                "difficulty": difficulty
+            }
+        except ValueError:
+            record_json_fallback("generate_next_interview_question")
+            return self._bank_question(asked, difficulty)
+        except Exception as e:
+            print(f"Next question generation failed, using the bank: {e}")
+            return self._bank_question(asked, difficulty)
+    
+    def _bank_question(self, asked: list, difficulty: str):
+        """First bank question not asked yet"""
+        skills = self.parsed_resume.get("skills") or detect_skills(self.resume_text)
+        for question in self._get_instant_questions(self.interview_type, self.job_role, difficulty, skills):
+            if question["question"] not in asked:
+                return question
+        return {
+            "question": "Is there another project or experience from your resume you would like to walk me through?",
+            "category": self.interview_type,
+            "difficulty": difficulty
+        }
+    
+    def _get_instant_questions(self, interview_type: str, job_role: str, difficulty: str, skills: list):
+        """Question queue built locally from the bank and the resume's detected skills"""
+        bank = self._get_fallback_questions(interview_type, job_role, difficulty)
+        if interview_type not in ("technical", "general") or not skills:
+            return bank
+        skill_questions = [
+            {"question": template.format(skill=skill), "category": "technical", "difficulty": difficulty}
+            for template, skill in zip(SKILL_QUESTION_TEMPLATES, skills)
+        ]
+        return (skill_questions + bank)[:len(bank)]
     
     def _get_fallback_questions(self, interview_type: str, job_role: str, difficulty: str):
         """Generate fallback questions based on interview type"""
@@ -127,49 +384,82 @@ class InterviewAgent:
         return {
             "question": question_text,
             "index": self.current_question_index + 1,
-            "total": len(self.questions),
+            "total": self._planned_total(),
             "category": question.get("category", self.interview_type) if isinstance(question, dict) else self.interview_type,
             "difficulty": self.current_difficulty,
             "interview_type": self.interview_type
         }
     
+    @traced("InterviewAgent.submit_response")
     def submit_response(self, response: str, resume_text: str = "", job_role: str = ""):
         """Submit response with real-time evaluation and conversational follow-up"""
-        if self.current_question_index >= len(self.questions):
+        evaluation = self.evaluate_response(response, job_role)
+        if evaluation is None:
             return {"error": "No active question"}
         
+        return {"evaluation": evaluation, **self.advance(response)}
+    
+    def provisional_evaluation(self, response: str):
+        """
+        Instant heuristic scores for an answer to the current question (no LLM call, no state change)
+        
+        Returns:
+            The provisional evaluation, or None when there is no active question
+        """
+        if self.current_question_index >= len(self.questions):
+            return None
+        
         current_q = self.questions[self.current_question_index]
         question_text = current_q.get("question", current_q) if isinstance(current_q, dict) else current_q
+        skills = list(self.parsed_resume.get("skills") or []) + list(self.parsed_resume.get("technologies") or [])
+        return score_response(response, question_text, skills)
+    
+    @traced("InterviewAgent.evaluate_response")
+    def evaluate_response(self, response: str, job_role: str = "", provisional=None):
+        """
+        Evaluate and record the answer to the current question, then move past it
         
-        # Evaluate the response with resume context
-        evaluation_json = evaluate_response_realtime.invoke({
-            "question": question_text,
-            "response": response,
-            "interview_type": self.interview_type,
-            "job_role": job_role,
-            "resume_context": self.resume_context
-        })
+        Args:
+            response: Candidate's answer
+            job_role: Target job role (defaults to the session's)
+            provisional: Heuristic evaluation already computed for this answer, if any
+        
+        Returns:
+            The evaluation, or None when there is no active question
+        """
+        if self.current_question_index >= len(self.questions):
+            return None
+        
+        current_q = self.questions[self.current_question_index]
+        question_text = current_q.get("question", current_q) if isinstance(current_q, dict) else current_q
+        if provisional is None:
+            provisional = self.provisional_evaluation(response)
         
         try:
+            # Evaluate the response with resume context
+            evaluation_json = evaluate_response_realtime.invoke({
+                "question": question_text,
+                "response": response,
+                "interview_type": self.interview_type,
+                "job_role": job_role or self.job_role,
+                "resume_context": self.resume_context
+            })
             evaluation = json.loads(evaluation_json)
-            
-            # Store metrics
-            self.evaluation_metrics["confidence"].append(evaluation.get("confidence", 70))
-            self.evaluation_metrics["clarity"].append(evaluation.get("clarity", 70))
-            self.evaluation_metrics["relevance"].append(evaluation.get("relevance", 70))
-        except:
-            evaluation = {
-                "confidence": 70,
-                "clarity": 70,
-                "relevance": 70,
-                "overall_score": 70,
-                "feedback": "Good response with relevant details.",
-                "strength": "Clear communication",
-                "improvement": "Could add more specific examples"
-            }
-            self.evaluation_metrics["confidence"].append(70)
-            self.evaluation_metrics["clarity"].append(70)
-            self.evaluation_metrics["relevance"].append(70)
+            for metric in ("confidence", "clarity", "relevance"):
+                evaluation.setdefault(metric, provisional[metric])
+        except ValueError:
+            record_json_fallback("evaluate_response_realtime")
+            evaluation = dict(provisional)
+        except Exception as e:
+            # Provider down or call shed: the heuristic scores stand in for the LLM
+            print(f"Realtime evaluation failed, using heuristic scores: {e}")
+            set_span_attributes(**{"evaluation.fallback": type(e).__name__})
+            evaluation = dict(provisional)
+        
+        # Store metrics
+        self.evaluation_metrics["confidence"].append(evaluation["confidence"])
+        self.evaluation_metrics["clarity"].append(evaluation["clarity"])
+        self.evaluation_metrics["relevance"].append(evaluation["relevance"])
         
         # Add to conversation history
         self.conversation_history.append({
@@ -187,17 +477,29 @@ class InterviewAgent:
         })
         
         # Move to next question
-        self.current_question_index += 1
+        with self._questions_lock:
+            self.current_question_index += 1
+        
+        return evaluation
+    
+    @traced("InterviewAgent.advance")
+    def advance(self, last_response: str):
+        """Pick the next question after an evaluated answer (follow-up, difficulty change, lookahead)"""
+        # Lazy interviews: the prefetched question becomes the next one (usually already generated)
+        if self.lazy and self.current_question_index >= len(self.questions):
+            self._take_lookahead()
         
         # Check if we should adjust difficulty
         if len(self.responses) >= 2:
             self._maybe_adjust_difficulty()
         
         # Generate next question (could be follow-up or next in list)
-        next_question = self._generate_next_question(response)
+        next_question = self._generate_next_question(last_response)
+        
+        # Start on the question after it while the candidate answers this one
+        self._schedule_lookahead()
         
         return {
-            "evaluation": evaluation,
             "next_question": next_question,
             "metrics": {
                 "avg_confidence": sum(self.evaluation_metrics["confidence"]) / len(self.evaluation_metrics["confidence"]),
@@ -211,6 +513,7 @@ class InterviewAgent:
         self._maybe_generate_followup(last_response)
         return self.get_next_question()
     
+    @traced("InterviewAgent._maybe_generate_followup")
     def _maybe_generate_followup(self, last_response: str):
         """30% chance to generate a contextual follow-up question based on resume"""
         import random
@@ -234,21 +537,27 @@ class InterviewAgent:
                     })
                     
                     followup = json.loads(followup_json)
+                    if not isinstance(followup, dict) or not followup.get("question"):
+                        raise ValueError("Empty follow-up")
                     
                     # Add follow-up to questions list
-                    self.questions.insert(self.current_question_index, {
-                        "question": followup.get("question"),
-                        "category": self.interview_type,
-                        "difficulty": self.current_difficulty,
-                        "is_followup": True
-                    })
-                except:
-                    pass  # Fall back to regular next question
+                    with self._questions_lock:
+                        self.questions.insert(self.current_question_index, {
+                            "question": followup.get("question"),
+                            "category": self.interview_type,
+                            "difficulty": self.current_difficulty,
+                            "is_followup": True
+                        })
+                except ValueError:
+                    record_json_fallback("generate_followup_question")
+                except Exception as e:
+                    print(f"Follow-up generation failed: {e}")  # Fall back to regular next question
             
             return self.get_next_question()
         
         return None
     
+    @traced("InterviewAgent._maybe_adjust_difficulty")
     def _maybe_adjust_difficulty(self):
         """Check if difficulty should be adjusted based on performance"""
         try:
@@ -261,12 +570,17 @@ class InterviewAgent:
             
             if adjustment.get("should_change", False):
                 self.current_difficulty = adjustment.get("recommended_difficulty", self.current_difficulty)
-        except:
-            pass  # Keep current difficulty if adjustment fails
+        except ValueError:
+            record_json_fallback("adjust_difficulty")
+        except Exception as e:
+            print(f"Difficulty adjustment failed: {e}")  # Keep current difficulty
     
-    def complete_interview(self, resume_text: str, job_role: str):
-        """Generate final analytics for completed interview"""
+    @traced("InterviewAgent.complete_interview")
+    def complete_interview(self, resume_text: str = "", job_role: str = ""):
+        """Generate final analytics for completed interview (resume and role default to the ones given at start)"""
         self.session_state = "completed"
+        resume_text = resume_text or self.resume_text
+        job_role = job_role or self.job_role
         
         # Generate conversation summary
         try:
@@ -275,7 +589,11 @@ class InterviewAgent:
                 "interview_type": self.interview_type
             })
             conversation_summary = json.loads(summary_json)
-        except:
+        except ValueError:
+            record_json_fallback("generate_conversation_summary")
+            conversation_summary = {}
+        except Exception as e:
+            print(f"Conversation summary failed: {e}")
             conversation_summary = {}
         
         # Prepare questions and responses
@@ -290,8 +608,9 @@ class InterviewAgent:
         
         try:
             analytics = json.loads(analytics_json)
-        except:
+        except ValueError:
             # Fallback analytics
+            record_json_fallback("generate_interview_analytics")
             avg_confidence = sum(self.evaluation_metrics["confidence"]) / len(self.evaluation_metrics["confidence"]) if self.evaluation_metrics["confidence"] else 70
             avg_clarity = sum(self.evaluation_metrics["clarity"]) / len(self.evaluation_metrics["clarity"]) if self.evaluation_metrics["clarity"] else 70
             avg_relevance = sum(self.evaluation_metrics["relevance"]) / len(self.evaluation_metrics["relevance"]) if self.evaluation_metrics["relevance"] else 70
@@ -333,20 +652,71 @@ class InterviewAgent:
         
         return analytics
     
-    def get_session_state(self):
-        """Get current session state"""
+    def state_version(self) -> str:
+        """Changes whenever anything in get_session_state does (cheap enough to check on every poll)"""
+        return (f"{self._question_generation}.{len(self.conversation_history)}.{self.current_question_index}."
+                f"{len(self.questions)}.{self.current_difficulty}.{self.session_state}.{self.questions_source}")
+    
+    @traced("InterviewAgent.get_session_state")
+    def get_session_state(self, since: int = None, offset: int = 0, limit: int = None, compact: bool = False):
+        """
+        Get current session state
+        
+        Args:
+            since: Only history turns from this index on (the history_total of the last poll)
+            offset: Skip this many of the selected turns
+            limit: Return at most this many turns
+            compact: Replace each full evaluation with its overall score
+        """
+        with self._questions_lock:
+            version = self.state_version()
+            history_total = len(self.conversation_history)
+            start = min(since or 0, history_total) + offset
+            end = history_total if limit is None else min(start + limit, history_total)
+            history = self.conversation_history[start:end]
+            total_questions = len(self.questions)
+        
+        if compact:
+            history = [
+                {**{k: v for k, v in item.items() if k != "evaluation"},
+                 "score": item.get("evaluation", {}).get("overall_score")}
+                for item in history
+            ]
+        
         return {
+            "version": version,
             "session_state": self.session_state,
             "interview_type": self.interview_type,
             "current_difficulty": self.current_difficulty,
             "questions_answered": len(self.responses),
-            "total_questions": len(self.questions),
+            "questions_source": self.questions_source,
+            "total_questions": total_questions,
             "current_metrics": {
                 "avg_confidence": sum(self.evaluation_metrics["confidence"]) / len(self.evaluation_metrics["confidence"]) if self.evaluation_metrics["confidence"] else 0,
                 "avg_clarity": sum(self.evaluation_metrics["clarity"]) / len(self.evaluation_metrics["clarity"]) if self.evaluation_metrics["clarity"] else 0,
                 "avg_relevance": sum(self.evaluation_metrics["relevance"]) / len(self.evaluation_metrics["relevance"]) if self.evaluation_metrics["relevance"] else 0
             },
-            "conversation_history": self.conversation_history
+            "delta": since is not None,
+            "history_total": history_total,
+            "history_start": start,
+            "history_end": start + len(history),
+            "conversation_history": history
+        }
+
+    def archive_record(self, session_id: str, analytics: dict, user_id: str = None):
+        """Everything worth keeping once the session is cleared"""
+        return {
+            "session_id": session_id,
+            "user_id": user_id,
+            "job_role": self.job_role,
+            "interview_type": self.interview_type,
+            "difficulty": self.initial_difficulty,
+            "final_difficulty": self.current_difficulty,
+            "questions": self.questions,
+            "responses": self.responses,
+            "conversation_history": self.conversation_history,
+            "evaluation_metrics": self.evaluation_metrics,
+            "analytics": analytics
         }
 
 
@@ -357,9 +727,15 @@ def get_interview_agent(session_id: str) -> InterviewAgent:
     """Get or create interview agent for a session"""
     if session_id not in _interview_sessions:
         _interview_sessions[session_id] = InterviewAgent()
+        ACTIVE_INTERVIEW_SESSIONS.set(len(_interview_sessions))
     return _interview_sessions[session_id]
 
+def find_interview_agent(session_id: str) -> Optional[InterviewAgent]:
+    """Interview agent of a started session, or None (never creates one)"""
+    return _interview_sessions.get(session_id)
+
 def clear_interview_session(session_id: str):
     """Clear interview session"""
     if session_id in _interview_sessions:
         del _interview_sessions[session_id]
+        ACTIVE_INTERVIEW_SESSIONS.set(len(_interview_sessions))
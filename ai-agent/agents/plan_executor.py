@@ -0,0 +1,216 @@
+"""
+Plan Execution Engine
+Runs the steps of an EnhancedPlan as a dependency graph. Steps that reference
+an earlier step's output ("$step_N", 1-based) wait for it, independent
+low-risk steps run concurrently, and medium/high-risk steps are serialized
+and only run once the plan has been confirmed. A step's risk is the higher of
+what the planner wrote and the tool's registered risk, so side-effecting tools
+are gated whatever the LLM claims.
+"""
+
+import asyncio
+import re
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from schemas.base import EnhancedPlan, ActionStep
+from tools.registry import ToolRegistry
+from services.metrics import PLAN_STEP_LATENCY
+from services.tracing import start_span, set_span_attributes
+
+STEP_REF_RE = re.compile(r"\$step_(\d+)")
+
+GATED_RISK_LEVELS = ("medium", "high")
+
+
+def _find_refs(value: Any) -> Set[int]:
+    """Collect 0-based step indexes referenced anywhere inside a tool input value"""
+    if isinstance(value, str):
+        return {int(n) - 1 for n in STEP_REF_RE.findall(value)}
+    if isinstance(value, dict):
+        refs = set()
+        for item in value.values():
+            refs |= _find_refs(item)
+        return refs
+    if isinstance(value, (list, tuple)):
+        refs = set()
+        for item in value:
+            refs |= _find_refs(item)
+        return refs
+    return set()
+
+
+def infer_dependencies(steps: List[ActionStep]) -> List[Set[int]]:
+    """
+    Build the dependency set of every step
+
+    A step depends on every earlier step it references, and a medium/high-risk
+    step also depends on the previous gated step so side effects keep plan order.
+    """
+    dependencies = []
+    last_gated = None
+    for index, step in enumerate(steps):
+        deps = {ref for ref in _find_refs(step.tool_input) if 0 <= ref < index}
+        if step.risk_level in GATED_RISK_LEVELS:
+            if last_gated is not None:
+                deps.add(last_gated)
+            last_gated = index
+        dependencies.append(deps)
+    return dependencies
+
+
+def _resolve(value: Any, outputs: Dict[int, Any]) -> Any:
+    """Substitute $step_N references with the referenced step outputs"""
+    if isinstance(value, str):
+        whole = STEP_REF_RE.fullmatch(value.strip())
+        if whole:
+            return outputs.get(int(whole.group(1)) - 1)
+        return STEP_REF_RE.sub(lambda m: str(outputs.get(int(m.group(1)) - 1, "")), value)
+    if isinstance(value, dict):
+        return {key: _resolve(item, outputs) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_resolve(item, outputs) for item in value]
+    return value
+
+
+class PlanExecutor:
+    """Executes plan steps concurrently along their dependency graph"""
+
+    def __init__(self, tools: List[Any], max_concurrency: int = 4, result_cache=None,
+                 registry: Optional[ToolRegistry] = None):
+        """
+        Args:
+            tools: LangChain tools available to the plan
+            max_concurrency: Maximum number of steps running at once
+            result_cache: Optional ToolResultCache for read-only tools
+            registry: Tool metadata used to floor each step's risk level
+        """
+        self.tools = {tool.name: tool for tool in tools}
+        self.registry = registry or ToolRegistry(tools)
+        self.max_concurrency = max_concurrency
+        self.result_cache = result_cache
+
+    async def execute(self, plan: EnhancedPlan, confirmed: bool = False,
+                      requires_confirmation: Optional[bool] = None,
+                      user_id: str = "default") -> Dict[str, Any]:
+        """
+        Run a plan and return per-step results and timings
+
+        Args:
+            plan: Plan produced by PlannerAgent
+            confirmed: Whether the user has confirmed the plan
+            requires_confirmation: Result of PlannerAgent.requires_confirmation;
+                defaults to plan.requires_confirmation
+            user_id: User whose cached tool results may be used
+        """
+        steps = [self.with_tool_risk(step) for step in plan.steps]
+        if requires_confirmation is None:
+            requires_confirmation = plan.requires_confirmation
+        requires_confirmation = requires_confirmation or any(step.risk_level in GATED_RISK_LEVELS for step in steps)
+        gate = requires_confirmation and not confirmed
+
+        dependencies = infer_dependencies(steps)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        outputs: Dict[int, Any] = {}
+        results: List[Optional[Dict[str, Any]]] = [None] * len(steps)
+        done = {index: asyncio.Event() for index in range(len(steps))}
+        plan_start = time.perf_counter()
+
+        async def run_step(index: int):
+            step = steps[index]
+            try:
+                for dep in dependencies[index]:
+                    await done[dep].wait()
+
+                blocked_by = [dep for dep in dependencies[index] if results[dep]["status"] != "success"]
+                if blocked_by:
+                    results[index] = self._result(index, step, "blocked",
+                                                  error=f"Depends on unfinished steps {[d + 1 for d in blocked_by]}")
+                    return
+                if gate and step.risk_level in GATED_RISK_LEVELS:
+                    results[index] = self._result(index, step, "pending_confirmation")
+                    return
+
+                async with semaphore:
+                    results[index] = await self._run_tool(index, step, outputs, plan_start, user_id)
+            finally:
+                done[index].set()
+
+        with start_span("plan.execute", {"plan.steps": len(steps), "plan.gated": gate}):
+            await asyncio.gather(*(run_step(index) for index in range(len(steps))))
+            wall_time = time.perf_counter() - plan_start
+            critical_path = self._critical_path(results, dependencies)
+            set_span_attributes(**{"plan.wall_time_ms": round(wall_time * 1000, 2),
+                                   "plan.critical_path_ms": round(critical_path * 1000, 2)})
+
+        statuses = {result["status"] for result in results}
+        if not steps or statuses == {"success"}:
+            status = "success"
+        elif "pending_confirmation" in statuses:
+            status = "requires_confirmation"
+        elif "success" in statuses:
+            status = "partial"
+        else:
+            status = "error"
+
+        return {
+            "status": status,
+            "steps": results,
+            "execution_time": wall_time,
+            "critical_path_time": critical_path,
+            "sequential_time": sum(result.get("duration") or 0 for result in results),
+        }
+
+    def with_tool_risk(self, step: ActionStep) -> ActionStep:
+        """The step with its risk raised to the tool's registered level"""
+        level = self.registry.risk_level(step.tool_name, step.risk_level)
+        return step if level == step.risk_level else step.model_copy(update={"risk_level": level})
+
+    async def _run_tool(self, index: int, step: ActionStep, outputs: Dict[int, Any],
+                        plan_start: float, user_id: str) -> Dict[str, Any]:
+        tool = self.tools.get(step.tool_name)
+        if tool is None:
+            return self._result(index, step, "error", error=f"Unknown tool '{step.tool_name}'")
+
+        tool_input = _resolve(step.tool_input, outputs)
+        started = time.perf_counter()
+        with start_span(f"plan.step.{step.tool_name}", {"plan.step": index + 1, "tool.risk_level": step.risk_level}):
+            try:
+                if self.result_cache is not None:
+                    output = await self.result_cache.ainvoke(tool, tool_input, user_id)
+                else:
+                    # Tools are synchronous; the worker thread inherits the span context
+                    output = await asyncio.to_thread(tool.invoke, tool_input)
+                status, error = "success", None
+            except Exception as e:
+                output, status, error = None, "error", str(e)
+
+        duration = time.perf_counter() - started
+        PLAN_STEP_LATENCY.observe(duration, tool=step.tool_name, status=status)
+        if status == "success":
+            outputs[index] = output
+        return self._result(index, step, status, output=output, error=error,
+                            started_at=started - plan_start, duration=duration)
+
+    @staticmethod
+    def _result(index: int, step: ActionStep, status: str, output: Any = None, error: str = None,
+                started_at: float = None, duration: float = None) -> Dict[str, Any]:
+        return {
+            "step": index + 1,
+            "tool": step.tool_name,
+            "risk_level": step.risk_level,
+            "status": status,
+            "output": output,
+            "error": error,
+            "started_at": started_at,
+            "duration": duration,
+        }
+
+    @staticmethod
+    def _critical_path(results: List[Dict[str, Any]], dependencies: List[Set[int]]) -> float:
+        """Longest chain of step durations through the dependency graph"""
+        finish = []
+        for index, result in enumerate(results):
+            earliest = max((finish[dep] for dep in dependencies[index]), default=0.0)
+            finish.append(earliest + (result.get("duration") or 0))
+        return max(finish, default=0.0)
@@ -1,28 +1,18 @@
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser
 from schemas.base import Plan, EnhancedPlan
+from services.llm_gateway import invoke_chain
+from services.llm_provider import get_groq_llm, DEFAULT_GROQ_MODEL
+from services.cache import TTLCache
+from services.tracing import set_span_attributes
 import os
+import copy
+import json
+import hashlib
 
-class PlannerAgent:
-    def __init__(self):
-        self.llm = ChatGroq(
-            model_name="llama3-70b-8192",
-            temperature=0,
-            api_key=os.getenv("GROQ_API_KEY")
-        )
-        self.parser = PydanticOutputParser(pydantic_object=EnhancedPlan)
-        
-    def create_plan(self, user_command: str, context: dict = None) -> EnhancedPlan:
-        """Create an execution plan with confidence scoring and risk assessment"""
-        
-        # Build context string
-        context_str = ""
-        if context:
-            context_str = f"\n\nUser Context:\n{context}"
-        
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are an expert AI planner for an automation system. 
+# Compiled once; format instructions are bound when the planner is created
+PLANNING_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are an expert AI planner for an automation system. 
             
             Available tools:
             - Email: send_email, draft_email, summarize_email
@@ -43,18 +33,67 @@ class PlannerAgent:
             - MEDIUM: Scheduling meetings, modifying existing data
             - LOW: Reading data, drafting content, generating reports
             
+            Step outputs:
+            Steps are numbered from 1 in plan order. When a step needs the output of an
+            earlier step, write "$step_N" in its tool_input instead of guessing the value;
+            it is replaced with step N's output before the step runs, and the step waits
+            for step N. Steps without such a reference may run at the same time.
+            Example: step 1 is summarize_email, step 2 is draft_email with
+            tool_input {{"to": "team@example.com", "body": "$step_1"}}.
+            
             {format_instructions}"""),
-            ("user", "{command}{context}")
-        ])
+    ("user", "{command}{context}")
+])
+
+PLAN_CACHE_TTL = int(os.getenv("PLAN_CACHE_TTL", "900"))
+PLAN_CACHE_SIZE = int(os.getenv("PLAN_CACHE_SIZE", "512"))
+
+class PlannerAgent:
+    def __init__(self):
+        self.llm = get_groq_llm(temperature=0)
+        self.parser = PydanticOutputParser(pydantic_object=EnhancedPlan)
+        # The schema dump is large; render it once instead of on every command
+        self.format_instructions = self.parser.get_format_instructions()
+        self.prompt = PLANNING_PROMPT.partial(format_instructions=self.format_instructions)
+        self.plan_cache = TTLCache("plan", maxsize=PLAN_CACHE_SIZE, ttl=PLAN_CACHE_TTL)
+    
+    @staticmethod
+    def _cache_key(user_command: str, context: dict = None) -> tuple:
+        """Normalized command plus a fingerprint of the context"""
+        normalized = " ".join(user_command.casefold().split())
+        context_json = json.dumps(context or {}, sort_keys=True, default=str)
+        fingerprint = hashlib.sha256(context_json.encode()).hexdigest()[:16]
+        return normalized, fingerprint
+        
+    def create_plan(self, user_command: str, context: dict = None, use_cache: bool = True) -> EnhancedPlan:
+        """Create an execution plan with confidence scoring and risk assessment"""
+        cache_key = self._cache_key(user_command, context)
+        if use_cache:
+            cached = self.plan_cache.get(cache_key)
+            set_span_attributes(**{"cache.plan_hit": cached is not None})
+            if cached is not None:
+                plan = copy.deepcopy(cached)
+                plan.original_command = user_command
+                return plan
         
-        messages = prompt.format_messages(
+        # Build context string
+        context_str = ""
+        if context:
+            context_str = f"\n\nUser Context:\n{context}"
+        
+        messages = self.prompt.format_messages(
             command=user_command,
-            context=context_str,
-            format_instructions=self.parser.get_format_instructions()
+            context=context_str
         )
         
-        response = self.llm.invoke(messages)
-        return self.parser.parse(response.content)
+        response = invoke_chain(self.llm, messages, tool="create_plan", model=DEFAULT_GROQ_MODEL)
+        plan = self.parser.parse(response.content)
+        
+        # High-risk plans are always re-planned so they never run from a stale cache entry
+        if use_cache and self.assess_overall_risk(plan) != 'high':
+            self.plan_cache.set(cache_key, copy.deepcopy(plan))
+        
+        return plan
     
     def assess_overall_risk(self, plan: EnhancedPlan) -> str:
         """Assess overall risk of the plan"""
@@ -68,3 +107,14 @@ class PlannerAgent:
     def requires_confirmation(self, plan: EnhancedPlan) -> bool:
         """Determine if plan requires user confirmation"""
         return self.assess_overall_risk(plan) in ['high', 'medium']
+
+
+# Created on first use so importing the service does not build the planner
+_planner_agent = None
+
+def get_planner_agent() -> PlannerAgent:
+    """Get or create the global planner agent"""
+    global _planner_agent
+    if _planner_agent is None:
+        _planner_agent = PlannerAgent()
+    return _planner_agent
@@ -1,11 +1,16 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request, Response, Header, Query, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from starlette.routing import Match
+from pydantic import BaseModel, ValidationError
 from typing import Optional, Dict, Any
 import os
 from dotenv import load_dotenv
-import PyPDF2
 import io
+import json
+import math
+import time
 
 load_dotenv()
 
@@ -20,24 +25,85 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-from agents.planner import PlannerAgent
-from agents.executor import AgentSystem
-from agents.interview_agent import get_interview_agent, clear_interview_session
-from schemas.base import CommandRequest
+from agents.interview_agent import get_interview_agent, find_interview_agent, clear_interview_session
+from schemas.base import CommandRequest, SessionStateResponse
 from memory.conversation_memory import get_memory
 from services.pattern_analyzer import router as pattern_router
+from services.metrics import REQUEST_LATENCY, render_metrics
+from services.tracing import start_span, memory_exporter
+from services.llm_provider import warm_up_providers
+from services.cohort_analytics import get_cohort_table
+from services.interview_archive import get_interview_archive
+from services.session_guard import run_turn, session_lock, replayed_turn, store_turn
+from services.responses import FastJSONResponse
+from services.llm_scheduler import LLMOverBudget, get_llm_scheduler
+from services.evaluation_cascade import cascade_stats
 
-# Initialize Agents
-planner = PlannerAgent()
-executor = AgentSystem()
+# Planner and executor are built on first use (agents.planner.get_planner_agent,
+# agents.executor.get_agent_system) so interview-only deployments never pay for them
 
 # Include pattern analyzer routes
 app.include_router(pattern_router, tags=["analytics"])
 
+def _route_template(request: Request) -> str:
+    """Route path template (e.g. /interview/session/{session_id}) to keep label cardinality bounded"""
+    route = request.scope.get("route")
+    if route is not None:
+        return route.path
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Open a server span per request, continuing the caller's W3C traceparent"""
+    with start_span(
+        f"{request.method} {request.url.path}",
+        {"http.method": request.method, "http.target": request.url.path},
+        traceparent=request.headers.get("traceparent")
+    ) as span:
+        response = await call_next(request)
+        route = _route_template(request)
+        span.name = f"{request.method} {route}"
+        span.set_attributes({"http.route": route, "http.status_code": response.status_code})
+        response.headers["traceparent"] = span.traceparent
+        response.headers["X-Trace-Id"] = span.trace_id
+        return response
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Record per-endpoint request latency"""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            endpoint=_route_template(request),
+            status=str(status)
+        )
+
+@app.exception_handler(LLMOverBudget)
+async def llm_over_budget(request: Request, exc: LLMOverBudget):
+    """Shed LLM calls surface as 503 so clients back off instead of retrying immediately"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "provider": exc.provider, "priority": exc.priority, "reason": exc.reason},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))}
+    )
+
 class CommandRequest(BaseModel):
     command: str
     user_id: str
     context: Optional[Dict[str, Any]] = None
+    confirmed: bool = False
+    plan_id: Optional[str] = None  # Required with confirmed=true: the plan that was shown
 
 class EmailDraftRequest(BaseModel):
     recipient: str
@@ -52,6 +118,9 @@ class InterviewStartRequest(BaseModel):
     job_role: str
     difficulty: str = "medium"
     interview_type: str = "general"  # hr, technical, behavioral, situational
+    instant: bool = False  # First question from the local bank, resume-based questions generated in the background
+    lazy: bool = False  # Generate questions one turn ahead instead of all upfront
+    num_questions: int = 5
 
 class InterviewResponseRequest(BaseModel):
     session_id: str
@@ -93,16 +162,69 @@ def health_check():
             "timestamp": __import__('datetime').datetime.now().isoformat()
         }
 
+@app.on_event("startup")
+async def warm_up_on_startup():
+    """Pre-connect configured providers when WARMUP_ON_STARTUP=true"""
+    if os.getenv("WARMUP_ON_STARTUP", "false").lower() == "true":
+        await run_in_threadpool(warm_up_providers)
+
+@app.post("/warmup")
+def warmup():
+    """Explicit warm-up hook for readiness probes and deploy scripts"""
+    return {
+        "status": "success",
+        "providers": warm_up_providers()
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/llm/budget")
+def llm_budget():
+    """Remaining rate-limit budget and queued calls per provider"""
+    return {"providers": get_llm_scheduler().snapshot()}
+
+@app.get("/evaluation/cascade")
+def evaluation_cascade():
+    """Escalation rate and small/large model agreement of the evaluation cascade"""
+    return cascade_stats.report()
+
+@app.get("/traces")
+def list_traces(limit: int = 20):
+    """Most recent trace ids held by the in-memory exporter"""
+    if memory_exporter is None:
+        raise HTTPException(status_code=404, detail="In-memory trace exporter is disabled")
+    return {"trace_ids": memory_exporter.recent_trace_ids(limit)}
+
+@app.get("/traces/{trace_id}")
+def get_trace(trace_id: str):
+    """All finished spans of a trace, ordered by start time"""
+    if memory_exporter is None:
+        raise HTTPException(status_code=404, detail="In-memory trace exporter is disabled")
+    spans = memory_exporter.get_trace(trace_id)
+    if not spans:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return {"trace_id": trace_id, "spans": spans}
+
 @app.post("/interview/start")
-def start_interview(request: InterviewStartRequest):
+async def start_interview(
+    request: InterviewStartRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None)
+):
     """Start a new interview session"""
-    try:
+    def start():
         agent = get_interview_agent(request.session_id)
         first_question = agent.start_interview(
             request.resume_text,
             request.job_role,
             request.difficulty,
-            request.interview_type
+            request.interview_type,
+            instant=request.instant,
+            lazy=request.lazy,
+            num_questions=request.num_questions
         )
         
         return {
@@ -110,14 +232,35 @@ def start_interview(request: InterviewStartRequest):
             "session_id": request.session_id,
             **first_question
         }
+    
+    try:
+        result, replayed = await run_turn(
+            request.session_id, "start", idempotency_key, request.model_dump(), start
+        )
+    except (HTTPException, LLMOverBudget):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+def require_interview_agent(session_id: str):
+    """Agent of a started session; 404 so the caller knows to start it (again) with the resume"""
+    agent = find_interview_agent(session_id)
+    if agent is None:
+        raise HTTPException(status_code=404, detail="Interview session not found; start it again")
+    return agent
 
 @app.post("/interview/respond")
-def respond_to_question(request: InterviewResponseRequest):
+async def respond_to_question(
+    request: InterviewResponseRequest,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None)
+):
     """Submit response to interview question"""
-    try:
-        agent = get_interview_agent(request.session_id)
+    def respond():
+        agent = require_interview_agent(request.session_id)
         result = agent.submit_response(
             request.response,
             request.resume_text,
@@ -128,41 +271,311 @@ def respond_to_question(request: InterviewResponseRequest):
             "status": "success",
             **result
         }
+    
+    try:
+        result, replayed = await run_turn(
+            request.session_id, "respond", idempotency_key, request.model_dump(), respond
+        )
+    except (HTTPException, LLMOverBudget):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+def finish_interview(session_id: str, resume_text: str = "", job_role: str = "", user_id: Optional[str] = None):
+    """Final analytics for a session; records it in the cohort table and archive, then drops it from memory"""
+    agent = require_interview_agent(session_id)
+    analytics = agent.complete_interview(resume_text, job_role)
+    
+    # Feed the cohort table; a failure here must not cost the candidate their analytics
+    try:
+        get_cohort_table().record(
+            analytics,
+            job_role or agent.job_role,
+            agent.interview_type,
+            agent.initial_difficulty
+        )
+    except Exception as e:
+        print(f"Cohort record failed for session {session_id}: {e}")
+    
+    # Archive the full session before it is dropped from memory
+    try:
+        get_interview_archive().archive(agent.archive_record(session_id, analytics, user_id))
+    except Exception as e:
+        print(f"Interview archive failed for session {session_id}: {e}")
+    
+    # Clear session
+    clear_interview_session(session_id)
+    
+    return {
+        "status": "success",
+        "analytics": analytics
+    }
 
 @app.post("/interview/complete")
-def complete_interview(request: dict):
+async def complete_interview(
+    request: dict,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None)
+):
     """Complete interview and get analytics"""
+    session_id = request.get("session_id")
+    
+    def complete():
+        return finish_interview(
+            session_id,
+            request.get("resume_text", ""),
+            request.get("job_role", ""),
+            request.get("user_id")
+        )
+    
     try:
-        session_id = request.get("session_id")
-        resume_text = request.get("resume_text", "")
-        job_role = request.get("job_role", "")
-        
-        agent = get_interview_agent(session_id)
-        analytics = agent.complete_interview(resume_text, job_role)
-        
-        # Clear session
-        clear_interview_session(session_id)
-        
-        return {
-            "status": "success",
-            "analytics": analytics
-        }
+        result, replayed = await run_turn(session_id, "complete", idempotency_key, request, complete)
+    except (HTTPException, LLMOverBudget):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
 
-@app.get("/interview/session/{session_id}")
-def get_session_state(session_id: str):
-    """Get current session state and metrics"""
+@app.websocket("/ws/interview/{session_id}")
+async def interview_socket(websocket: WebSocket, session_id: str):
+    """
+    Interview over one connection. The resume and parsed context stay on the
+    server after "start"; each answer streams back a provisional (heuristic)
+    evaluation, the LLM evaluation and then the next question.
+    
+    Client messages (optional "id" is echoed back):
+        {"type": "start", "resume_text", "job_role", "difficulty", "interview_type", "instant", "lazy"}
+        {"type": "answer", "response", "idempotency_key"}
+        {"type": "complete", "user_id", "idempotency_key"}
+        {"type": "state"} / {"type": "ping"}
+    Server events: question, evaluation, completed, state, pong, error
+    (status 404 on answer/complete/state: the session is unknown, send "start" again)
+    """
+    await websocket.accept()
     try:
-        agent = get_interview_agent(session_id)
-        state = agent.get_session_state()
-        
-        return {
+        while True:
+            raw = await websocket.receive_text()
+            try:
+                message = json.loads(raw)
+                if not isinstance(message, dict):
+                    raise ValueError("Messages must be JSON objects")
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "status": 400, "detail": str(e)})
+                continue
+            
+            send = lambda event: websocket.send_json({**event, "id": message.get("id")})
+            try:
+                await _handle_socket_message(send, session_id, message)
+            except HTTPException as e:
+                await send({"type": "error", "status": e.status_code, "detail": e.detail})
+            except LLMOverBudget as e:
+                await send({"type": "error", "status": 503, "detail": str(e), "retry_after": math.ceil(e.retry_after)})
+            except ValidationError as e:
+                await send({"type": "error", "status": 422, "detail": e.errors(include_url=False)})
+            except Exception as e:
+                await send({"type": "error", "status": 500, "detail": str(e)})
+    except WebSocketDisconnect:
+        pass
+
+async def _handle_socket_message(send, session_id: str, message: dict):
+    kind = message.get("type")
+    key = message.get("idempotency_key")
+    
+    if kind == "ping":
+        await send({"type": "pong"})
+    
+    elif kind == "start":
+        request = InterviewStartRequest(**{**message, "session_id": session_id})
+        result, _ = await run_turn(session_id, "start", key, request.model_dump(), lambda: {
             "status": "success",
-            **state
-        }
+            "session_id": session_id,
+            **get_interview_agent(session_id).start_interview(
+                request.resume_text,
+                request.job_role,
+                request.difficulty,
+                request.interview_type,
+                instant=request.instant,
+                lazy=request.lazy,
+                num_questions=request.num_questions
+            )
+        })
+        question = {k: v for k, v in result.items() if k not in ("status", "session_id")}
+        await send({"type": "question", "question": question})
+    
+    elif kind == "answer":
+        response = message.get("response")
+        if not isinstance(response, str) or not response.strip():
+            raise HTTPException(status_code=400, detail="answer needs a non-empty response")
+        payload = {"session_id": session_id, "response": response}
+        
+        # Same lock and replay store as POST /interview/respond, but the turn is sent in two parts
+        async with session_lock(session_id):
+            result = replayed_turn(session_id, "respond", key, payload)
+            if result is None:
+                agent = require_interview_agent(session_id)
+                # Heuristic scores go out immediately; the LLM evaluation follows
+                provisional = agent.provisional_evaluation(response)
+                if provisional is None:
+                    raise HTTPException(status_code=409, detail="No active question")
+                await send({"type": "evaluation", "evaluation": provisional, "provisional": True})
+                evaluation = await run_in_threadpool(agent.evaluate_response, response, "", provisional)
+                if evaluation is None:
+                    raise HTTPException(status_code=409, detail="No active question")
+                await send({"type": "evaluation", "evaluation": evaluation})
+                result = {"status": "success", "evaluation": evaluation,
+                          **(await run_in_threadpool(agent.advance, response))}
+                store_turn(session_id, "respond", key, payload, result)
+            else:
+                await send({"type": "evaluation", "evaluation": result["evaluation"], "replayed": True})
+        await send({"type": "question", "question": result["next_question"], "metrics": result["metrics"]})
+    
+    elif kind == "complete":
+        payload = {"session_id": session_id, "user_id": message.get("user_id")}
+        result, _ = await run_turn(session_id, "complete", key, payload,
+                                   lambda: finish_interview(session_id, user_id=message.get("user_id")))
+        await send({"type": "completed", "analytics": result["analytics"]})
+    
+    elif kind == "state":
+        state = await run_in_threadpool(require_interview_agent(session_id).get_session_state)
+        await send({"type": "state", **state})
+    
+    else:
+        raise HTTPException(status_code=400, detail=f"Unknown message type '{kind}'")
+
+@app.get("/analytics/cohort")
+def cohort_analytics(
+    job_role: Optional[str] = None,
+    interview_type: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    score: Optional[float] = None,
+    days: Optional[int] = None,
+    bucket: str = "week"
+):
+    """Score distribution, percentiles, skill breakdown and trend for a cohort of completed interviews"""
+    since = int(time.time()) - days * 86400 if days else None
+    return {
+        "status": "success",
+        **get_cohort_table().stats(
+            job_role=job_role,
+            interview_type=interview_type,
+            difficulty=difficulty,
+            since=since,
+            score=score,
+            bucket=bucket
+        )
+    }
+
+def _archive_filters(user_id, job_role, days, min_score, max_score):
+    return {
+        "user_id": user_id,
+        "job_role": job_role,
+        "since": int(time.time()) - days * 86400 if days else None,
+        "min_score": min_score,
+        "max_score": max_score
+    }
+
+@app.get("/interviews/archive")
+def list_archived_interviews(
+    user_id: Optional[str] = None,
+    job_role: Optional[str] = None,
+    days: Optional[int] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    order_by: str = "time",
+    limit: int = 50,
+    offset: int = 0
+):
+    """Summaries of completed interviews, served from the archive index"""
+    if order_by not in ("time", "score"):
+        raise HTTPException(status_code=400, detail="order_by must be 'time' or 'score'")
+    return {
+        "status": "success",
+        **get_interview_archive().query(
+            **_archive_filters(user_id, job_role, days, min_score, max_score),
+            order_by=order_by,
+            limit=max(1, min(limit, 500)),
+            offset=max(offset, 0)
+        )
+    }
+
+@app.get("/interviews/archive/export")
+def export_archived_interviews(
+    user_id: Optional[str] = None,
+    job_role: Optional[str] = None,
+    days: Optional[int] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None
+):
+    """Stream matching archived interviews as NDJSON"""
+    records = get_interview_archive().iter_records(
+        **_archive_filters(user_id, job_role, days, min_score, max_score)
+    )
+    return StreamingResponse(
+        (json.dumps(record) + "\n" for record in records),
+        media_type="application/x-ndjson"
+    )
+
+@app.get("/interviews/archive/{session_id}")
+def get_archived_interview(session_id: str):
+    """Full record of one completed interview"""
+    record = get_interview_archive().get(session_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Interview not found in archive")
+    return {"status": "success", "interview": record}
+
+def _session_etag(version: str, since: Optional[int], offset: int, limit: Optional[int], compact: bool) -> str:
+    """Weak ETag of one view of the session: the state version plus the paging parameters"""
+    return f'W/"{version}~{since}~{offset}~{limit}~{int(compact)}"'
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison against a comma-separated If-None-Match list (or *)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+@app.get(
+    "/interview/session/{session_id}",
+    response_model=SessionStateResponse,
+    response_model_exclude_none=True,
+    response_class=FastJSONResponse
+)
+def get_session_state(
+    session_id: str,
+    request: Request,
+    response: Response,
+    since: Optional[int] = Query(None, ge=0),
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    compact: bool = False
+):
+    """
+    Get current session state and metrics
+    
+    Answers 304 when If-None-Match carries the ETag of the same view (state
+    version and paging parameters); since=<history_total from the previous
+    poll> returns only newer history turns.
+    """
+    try:
+        agent = require_interview_agent(session_id)
+        etag = _session_etag(agent.state_version(), since, offset, limit, compact)
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        state = agent.get_session_state(since=since, offset=offset, limit=limit, compact=compact)
+        
+        response.headers["ETag"] = _session_etag(state["version"], since, offset, limit, compact)
+        response.headers["Cache-Control"] = "no-cache"
+        return {"status": "success", **state}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -170,13 +583,17 @@ def get_session_state(session_id: str):
 async def parse_resume(file: UploadFile = File(...)):
     """Parse PDF resume and extract text"""
     try:
-        contents = await file.read()
-        pdf_file = io.BytesIO(contents)
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
+        import PyPDF2  # Deferred: only needed by this endpoint
         
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text()
+        contents = await file.read()
+        with start_span("resume.extract_pdf_text", {"resume.bytes": len(contents)}) as span:
+            pdf_file = io.BytesIO(contents)
+            pdf_reader = PyPDF2.PdfReader(pdf_file)
+            
+            text = ""
+            for page in pdf_reader.pages:
+                text += page.extract_text()
+            span.set_attribute("resume.pages", len(pdf_reader.pages))
         
         return {
             "status": "success",
@@ -186,6 +603,45 @@ async def parse_resume(file: UploadFile = File(...)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/command")
+async def run_command(request: CommandRequest):
+    """
+    Plan an automation command and execute its steps as a dependency graph
+    
+    A plan with medium/high-risk steps comes back with status
+    requires_confirmation and a plan_id; confirming sends that plan_id with
+    confirmed=true and runs exactly the stored plan, never a new one.
+    """
+    from agents.planner import get_planner_agent
+    from agents.executor import get_agent_system
+    
+    try:
+        agent_system = get_agent_system()
+        if request.confirmed:
+            if not request.plan_id:
+                raise HTTPException(status_code=400, detail="confirmed=true needs the plan_id of the plan that was shown")
+            plan = agent_system.take_plan(request.plan_id, request.user_id)
+            if plan is None:
+                raise HTTPException(status_code=404, detail="Plan not found or expired; submit the command again")
+        else:
+            plan = await run_in_threadpool(get_planner_agent().create_plan, request.command, request.context)
+            agent_system.assess_plan(plan)
+        
+        result = await agent_system.execute_plan(
+            plan,
+            user_id=request.user_id,
+            confirmed=request.confirmed,
+            requires_confirmation=plan.requires_confirmation
+        )
+        body = {"plan": plan.model_dump(), **result}
+        if result["status"] == "requires_confirmation":
+            body["plan_id"] = agent_system.hold_plan(plan, request.user_id)
+        return body
+    except (HTTPException, LLMOverBudget):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/memory/{user_id}")
 def get_user_memory(user_id: str):
     """Get user's conversation memory"""
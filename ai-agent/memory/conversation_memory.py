@@ -1,6 +1,6 @@
-from langchain_groq import ChatGroq
 from langchain_core.messages import HumanMessage, AIMessage
 from typing import List, Dict, Optional
+from services.llm_provider import get_groq_llm
 import os
 
 class ConversationMemoryManager:
@@ -8,11 +8,6 @@ class ConversationMemoryManager:
     
     def __init__(self, user_id: str):
         self.user_id = user_id
-        self.llm = ChatGroq(
-            model="llama3-70b-8192",
-            temperature=0,
-            api_key=os.getenv("GROQ_API_KEY")
-        )
         
         # Simple message history
         self.messages = []
@@ -20,6 +15,11 @@ class ConversationMemoryManager:
         # User context (preferences, patterns)
         self.user_context = {}
     
+    @property
+    def llm(self):
+        """Shared Groq client, created on first use"""
+        return get_groq_llm(temperature=0)
+    
     def add_interaction(self, user_message: str, ai_response: str):
         """Add a user-AI interaction to memory"""
         self.messages.append({"role": "user", "content": user_message})
@@ -8,7 +8,7 @@ class UserContext(BaseModel):
 
 class ActionStep(BaseModel):
     tool_name: str = Field(..., description="The name of the tool to use")
-    tool_input: Dict[str, Any] = Field(..., description="Input parameters for the tool")
+    tool_input: Dict[str, Any] = Field(..., description="Input parameters for the tool; \"$step_N\" (1-based) stands for step N's output")
     reasoning: str = Field(..., description="Why this tool was chosen")
     risk_level: str = Field(default="low", description="Risk level: low, medium, high")
     confidence: float = Field(default=0.8, description="Confidence score 0.0-1.0")
@@ -35,3 +35,32 @@ class CommandRequest(BaseModel):
     command: str
     user_id: str
     context: Optional[Dict[str, Any]] = None
+
+class ConversationTurn(BaseModel):
+    question: str
+    response: str
+    timestamp: Optional[str] = None
+    evaluation: Optional[Dict[str, Any]] = None
+    score: Optional[float] = Field(default=None, description="Overall score (compact mode)")
+
+class SessionMetrics(BaseModel):
+    avg_confidence: float = 0
+    avg_clarity: float = 0
+    avg_relevance: float = 0
+
+class SessionStateResponse(BaseModel):
+    """Interview session state; poll with If-None-Match and since=<history_total> for changes only"""
+    status: str = "success"
+    version: str
+    session_state: str
+    interview_type: str
+    current_difficulty: str
+    questions_answered: int
+    questions_source: str
+    total_questions: int
+    current_metrics: SessionMetrics
+    delta: bool = False
+    history_total: int
+    history_start: int
+    history_end: int
+    conversation_history: List[ConversationTurn] = []
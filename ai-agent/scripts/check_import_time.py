@@ -0,0 +1,91 @@
+"""
+Import-Time Budget Check
+Imports main.py in a fresh interpreter and fails (exit code 1) when:
+    - the import takes longer than the budget, or
+    - a provider SDK / PyPDF2 was imported eagerly, or
+    - an agent or LLM client was constructed at import time.
+
+Usage:
+    python scripts/check_import_time.py [--budget 2.0] [--runs 3]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+AGENT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must only be imported when a request (or warm-up) actually needs them
+LAZY_MODULES = [
+    "langchain_groq",
+    "langchain_google_genai",
+    "langchain_openai",
+    "langchain_community",
+    "PyPDF2",
+]
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+
+import agents.planner, agents.executor, services.llm_provider
+print(json.dumps({
+    "elapsed": elapsed,
+    "eager_modules": [m for m in %r if m in sys.modules],
+    "constructed": {
+        "planner": agents.planner._planner_agent is not None,
+        "agent_system": agents.executor._agent_system is not None,
+        "multi_llm_provider": services.llm_provider._llm_provider is not None,
+        "chat_models": len(services.llm_provider._chat_models),
+    },
+}))
+""" % (LAZY_MODULES,)
+
+
+def measure_once() -> dict:
+    env = dict(os.environ, WARMUP_ON_STARTUP="false")
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=AGENT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if importing main.py exceeds the budget")
+    parser.add_argument("--budget", type=float, default=float(os.getenv("IMPORT_TIME_BUDGET", "2.0")),
+                        help="Maximum import time in seconds (best of --runs)")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    samples = [measure_once() for _ in range(args.runs)]
+    best = min(sample["elapsed"] for sample in samples)
+    last = samples[-1]
+
+    failures = []
+    if best > args.budget:
+        failures.append(f"import took {best:.3f}s (budget {args.budget:.3f}s)")
+    if last["eager_modules"]:
+        failures.append(f"eagerly imported: {', '.join(last['eager_modules'])}")
+    constructed = [name for name, value in last["constructed"].items() if value]
+    if constructed:
+        failures.append(f"constructed at import time: {', '.join(constructed)}")
+
+    print(f"import main: best {best:.3f}s over {args.runs} runs (budget {args.budget:.3f}s)")
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
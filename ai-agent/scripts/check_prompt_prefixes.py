@@ -0,0 +1,72 @@
+"""
+Prompt Prefix Stability Check
+Renders every module-level prompt template with two different sets of
+variables and fails (exit code 1) if the system message is not byte-identical,
+i.e. if a dynamic value leaked into the cacheable prefix.
+
+Usage:
+    python scripts/check_prompt_prefixes.py
+"""
+
+import os
+import sys
+
+AGENT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if AGENT_ROOT not in sys.path:
+    sys.path.insert(0, AGENT_ROOT)
+
+from langchain_core.prompts import ChatPromptTemplate
+
+import tools.interview_tool
+import tools.conversational_interview_tool
+import services.resume_parser
+import services.pattern_analyzer
+
+PROMPT_MODULES = [
+    tools.interview_tool,
+    tools.conversational_interview_tool,
+    services.resume_parser,
+    services.pattern_analyzer,
+]
+
+
+def iter_prompts():
+    for module in PROMPT_MODULES:
+        for name, value in vars(module).items():
+            if name.endswith("_PROMPT") and isinstance(value, ChatPromptTemplate):
+                yield f"{module.__name__}.{name}", value
+
+
+def check_prompt(prompt: ChatPromptTemplate) -> list:
+    failures = []
+    system_template = prompt.messages[0]
+    if system_template.input_variables:
+        failures.append(f"system message has variables {system_template.input_variables}")
+
+    first = prompt.format_messages(**{var: f"A-{var}" for var in prompt.input_variables})
+    second = prompt.format_messages(**{var: f"B-{var}-longer" for var in prompt.input_variables})
+    if first[0].content.encode() != second[0].content.encode():
+        failures.append("system message differs between renders")
+    if not prompt.input_variables:
+        failures.append("prompt has no variables; expected per-call values in the user message")
+    return failures
+
+
+def main():
+    failed = False
+    count = 0
+    for name, prompt in iter_prompts():
+        count += 1
+        failures = check_prompt(prompt)
+        status = "OK" if not failures else "FAIL"
+        print(f"{status:<5}{name}")
+        for failure in failures:
+            print(f"     {failure}")
+        failed = failed or bool(failures)
+
+    print(f"{count} prompts checked")
+    sys.exit(1 if failed or count == 0 else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,455 @@
+"""
+Interview Load-Test Harness
+Drives N simulated candidates through /interview/start -> k x /interview/respond
+-> /interview/complete and reports throughput, per-endpoint latency percentiles,
+peak RSS and LLM calls per interview.
+
+Modes:
+    In-process (default): the FastAPI app is served by uvicorn on a background
+    thread with every LLM client replaced by a stub, so only our own pipeline
+    cost is measured. Stub runs keep their data stores in a fresh temporary
+    directory, so every run starts from an empty question index.
+    Remote (--url): drives an already running service over HTTP. Start it with
+    --serve-stub to get the same stub LLM in a separate process.
+
+Usage:
+    python scripts/load_test.py --candidates 50 --concurrency 10 --turns 5
+    python scripts/load_test.py --url http://localhost:8000 --server-pid 1234
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import socket
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+AGENT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if AGENT_ROOT not in sys.path:
+    sys.path.insert(0, AGENT_ROOT)
+
+ENDPOINTS = ["/interview/start", "/interview/respond", "/interview/complete"]
+
+SAMPLE_RESUME = """Jane Candidate
+Software Engineer
+
+SKILLS
+Python, JavaScript, React, Node.js, Docker, PostgreSQL, AWS
+
+PROJECTS
+E-commerce Platform - Built a React and Node.js storefront with PostgreSQL.
+Realtime Chat - WebSocket chat service in Python deployed on AWS with Docker.
+
+EXPERIENCE
+Backend Developer at Acme Corp (2022-2024)
+Designed REST APIs and CI/CD pipelines.
+
+EDUCATION
+B.Tech Computer Science, State University, 2022
+"""
+
+SAMPLE_ANSWERS = [
+    "In the e-commerce platform I owned the checkout service. I designed the API, "
+    "added idempotent payment callbacks and cut p95 latency by caching product data.",
+    "I think I would probably start by reproducing the bug locally, then maybe add logging.",
+    "We used Docker for local parity and deployed to AWS ECS. I wrote the compose files "
+    "and the GitHub Actions pipeline that built and pushed images.",
+    "I prioritize by impact and deadline, communicate trade-offs early and keep the team updated.",
+    "PostgreSQL indexes were the main fix: we added a composite index and rewrote an N+1 query.",
+]
+
+
+# ---------------------------------------------------------------------------
+# Stub LLM
+# ---------------------------------------------------------------------------
+
+class StubLLMStats:
+    """Thread-safe counters for stubbed LLM calls"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = defaultdict(int)
+
+    def record(self, kind: str):
+        with self._lock:
+            self.calls[kind] += 1
+
+    def total(self) -> int:
+        with self._lock:
+            return sum(self.calls.values())
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.calls)
+
+
+STUB_STATS = StubLLMStats()
+STUB_LATENCY = {"mean": 0.0}
+
+_STUB_RESPONSES = [
+    # (marker in prompt, kind, canned JSON response)
+    ("resume parser", "parse_resume", {
+        "skills": ["Python", "React", "Node.js", "Docker", "PostgreSQL", "AWS"],
+        "projects": [
+            {"name": "E-commerce Platform", "description": "React storefront",
+             "technologies": ["React", "Node.js"], "role": "Developer"},
+        ],
+        "experience": [
+            {"company": "Acme Corp", "role": "Backend Developer",
+             "duration": "2022-2024", "responsibilities": ["REST APIs"]},
+        ],
+        "education": [
+            {"degree": "B.Tech", "institution": "State University", "year": "2022"},
+        ],
+        "technologies": ["Python", "React", "Node.js", "Docker", "PostgreSQL", "AWS"],
+    }),
+    ("THREE key metrics", "evaluate_response", {
+        "confidence": 78, "clarity": 74, "relevance": 81, "overall_score": 78,
+        "feedback": "Solid answer with a concrete example.",
+        "strength": "Specific details", "improvement": "Quantify the outcome",
+        "resume_alignment": "Consistent with the listed project",
+    }),
+    ("follow-up question", "followup_question", {
+        "question": "You mentioned caching. How did you invalidate it in the e-commerce platform?",
+        "category": "technical", "difficulty": "medium", "reasoning": "Probe depth",
+    }),
+    ("adaptive interview system", "adjust_difficulty", {
+        "recommended_difficulty": "medium", "should_change": False,
+        "reasoning": "Scores are stable", "average_performance": 75,
+    }),
+    ("summarizing", "conversation_summary", {
+        "key_topics": ["APIs", "Docker"], "demonstrated_strengths": ["Ownership"],
+        "areas_to_explore": ["Testing"], "flow_quality": "good",
+        "summary": "Candidate gave grounded answers.",
+    }),
+    ("comprehensive analytics", "interview_analytics", {
+        "score": 77, "feedback": "Good overall.",
+        "skill_breakdown": {"technical": 78, "communication": 75,
+                            "problem_solving": 76, "domain_knowledge": 77},
+        "areas_of_improvement": ["Metrics", "Testing", "Design"],
+        "recommended_resources": ["System Design Primer"],
+        "resume_alignment": "Good", "readiness_score": 76, "next_steps": "Practice",
+    }),
+    ("interview questions", "generate_questions", [
+        {"question": "I see you built an E-commerce Platform. Walk me through its architecture.",
+         "category": "project", "difficulty": "medium"},
+        {"question": "You mentioned Docker. How did you use it in your Realtime Chat project?",
+         "category": "technical", "difficulty": "medium"},
+        {"question": "At Acme Corp you designed REST APIs. How did you version them?",
+         "category": "technical", "difficulty": "medium"},
+        {"question": "Your resume shows PostgreSQL. Describe a query you optimized.",
+         "category": "technical", "difficulty": "medium"},
+        {"question": "How did you structure the CI/CD pipeline at Acme Corp?",
+         "category": "technical", "difficulty": "medium"},
+    ]),
+]
+
+
+def _prompt_text(prompt_input) -> str:
+    """Flatten a prompt value, message list or string into plain text"""
+    if hasattr(prompt_input, "to_messages"):
+        prompt_input = prompt_input.to_messages()
+    if isinstance(prompt_input, list):
+        return "\n".join(str(getattr(m, "content", m)) for m in prompt_input)
+    return str(prompt_input)
+
+
+def _stub_reply(prompt_input):
+    text = _prompt_text(prompt_input)
+    for marker, kind, payload in _STUB_RESPONSES:
+        if marker in text:
+            return kind, json.dumps(payload)
+    return "other", json.dumps({"summary": "stub response", "suggestions": []})
+
+
+def _make_stub_model():
+    from langchain_core.messages import AIMessage
+    from langchain_core.runnables import Runnable
+
+    class StubChatModel(Runnable):
+        """Drop-in replacement for ChatGroq / ChatGoogleGenerativeAI"""
+
+        def __init__(self, *args, **kwargs):
+            self.model = kwargs.get("model") or kwargs.get("model_name") or "stub"
+
+        def invoke(self, input, config=None, **kwargs):
+            kind, content = _stub_reply(input)
+            STUB_STATS.record(kind)
+            if STUB_LATENCY["mean"]:
+                time.sleep(random.expovariate(1.0 / STUB_LATENCY["mean"]))
+            return AIMessage(
+                content=content,
+                response_metadata={"token_usage": {
+                    "prompt_tokens": len(_prompt_text(input)) // 4,
+                    "completion_tokens": len(content) // 4,
+                }},
+            )
+
+        async def ainvoke(self, input, config=None, **kwargs):
+            import asyncio
+            return await asyncio.to_thread(self.invoke, input, config, **kwargs)
+
+    return StubChatModel
+
+
+def install_stub_llm(mean_latency: float = 0.0):
+    """Replace provider chat clients with the stub and isolate the data stores before the app is imported"""
+    STUB_LATENCY["mean"] = mean_latency
+    stub = _make_stub_model()
+
+    # The stub has no provider quota; rate limits from .env would only measure the scheduler's waits
+    for provider in ("GROQ", "GEMINI", "OPENAI", "OLLAMA"):
+        os.environ[f"LLM_LIMIT_{provider}_RPM"] = "0"
+        os.environ[f"LLM_LIMIT_{provider}_TPM"] = "0"
+
+    # Stub interviews go to throwaway stores: they must not land in real data, and a question
+    # index left by an earlier run would skip generation calls and skew LLM calls per interview
+    data_dir = tempfile.mkdtemp(prefix="load-test-")
+    os.environ["COHORT_SCORES_PATH"] = os.path.join(data_dir, "cohort", "scores.bin")
+    os.environ["INTERVIEW_ARCHIVE_DIR"] = os.path.join(data_dir, "interviews")
+    os.environ["QUESTION_INDEX_PATH"] = os.path.join(data_dir, "questions", "index.jsonl")
+    os.environ["ACTIVITY_STORE_DIR"] = os.path.join(data_dir, "activity")
+
+    import langchain_groq
+    import langchain_google_genai
+    langchain_groq.ChatGroq = stub
+    langchain_google_genai.ChatGoogleGenerativeAI = stub
+
+
+# ---------------------------------------------------------------------------
+# Server management
+# ---------------------------------------------------------------------------
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_in_process_server(port: int):
+    """Serve main.app from a background thread and wait until it accepts requests"""
+    import uvicorn
+    from main import app
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+
+    deadline = time.time() + 30
+    while not server.started:
+        if time.time() > deadline or not thread.is_alive():
+            raise RuntimeError("In-process server failed to start")
+        time.sleep(0.05)
+    return server, thread
+
+
+def peak_rss_mb(pid: int = None) -> float:
+    """Peak resident set size in MB for this process or a local server pid"""
+    if pid is None:
+        # ru_maxrss is KB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+# ---------------------------------------------------------------------------
+# Load generation
+# ---------------------------------------------------------------------------
+
+class LatencyRecorder:
+    """Collects per-endpoint latency samples and error counts"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, endpoint: str, seconds: float, ok: bool):
+        with self._lock:
+            self.samples[endpoint].append(seconds)
+            if not ok:
+                self.errors[endpoint] += 1
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def run_candidate(http, base_url: str, index: int, turns: int, recorder: LatencyRecorder, run_id: str) -> bool:
+    """Drive one simulated candidate through a full interview"""
+    session_id = f"load-{run_id}-{index}"
+    job_role = "Software Engineer"
+
+    def post(endpoint, payload):
+        start = time.perf_counter()
+        try:
+            response = http.post(f"{base_url}{endpoint}", json=payload, timeout=120)
+            ok = response.status_code == 200
+        except Exception:
+            response, ok = None, False
+        recorder.record(endpoint, time.perf_counter() - start, ok)
+        return response if ok else None
+
+    if post("/interview/start", {
+        "session_id": session_id,
+        "resume_text": SAMPLE_RESUME,
+        "job_role": job_role,
+        "difficulty": "medium",
+        "interview_type": "technical",
+    }) is None:
+        return False
+
+    for turn in range(turns):
+        post("/interview/respond", {
+            "session_id": session_id,
+            "response": SAMPLE_ANSWERS[(index + turn) % len(SAMPLE_ANSWERS)],
+            "resume_text": SAMPLE_RESUME,
+            "job_role": job_role,
+        })
+
+    return post("/interview/complete", {
+        "session_id": session_id,
+        "resume_text": SAMPLE_RESUME,
+        "job_role": job_role,
+    }) is not None
+
+
+def run_load(base_url: str, candidates: int, concurrency: int, turns: int) -> dict:
+    import requests
+
+    recorder = LatencyRecorder()
+    run_id = uuid.uuid4().hex[:8]
+    local = threading.local()
+
+    def session():
+        if not hasattr(local, "http"):
+            local.http = requests.Session()
+        return local.http
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(
+            lambda i: run_candidate(session(), base_url, i, turns, recorder, run_id),
+            range(candidates),
+        ))
+    elapsed = time.perf_counter() - start
+
+    endpoints = {}
+    total_requests = 0
+    for endpoint in ENDPOINTS:
+        values = sorted(recorder.samples.get(endpoint, []))
+        total_requests += len(values)
+        endpoints[endpoint] = {
+            "count": len(values),
+            "errors": recorder.errors.get(endpoint, 0),
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+        }
+
+    completed = sum(1 for ok in outcomes if ok)
+    return {
+        "candidates": candidates,
+        "concurrency": concurrency,
+        "turns": turns,
+        "completed_interviews": completed,
+        "elapsed_s": round(elapsed, 3),
+        "interviews_per_s": round(completed / elapsed, 3) if elapsed else 0.0,
+        "requests_per_s": round(total_requests / elapsed, 3) if elapsed else 0.0,
+        "endpoints": endpoints,
+    }
+
+
+def print_report(report: dict):
+    print(f"\nCandidates: {report['candidates']}  concurrency: {report['concurrency']}  "
+          f"turns: {report['turns']}")
+    print(f"Completed interviews: {report['completed_interviews']} in {report['elapsed_s']}s "
+          f"({report['interviews_per_s']} interviews/s, {report['requests_per_s']} req/s)")
+    print(f"\n{'endpoint':<22}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for endpoint, stats in report["endpoints"].items():
+        print(f"{endpoint:<22}{stats['count']:>7}{stats['errors']:>8}{stats['p50_ms']:>10}"
+              f"{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['max_ms']:>10}")
+    print(f"\nPeak RSS: {report['peak_rss_mb']:.1f} MB ({report['rss_scope']})")
+    if report.get("llm_calls_per_interview") is not None:
+        print(f"LLM calls per interview: {report['llm_calls_per_interview']:.2f}")
+        for kind, count in sorted(report["llm_calls_by_kind"].items()):
+            print(f"  {kind:<24}{count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent interview load test")
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--url", help="Drive a running service instead of an in-process one")
+    parser.add_argument("--server-pid", type=int, help="Local pid of --url server, for peak RSS")
+    parser.add_argument("--stub-latency", type=float, default=0.0,
+                        help="Mean simulated LLM latency in seconds (exponential)")
+    parser.add_argument("--serve-stub", action="store_true",
+                        help="Only serve the app with the stub LLM on --port")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    if args.serve_stub:
+        import uvicorn
+        install_stub_llm(args.stub_latency)
+        from main import app
+        uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+        return
+
+    server = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        install_stub_llm(args.stub_latency)
+        port = _free_port()
+        server, thread = start_in_process_server(port)
+        base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        report = run_load(base_url, args.candidates, args.concurrency, args.turns)
+    finally:
+        if server is not None:
+            server.should_exit = True
+            thread.join(timeout=10)
+
+    if args.url:
+        report["peak_rss_mb"] = peak_rss_mb(args.server_pid) if args.server_pid else peak_rss_mb()
+        report["rss_scope"] = "server" if args.server_pid else "load generator only"
+        report["llm_calls_per_interview"] = None
+    else:
+        report["peak_rss_mb"] = peak_rss_mb()
+        report["rss_scope"] = "server + load generator"
+        completed = report["completed_interviews"] or 1
+        report["llm_calls_per_interview"] = STUB_STATS.total() / completed
+        report["llm_calls_by_kind"] = STUB_STATS.snapshot()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
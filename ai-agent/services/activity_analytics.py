@@ -0,0 +1,133 @@
+"""
+Activity Analytics Engine
+Computes missed meetings, focus time, meeting load and a productivity score
+from a user's activity columns with vectorized NumPy passes. The numbers
+are exact; the LLM is only used to phrase the summary around them.
+"""
+
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from services.activity_store import EVENT_KINDS, get_activity_store
+
+TIME_RANGES = {"24h": 86400, "7d": 7 * 86400, "30d": 30 * 86400}
+
+WORK_HOURS_PER_DAY = 8.0
+FOCUS_TARGET_HOURS_PER_DAY = 4.0
+
+MEETING = EVENT_KINDS["meeting"]
+EMAIL_SENT = EVENT_KINDS["email_sent"]
+EMAIL_RECEIVED = EVENT_KINDS["email_received"]
+FOCUS = EVENT_KINDS["focus"]
+
+
+def window_bounds(time_range: str, now: Optional[float] = None):
+    """(start, end, days) of a time range ending now"""
+    if time_range not in TIME_RANGES:
+        raise ValueError(f"Unsupported time_range '{time_range}'; use one of {list(TIME_RANGES)}")
+    end = int(now if now is not None else time.time())
+    seconds = TIME_RANGES[time_range]
+    return end - seconds, end, seconds / 86400
+
+
+def _hours(columns: Dict[str, np.ndarray], mask: np.ndarray, start: int, end: int) -> np.ndarray:
+    """Per-event durations in hours, clipped to the window"""
+    clipped = np.clip(columns["end"][mask], start, end) - np.clip(columns["start"][mask], start, end)
+    return np.maximum(clipped, 0) / 3600.0
+
+
+def compute_metrics(columns: Dict[str, np.ndarray], start: int, end: int, days: float,
+                    now: Optional[int] = None) -> Dict[str, Any]:
+    """
+    All numeric metrics for one window in a single pass over the columns
+
+    Args:
+        columns: Activity columns already restricted to the window
+        start: Window start (epoch seconds)
+        end: Window end (epoch seconds)
+        days: Window length in days
+        now: Reference time for "already happened" checks; defaults to end
+    """
+    now = end if now is None else now
+    kind = columns["kind"]
+
+    meetings = kind == MEETING
+    past_meetings = meetings & (columns["end"] <= now)
+    known = past_meetings & (columns["attended"] >= 0)
+    missed = past_meetings & (columns["attended"] == 0)
+    attended = past_meetings & (columns["attended"] == 1)
+    focus = kind == FOCUS
+
+    meeting_hours = float(_hours(columns, attended, start, end).sum())
+    focus_hours = float(_hours(columns, focus, start, end).sum())
+    work_hours = WORK_HOURS_PER_DAY * days
+
+    known_count = int(known.sum())
+    attendance_rate = float(attended.sum()) / known_count if known_count else 1.0
+    meeting_load = meeting_hours / work_hours if work_hours else 0.0
+    focus_ratio = min(focus_hours / (FOCUS_TARGET_HOURS_PER_DAY * days), 1.0) if days else 0.0
+
+    # Weighted blend: deep work, showing up, and not drowning in meetings
+    score = 100 * (0.5 * focus_ratio + 0.3 * attendance_rate + 0.2 * (1 - min(meeting_load, 1.0)))
+
+    # Daily series via bincount over the day index of each event
+    n_days = max(int(np.ceil(days)), 1)
+    day_index = np.clip((columns["start"] - start) // 86400, 0, n_days - 1)
+    focus_by_day = np.bincount(day_index[focus], weights=_hours(columns, focus, start, end), minlength=n_days)
+    meetings_by_day = np.bincount(day_index[attended], weights=_hours(columns, attended, start, end), minlength=n_days)
+
+    return {
+        "score": round(score),
+        "emails_sent": int((kind == EMAIL_SENT).sum()),
+        "emails_received": int((kind == EMAIL_RECEIVED).sum()),
+        "meetings_scheduled": int(meetings.sum()),
+        "meetings_attended": int(attended.sum()),
+        "meetings_missed": int(missed.sum()),
+        "attendance_rate": round(attendance_rate, 3),
+        "meeting_hours": round(meeting_hours, 2),
+        "meeting_load": round(meeting_load, 3),
+        "focus_time": round(focus_hours, 2),
+        "daily": {
+            "focus_hours": np.round(focus_by_day, 2).tolist(),
+            "meeting_hours": np.round(meetings_by_day, 2).tolist(),
+        },
+    }
+
+
+def missed_meetings(columns: Dict[str, np.ndarray], now: int) -> List[Dict[str, Any]]:
+    """Meetings that have ended without being attended, most recent first"""
+    mask = (columns["kind"] == MEETING) & (columns["attended"] == 0) & (columns["end"] <= now)
+    indexes = np.flatnonzero(mask)[::-1]
+    return [
+        {
+            "meeting_id": str(columns["event_id"][i]),
+            "title": str(columns["title"][i]),
+            "organizer": str(columns["organizer"][i]),
+            "scheduled_time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(int(columns["start"][i]))),
+            "important": bool(columns["important"][i]),
+        }
+        for i in indexes
+    ]
+
+
+def analyze_user(user_id: str, time_range: str = "24h", now: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Metrics and missed meetings for a user over a 24h/7d/30d window
+
+    Args:
+        user_id: User to analyze
+        time_range: One of TIME_RANGES
+        now: Window end (epoch seconds); defaults to the current time
+    """
+    start, end, days = window_bounds(time_range, now)
+    columns = get_activity_store().query(user_id, start, end)
+    metrics = compute_metrics(columns, start, end, days)
+    return {
+        "user_id": user_id,
+        "time_range": time_range,
+        "events": int(len(columns["start"])),
+        "metrics": metrics,
+        "missed_meetings": missed_meetings(columns, end),
+    }
@@ -0,0 +1,363 @@
+"""
+Activity Event Store
+Holds each user's activity events (meetings, emails, focus blocks) as NumPy
+columns sorted by start time, so the analytics engine can slice a time
+window with a binary search and work on whole arrays.
+
+ColumnarActivityStore persists events as an append-only log partitioned by
+user and UTC day: every flush writes an immutable segment with one .npy
+file per column, and a small per-user index of segment time ranges lets a
+query memory-map only the segments that overlap its window.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import shutil
+import threading
+from collections import OrderedDict
+from datetime import timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EVENT_KINDS = {"meeting": 0, "email_sent": 1, "email_received": 2, "focus": 3}
+KIND_NAMES = {code: name for name, code in EVENT_KINDS.items()}
+
+# attended column: 1 attended, 0 missed, -1 unknown / not a meeting
+ATTENDED_UNKNOWN = -1
+
+COLUMN_DTYPES = {
+    "start": np.int64,      # epoch seconds
+    "end": np.int64,        # epoch seconds; equals start for point events (emails)
+    "kind": np.int8,
+    "attended": np.int8,
+    "important": np.bool_,
+    # Unsized: each array is as wide as its longest value, so empty strings cost 4 bytes
+    "event_id": np.str_,
+    "title": np.str_,
+    "organizer": np.str_,
+}
+
+
+def epoch(value: Any) -> int:
+    """Epoch seconds of a datetime (naive means UTC) or a number; None is 0"""
+    if value is None:
+        return 0
+    if hasattr(value, "timestamp"):
+        # Naive datetimes are UTC, not server-local time
+        if getattr(value, "tzinfo", False) is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp())
+    return int(value)
+
+
+def events_to_columns(events: Iterable[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    Convert event dicts into typed columns
+
+    Args:
+        events: Dicts with type, start, optional end/attended/important/event_id/title/organizer
+    """
+    rows = list(events)
+    unknown = {row.get("type") for row in rows} - set(EVENT_KINDS)
+    if unknown:
+        raise ValueError(f"Unknown event types: {sorted(str(kind) for kind in unknown)}")
+
+    starts = [epoch(row.get("start")) for row in rows]
+    return {
+        "start": np.array(starts, dtype=COLUMN_DTYPES["start"]),
+        "end": np.array([epoch(row.get("end")) or start for row, start in zip(rows, starts)],
+                        dtype=COLUMN_DTYPES["end"]),
+        "kind": np.array([EVENT_KINDS[row["type"]] for row in rows], dtype=COLUMN_DTYPES["kind"]),
+        "attended": np.array([ATTENDED_UNKNOWN if row.get("attended") is None else int(bool(row["attended"]))
+                              for row in rows], dtype=COLUMN_DTYPES["attended"]),
+        "important": np.array([bool(row.get("important", False)) for row in rows], dtype=COLUMN_DTYPES["important"]),
+        "event_id": np.array([row.get("event_id") or "" for row in rows], dtype=COLUMN_DTYPES["event_id"]),
+        "title": np.array([row.get("title") or "" for row in rows], dtype=COLUMN_DTYPES["title"]),
+        "organizer": np.array([row.get("organizer") or "" for row in rows], dtype=COLUMN_DTYPES["organizer"]),
+    }
+
+
+def empty_columns() -> Dict[str, np.ndarray]:
+    return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMN_DTYPES.items()}
+
+
+def concat_columns(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    if not parts:
+        return empty_columns()
+    if len(parts) == 1:
+        return parts[0]
+    return {name: np.concatenate([part[name] for part in parts]) for name in COLUMN_DTYPES}
+
+
+def sort_columns(columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    order = np.argsort(columns["start"], kind="stable")
+    return {name: column[order] for name, column in columns.items()}
+
+
+class InMemoryActivityStore:
+    """Per-user columnar event buffers, compacted and sorted on read"""
+
+    def __init__(self):
+        self._pending: Dict[str, List[Dict[str, np.ndarray]]] = {}
+        self._sorted: Dict[str, Dict[str, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def flush(self):
+        """Nothing to persist; kept for interface parity with ColumnarActivityStore"""
+
+    def append(self, user_id: str, columns: Dict[str, np.ndarray]) -> int:
+        """Append a batch of columns for one user; returns the batch size"""
+        size = len(columns["start"])
+        if size:
+            with self._lock:
+                self._pending.setdefault(user_id, []).append(columns)
+        return size
+
+    def _compacted(self, user_id: str) -> Dict[str, np.ndarray]:
+        with self._lock:
+            pending = self._pending.pop(user_id, None)
+            current = self._sorted.get(user_id)
+            if pending:
+                parts = ([current] if current is not None else []) + pending
+                current = sort_columns(concat_columns(parts))
+                self._sorted[user_id] = current
+        return current if current is not None else empty_columns()
+
+    def query(self, user_id: str, start: Optional[int] = None, end: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Events whose start lies in [start, end)
+
+        Args:
+            user_id: User to read
+            start: Inclusive lower bound (epoch seconds)
+            end: Exclusive upper bound (epoch seconds)
+        """
+        return _slice_window(self._compacted(user_id), start, end)
+
+
+SEGMENT_INDEX_DTYPE = np.dtype([
+    ("day", np.int64),        # UTC day number (epoch seconds // 86400)
+    ("seq", np.int64),        # segment number within the user's log
+    ("min_start", np.int64),
+    ("max_start", np.int64),
+    ("rows", np.int64),
+])
+
+
+def _user_dir_name(user_id: str) -> str:
+    """Filesystem-safe, collision-free directory name for a user"""
+    safe = re.sub(r"[^A-Za-z0-9_-]", "_", user_id)[:48]
+    return f"{safe}-{hashlib.sha1(user_id.encode()).hexdigest()[:10]}"
+
+
+def _slice_window(columns: Dict[str, np.ndarray], start: Optional[int], end: Optional[int]) -> Dict[str, np.ndarray]:
+    """Rows of start-sorted columns whose start lies in [start, end); views, no copy"""
+    starts = columns["start"]
+    lo = 0 if start is None else int(np.searchsorted(starts, start, side="left"))
+    hi = len(starts) if end is None else int(np.searchsorted(starts, end, side="left"))
+    return {name: column[lo:hi] for name, column in columns.items()}
+
+
+class ColumnarActivityStore:
+    """Append-only on-disk event log, partitioned by user and day, read through mmap"""
+
+    def __init__(self, root: str, flush_rows: int = 5000, compact_segments: int = 8, open_segments: int = 512):
+        """
+        Args:
+            root: Directory holding one sub-directory per user
+            flush_rows: Buffered rows per user that trigger a flush to disk
+            compact_segments: Segments in one day partition that trigger compaction
+            open_segments: Memory-mapped segments kept open between queries
+        """
+        self.root = root
+        self.flush_rows = flush_rows
+        self.compact_segments = compact_segments
+        self.open_segments = open_segments
+        self._segments: "OrderedDict[str, Dict[str, np.ndarray]]" = OrderedDict()
+        self._buffers: Dict[str, List[Dict[str, np.ndarray]]] = {}
+        self._buffered_rows: Dict[str, int] = {}
+        self._indexes: Dict[str, np.ndarray] = {}
+        self._lock = threading.RLock()
+        os.makedirs(root, exist_ok=True)
+
+    # Paths
+
+    def _user_dir(self, user_id: str) -> str:
+        return os.path.join(self.root, _user_dir_name(user_id))
+
+    def _segment_dir(self, user_id: str, day: int, seq: int) -> str:
+        return os.path.join(self._user_dir(user_id), f"day-{day}", f"seg-{seq:08d}")
+
+    # Index
+
+    def _index(self, user_id: str) -> np.ndarray:
+        index = self._indexes.get(user_id)
+        if index is None:
+            path = os.path.join(self._user_dir(user_id), "index.npy")
+            index = np.load(path) if os.path.exists(path) else np.empty(0, dtype=SEGMENT_INDEX_DTYPE)
+            self._indexes[user_id] = index
+        return index
+
+    def _save_index(self, user_id: str, index: np.ndarray):
+        user_dir = self._user_dir(user_id)
+        os.makedirs(user_dir, exist_ok=True)
+        tmp_path = os.path.join(user_dir, "index.tmp.npy")
+        np.save(tmp_path, index)
+        os.replace(tmp_path, os.path.join(user_dir, "index.npy"))
+        self._indexes[user_id] = index
+
+    # Writes
+
+    def append(self, user_id: str, columns: Dict[str, np.ndarray]) -> int:
+        """Buffer a batch for one user, flushing to disk once flush_rows accumulate"""
+        size = len(columns["start"])
+        if not size:
+            return 0
+        with self._lock:
+            self._buffers.setdefault(user_id, []).append(columns)
+            self._buffered_rows[user_id] = self._buffered_rows.get(user_id, 0) + size
+            if self._buffered_rows[user_id] >= self.flush_rows:
+                self._flush_user(user_id)
+        return size
+
+    def flush(self):
+        """Write every buffered batch to disk"""
+        with self._lock:
+            for user_id in list(self._buffers):
+                self._flush_user(user_id)
+
+    def _write_segment(self, path: str, columns: Dict[str, np.ndarray]):
+        tmp_path = path + ".tmp"
+        # Leftovers of a flush that failed before its index update
+        for leftover in (tmp_path, path):
+            shutil.rmtree(leftover, ignore_errors=True)
+        os.makedirs(tmp_path)
+        for name, column in columns.items():
+            np.save(os.path.join(tmp_path, f"{name}.npy"), np.ascontiguousarray(column))
+        os.replace(tmp_path, path)
+
+    def _flush_user(self, user_id: str):
+        parts = self._buffers.pop(user_id, None)
+        rows = self._buffered_rows.pop(user_id, 0)
+        if not parts:
+            return
+        try:
+            self._write_batch(user_id, sort_columns(concat_columns(parts)))
+        except Exception:
+            # Keep the batch buffered so the next flush retries it
+            self._buffers[user_id] = parts + self._buffers.get(user_id, [])
+            self._buffered_rows[user_id] = rows + self._buffered_rows.get(user_id, 0)
+            raise
+
+    def _write_batch(self, user_id: str, columns: Dict[str, np.ndarray]):
+        days = columns["start"] // 86400
+        index = self._index(user_id)
+        next_seq = int(index["seq"].max()) + 1 if len(index) else 0
+
+        # Sorted by start, so each day is one contiguous run
+        boundaries = np.flatnonzero(np.diff(days)) + 1
+        entries = []
+        for lo, hi in zip(np.r_[0, boundaries], np.r_[boundaries, len(days)]):
+            day = int(days[lo])
+            segment = {name: column[lo:hi] for name, column in columns.items()}
+            self._write_segment(self._segment_dir(user_id, day, next_seq), segment)
+            entries.append((day, next_seq, int(segment["start"][0]), int(segment["start"][-1]), hi - lo))
+            next_seq += 1
+
+        index = np.concatenate([index, np.array(entries, dtype=SEGMENT_INDEX_DTYPE)])
+        self._save_index(user_id, index)
+
+        for day in {entry[0] for entry in entries}:
+            if int((index["day"] == day).sum()) > self.compact_segments:
+                self._compact_day(user_id, day)
+
+    def _compact_day(self, user_id: str, day: int):
+        """Rewrite a day partition's segments as one sorted segment"""
+        index = self._index(user_id)
+        in_day = index["day"] == day
+        merged = sort_columns(concat_columns([self._load_segment(user_id, entry) for entry in index[in_day]]))
+        seq = int(index["seq"].max()) + 1
+        self._write_segment(self._segment_dir(user_id, day, seq), merged)
+
+        entry = np.array([(day, seq, int(merged["start"][0]), int(merged["start"][-1]), len(merged["start"]))],
+                         dtype=SEGMENT_INDEX_DTYPE)
+        old_segments = index[in_day]
+        self._save_index(user_id, np.concatenate([index[~in_day], entry]))
+        logger.info(f"Compacted {len(old_segments)} activity segments for day {day}")
+        for old in old_segments:
+            self._segments.pop(self._segment_dir(user_id, day, int(old["seq"])), None)
+            shutil.rmtree(self._segment_dir(user_id, day, int(old["seq"])), ignore_errors=True)
+
+    # Reads
+
+    def _load_segment(self, user_id: str, entry) -> Dict[str, np.ndarray]:
+        # Segments are immutable, so their mappings can be reused across queries
+        path = self._segment_dir(user_id, int(entry["day"]), int(entry["seq"]))
+        columns = self._segments.get(path)
+        if columns is None:
+            columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in COLUMN_DTYPES}
+            self._segments[path] = columns
+            if len(self._segments) > self.open_segments:
+                self._segments.popitem(last=False)
+        else:
+            self._segments.move_to_end(path)
+        return columns
+
+    def query(self, user_id: str, start: Optional[int] = None, end: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Events whose start lies in [start, end)
+
+        Only segments whose time range overlaps the window are opened; a window
+        served by a single segment is returned as memory-mapped views.
+
+        Args:
+            user_id: User to read
+            start: Inclusive lower bound (epoch seconds)
+            end: Exclusive upper bound (epoch seconds)
+        """
+        with self._lock:
+            index = self._index(user_id)
+            overlap = np.ones(len(index), dtype=bool)
+            if start is not None:
+                overlap &= index["max_start"] >= start
+            if end is not None:
+                overlap &= index["min_start"] < end
+            selected = np.sort(index[overlap], order="min_start")
+            # Mapped under the lock so compaction cannot remove a segment in between
+            parts = [_slice_window(self._load_segment(user_id, entry), start, end) for entry in selected]
+            pending = list(self._buffers.get(user_id, []))
+
+        if pending:
+            parts.append(_slice_window(sort_columns(concat_columns(pending)), start, end))
+        parts = [part for part in parts if len(part["start"])]
+
+        if not parts:
+            return empty_columns()
+        if len(parts) == 1:
+            return parts[0]
+        columns = concat_columns(parts)
+        if np.any(np.diff(columns["start"]) < 0):
+            columns = sort_columns(columns)
+        return columns
+
+
+_activity_store = None
+
+def get_activity_store():
+    """Get or create the global activity store (ACTIVITY_STORE=disk|memory)"""
+    global _activity_store
+    if _activity_store is None:
+        if os.getenv("ACTIVITY_STORE", "disk").lower() == "memory":
+            _activity_store = InMemoryActivityStore()
+        else:
+            _activity_store = ColumnarActivityStore(
+                os.getenv("ACTIVITY_STORE_DIR", "./data/activity"),
+                flush_rows=int(os.getenv("ACTIVITY_FLUSH_ROWS", "5000")),
+                compact_segments=int(os.getenv("ACTIVITY_COMPACT_SEGMENTS", "8"))
+            )
+    return _activity_store
@@ -0,0 +1,77 @@
+"""
+In-Process TTL Cache
+Thread-safe LRU cache with per-entry time-to-live, used for plans, tool
+results and insight reports. Lookups are counted in cache_lookups_total.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from services.metrics import CACHE_LOOKUPS
+
+
+class TTLCache:
+    """LRU cache whose entries expire after a time-to-live"""
+
+    def __init__(self, name: str, maxsize: int = 256, ttl: float = 300):
+        """
+        Args:
+            name: Cache name used as the metrics label
+            maxsize: Maximum number of entries before LRU eviction
+            ttl: Default time-to-live in seconds
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (value, stored_at, expires_at)
+        self._lock = threading.Lock()
+
+    def get_with_age(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """Return (value, age_seconds) for a live entry, or None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[2] <= now:
+                del self._data[key]
+                entry = None
+            if entry is None:
+                CACHE_LOOKUPS.inc(cache=self.name, result="miss")
+                return None
+            self._data.move_to_end(key)
+        CACHE_LOOKUPS.inc(cache=self.name, result="hit")
+        return entry[0], now - entry[1]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self.get_with_age(key)
+        return entry[0] if entry is not None else default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        now = time.monotonic()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, now, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches the predicate; returns the count"""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
@@ -0,0 +1,273 @@
+"""
+Cohort Analytics
+Columnar score table over completed interviews. Each completion is appended
+to a fixed-size record log on disk and to in-memory NumPy columns, so cohort
+statistics (distributions, percentiles, skill breakdowns, trends) are a few
+vectorized passes filtered by job role, interview type and difficulty.
+"""
+
+import os
+import threading
+import time
+import warnings
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+SKILLS = ["technical", "communication", "problem_solving", "domain_knowledge"]
+CONVERSATIONAL = ["avg_confidence", "avg_clarity", "avg_relevance"]
+INTERVIEW_TYPES = ["general", "hr", "technical", "behavioral", "situational"]
+DIFFICULTIES = ["easy", "medium", "hard"]
+PERCENTILES = [10, 25, 50, 75, 90]
+
+# On-disk record; roles are stored as text and dictionary-encoded in memory
+RECORD_DTYPE = np.dtype([
+    ("completed_at", np.int64),
+    ("job_role", "S64"),
+    ("interview_type", np.int8),
+    ("difficulty", np.int8),
+    ("final_difficulty", np.int8),
+    ("score", np.float32),
+    ("readiness", np.float32),
+    ("skills", np.float32, (len(SKILLS),)),
+    ("conversational", np.float32, (len(CONVERSATIONAL),)),
+    ("questions", np.int16),
+])
+
+TREND_BUCKETS = {"day": 86400, "week": 7 * 86400, "month": 30 * 86400}
+
+
+def _code(values: List[str], value: Optional[str]) -> int:
+    value = (value or "").lower()
+    return values.index(value) if value in values else -1
+
+
+def _number(value: Any, default: float = np.nan) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _normalize_role(role: Optional[str]) -> str:
+    return " ".join((role or "").casefold().split())
+
+
+class CohortScoreTable:
+    """Append-only score table with columnar in-memory arrays"""
+
+    def __init__(self, path: Optional[str] = None, capacity: int = 1024):
+        """
+        Args:
+            path: Record log file; None keeps the table in memory only
+            capacity: Initial column capacity (doubles as needed)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._size = 0
+        self._roles: List[str] = []
+        self._role_codes: Dict[str, int] = {}
+        self._columns = self._allocate(capacity)
+
+        if path and os.path.exists(path):
+            records = np.fromfile(path, dtype=RECORD_DTYPE)
+            self._append_records(records)
+
+    @staticmethod
+    def _allocate(capacity: int) -> Dict[str, np.ndarray]:
+        return {
+            "completed_at": np.empty(capacity, dtype=np.int64),
+            "role": np.empty(capacity, dtype=np.int32),
+            "interview_type": np.empty(capacity, dtype=np.int8),
+            "difficulty": np.empty(capacity, dtype=np.int8),
+            "final_difficulty": np.empty(capacity, dtype=np.int8),
+            "score": np.empty(capacity, dtype=np.float32),
+            "readiness": np.empty(capacity, dtype=np.float32),
+            "skills": np.empty((capacity, len(SKILLS)), dtype=np.float32),
+            "conversational": np.empty((capacity, len(CONVERSATIONAL)), dtype=np.float32),
+            "questions": np.empty(capacity, dtype=np.int16),
+        }
+
+    def _reserve(self, extra: int):
+        capacity = len(self._columns["score"])
+        if self._size + extra <= capacity:
+            return
+        new_capacity = max(capacity * 2, self._size + extra)
+        grown = self._allocate(new_capacity)
+        for name, column in self._columns.items():
+            grown[name][:self._size] = column[:self._size]
+        self._columns = grown
+
+    def _role_code(self, role: str) -> int:
+        code = self._role_codes.get(role)
+        if code is None:
+            code = len(self._roles)
+            self._roles.append(role)
+            self._role_codes[role] = code
+        return code
+
+    def _append_records(self, records: np.ndarray):
+        count = len(records)
+        if not count:
+            return
+        self._reserve(count)
+        lo, hi = self._size, self._size + count
+        columns = self._columns
+        columns["completed_at"][lo:hi] = records["completed_at"]
+        columns["role"][lo:hi] = [self._role_code(role.decode("utf-8", "ignore")) for role in records["job_role"]]
+        for name in ("interview_type", "difficulty", "final_difficulty", "score", "readiness", "skills",
+                     "conversational", "questions"):
+            columns[name][lo:hi] = records[name]
+        self._size = hi
+
+    def record(self, analytics: Dict[str, Any], job_role: str, interview_type: str, difficulty: str,
+               completed_at: Optional[float] = None):
+        """
+        Add one completed interview
+
+        Args:
+            analytics: Result of InterviewAgent.complete_interview
+            job_role: Target job role
+            interview_type: hr, technical, behavioral, situational or general
+            difficulty: Difficulty the interview started at
+            completed_at: Completion time (epoch seconds); defaults to now
+        """
+        skills = analytics.get("skill_breakdown") or {}
+        conversational = analytics.get("conversational_metrics") or {}
+        record = np.zeros(1, dtype=RECORD_DTYPE)
+        record["completed_at"] = int(completed_at if completed_at is not None else time.time())
+        record["job_role"] = _normalize_role(job_role).encode("utf-8")[:64]
+        record["interview_type"] = _code(INTERVIEW_TYPES, interview_type)
+        record["difficulty"] = _code(DIFFICULTIES, difficulty)
+        record["final_difficulty"] = _code(DIFFICULTIES, conversational.get("final_difficulty", difficulty))
+        record["score"] = _number(analytics.get("score"))
+        record["readiness"] = _number(analytics.get("readiness_score"))
+        record["skills"] = [_number(skills.get(skill)) for skill in SKILLS]
+        record["conversational"] = [_number(conversational.get(metric)) for metric in CONVERSATIONAL]
+        record["questions"] = int(_number(conversational.get("total_questions"), 0))
+
+        with self._lock:
+            if self.path:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with open(self.path, "ab") as f:
+                    f.write(record.tobytes())
+            self._append_records(record)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _mask(self, job_role: Optional[str], interview_type: Optional[str], difficulty: Optional[str],
+              since: Optional[int], until: Optional[int]) -> np.ndarray:
+        columns = {name: column[:self._size] for name, column in self._columns.items()}
+        mask = np.ones(self._size, dtype=bool)
+        if job_role:
+            code = self._role_codes.get(_normalize_role(job_role), -2)
+            mask &= columns["role"] == code
+        if interview_type:
+            mask &= columns["interview_type"] == _code(INTERVIEW_TYPES, interview_type)
+        if difficulty:
+            mask &= columns["difficulty"] == _code(DIFFICULTIES, difficulty)
+        if since is not None:
+            mask &= columns["completed_at"] >= since
+        if until is not None:
+            mask &= columns["completed_at"] < until
+        return mask
+
+    def stats(self, job_role: Optional[str] = None, interview_type: Optional[str] = None,
+              difficulty: Optional[str] = None, since: Optional[int] = None, until: Optional[int] = None,
+              score: Optional[float] = None, bucket: str = "week") -> Dict[str, Any]:
+        """
+        Cohort statistics for the interviews matching the filters
+
+        Args:
+            job_role: Only this role (case/whitespace-insensitive)
+            interview_type: Only this interview type
+            difficulty: Only interviews started at this difficulty
+            since: Completed at or after (epoch seconds)
+            until: Completed before (epoch seconds)
+            score: Candidate score to place within the cohort
+            bucket: Trend granularity (day, week, month)
+        """
+        with self._lock:
+            size = self._size
+            mask = self._mask(job_role, interview_type, difficulty, since, until)
+            # take() on row indexes is much faster than boolean indexing for the 2-D columns
+            rows = np.flatnonzero(mask)
+            selected = {name: column[:size].take(rows, axis=0) for name, column in self._columns.items()}
+
+        scores = selected["score"].astype(np.float64)
+        valid = ~np.isnan(scores)
+        scores = scores[valid]
+        result = {
+            "filters": {"job_role": job_role, "interview_type": interview_type, "difficulty": difficulty},
+            "count": int(len(rows)),
+        }
+        if not len(scores):
+            return {**result, "score": None, "skills": {}, "trend": []}
+
+        sorted_scores = np.sort(scores)
+        histogram, edges = np.histogram(scores, bins=10, range=(0, 100))
+        result["score"] = {
+            "mean": round(float(scores.mean()), 2),
+            "std": round(float(scores.std()), 2),
+            "min": round(float(sorted_scores[0]), 2),
+            "max": round(float(sorted_scores[-1]), 2),
+            "percentiles": {f"p{p}": round(float(v), 2)
+                            for p, v in zip(PERCENTILES, np.percentile(sorted_scores, PERCENTILES))},
+            "histogram": {"edges": edges.tolist(), "counts": histogram.tolist()},
+        }
+        readiness = selected["readiness"][valid]
+        if np.any(~np.isnan(readiness)):
+            result["readiness_mean"] = round(float(np.nanmean(readiness)), 2)
+
+        skills = selected["skills"][valid].astype(np.float64)
+        conversational = selected["conversational"][valid].astype(np.float64)
+        with warnings.catch_warnings():
+            # Skills the LLM never reported are all-NaN; they come back as None
+            warnings.simplefilter("ignore", RuntimeWarning)
+            skill_means = np.nanmean(skills, axis=0)
+            skill_medians = np.nanmedian(skills, axis=0)
+            conversational_means = np.nanmean(conversational, axis=0)
+        result["skills"] = {
+            skill: {"mean": None if np.isnan(mean) else round(float(mean), 2),
+                    "p50": None if np.isnan(median) else round(float(median), 2)}
+            for skill, mean, median in zip(SKILLS, skill_means, skill_medians)
+        }
+        result["conversational"] = {
+            metric: None if np.isnan(mean) else round(float(mean), 2)
+            for metric, mean in zip(CONVERSATIONAL, conversational_means)
+        }
+
+        # Trend: mean score per bucket plus a least-squares slope (points per bucket)
+        width = TREND_BUCKETS.get(bucket, TREND_BUCKETS["week"])
+        times = selected["completed_at"][valid]
+        bucket_index = (times - times.min()) // width
+        counts = np.bincount(bucket_index)
+        sums = np.bincount(bucket_index, weights=scores)
+        present = np.flatnonzero(counts)
+        means = sums[present] / counts[present]
+        result["trend"] = [
+            {"bucket_start": int(times.min() + i * width), "count": int(counts[i]), "mean_score": round(float(m), 2)}
+            for i, m in zip(present, means)
+        ]
+        if len(present) > 1:
+            result["trend_slope"] = round(float(np.polyfit(present, means, 1)[0]), 3)
+
+        if score is not None:
+            below = np.searchsorted(sorted_scores, score, side="left")
+            equal = np.searchsorted(sorted_scores, score, side="right") - below
+            result["candidate"] = {
+                "score": score,
+                "percentile": round(float(100.0 * (below + 0.5 * equal) / len(sorted_scores)), 1),
+            }
+        return result
+
+
+_cohort_table = None
+
+def get_cohort_table() -> CohortScoreTable:
+    """Get or create the global cohort score table"""
+    global _cohort_table
+    if _cohort_table is None:
+        _cohort_table = CohortScoreTable(os.getenv("COHORT_SCORES_PATH", "./data/cohort/scores.bin"))
+    return _cohort_table
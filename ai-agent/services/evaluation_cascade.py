@@ -0,0 +1,177 @@
+"""
+Confidence-Gated Evaluation Cascade
+Answers are first scored by a small local model; the large model is only
+called when the small model's output does not validate, when its overall
+score lands near a difficulty threshold (where a wrong call changes the
+interview), or for a sampled fraction kept for calibration. Escalated calls
+record how far the two tiers disagreed so the small model's accuracy and the
+savings can be read from /evaluation/cascade and the Prometheus metrics.
+"""
+
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from services.metrics import EVALUATION_CASCADE, EVALUATION_TIER_AGREEMENT, EVALUATION_TIER_SCORE_DIFF
+from services.tracing import set_span_attributes
+
+CASCADE_ENABLED = os.getenv("EVALUATION_CASCADE", "false").lower() == "true"
+CASCADE_SMALL_MODEL = os.getenv("EVALUATION_CASCADE_MODEL", "llama3.2:3b")
+# Scores this close to a threshold are re-checked by the large model
+CASCADE_MARGIN = float(os.getenv("EVALUATION_CASCADE_MARGIN", "5"))
+# Fraction of accepted small-model evaluations escalated anyway for calibration
+CASCADE_SAMPLE_RATE = float(os.getenv("EVALUATION_CASCADE_SAMPLE_RATE", "0.1"))
+
+# Average-score cut-offs the difficulty adjustment works with (see DIFFICULTY_ADJUSTMENT_PROMPT)
+DIFFICULTY_THRESHOLDS = (50, 80)
+
+SCORE_FIELDS = ("confidence", "clarity", "relevance", "overall_score")
+
+_JSON_OBJECT = re.compile(r"\{.*\}", re.DOTALL)
+
+
+def parse_evaluation(text: Any) -> Optional[Dict[str, Any]]:
+    """The evaluation as a dict if it has every score in range and feedback, else None"""
+    if not isinstance(text, str):
+        return None
+    # Small models like to wrap JSON in prose or code fences
+    match = _JSON_OBJECT.search(text)
+    if match is None:
+        return None
+    try:
+        evaluation = json.loads(match.group(0))
+    except ValueError:
+        return None
+    if not isinstance(evaluation, dict):
+        return None
+    for field in SCORE_FIELDS:
+        value = evaluation.get(field)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 100:
+            return None
+    if not isinstance(evaluation.get("feedback"), str) or not evaluation["feedback"].strip():
+        return None
+    return evaluation
+
+
+def score_band(score: float) -> str:
+    low, high = DIFFICULTY_THRESHOLDS
+    return "low" if score < low else "high" if score > high else "mid"
+
+
+def escalation_reason(evaluation: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Why a small-model evaluation needs the large model, or None to accept it"""
+    if evaluation is None:
+        return "invalid"
+    score = evaluation["overall_score"]
+    if any(abs(score - threshold) <= CASCADE_MARGIN for threshold in DIFFICULTY_THRESHOLDS):
+        return "near_threshold"
+    if random.random() < CASCADE_SAMPLE_RATE:
+        return "sampled"
+    return None
+
+
+class CascadeStats:
+    """Running totals behind the /evaluation/cascade report"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.outcomes: Dict[str, int] = {}
+        self.compared = 0
+        self.agreed = 0
+        self.score_diff_total = 0.0
+        self.latency = {"small": [0, 0.0], "large": [0, 0.0]}  # tier -> [calls, seconds]
+
+    def record(self, outcome: str):
+        with self._lock:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        EVALUATION_CASCADE.inc(outcome=outcome)
+
+    def record_latency(self, tier: str, seconds: float):
+        with self._lock:
+            self.latency[tier][0] += 1
+            self.latency[tier][1] += seconds
+
+    def record_comparison(self, small: Dict[str, Any], large: Dict[str, Any]):
+        diff = abs(small["overall_score"] - large["overall_score"])
+        agree = score_band(small["overall_score"]) == score_band(large["overall_score"])
+        with self._lock:
+            self.compared += 1
+            self.agreed += agree
+            self.score_diff_total += diff
+        EVALUATION_TIER_AGREEMENT.inc(agree=str(agree).lower())
+        EVALUATION_TIER_SCORE_DIFF.observe(diff)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            total = sum(self.outcomes.values())
+            escalated = total - self.outcomes.get("accepted", 0)
+            return {
+                "enabled": CASCADE_ENABLED,
+                "small_model": CASCADE_SMALL_MODEL,
+                "evaluations": total,
+                "escalation_rate": round(escalated / total, 4) if total else None,
+                "outcomes": dict(self.outcomes),
+                "tier_agreement": {
+                    "compared": self.compared,
+                    "band_agreement_rate": round(self.agreed / self.compared, 4) if self.compared else None,
+                    "mean_score_difference": round(self.score_diff_total / self.compared, 2) if self.compared else None,
+                },
+                "avg_latency_ms": {
+                    tier: round(seconds / calls * 1000, 1) if calls else None
+                    for tier, (calls, seconds) in self.latency.items()
+                },
+            }
+
+
+cascade_stats = CascadeStats()
+
+
+def _timed(tier: str, call: Callable[[], str]) -> str:
+    start = time.perf_counter()
+    try:
+        return call()
+    finally:
+        cascade_stats.record_latency(tier, time.perf_counter() - start)
+
+
+def run_cascade(small: Callable[[], str], large: Callable[[], str]) -> str:
+    """
+    Evaluate with the small model and escalate to the large one when needed
+
+    Args:
+        small: Returns the small model's raw evaluation text
+        large: Returns the large model's raw evaluation text
+
+    Returns:
+        Evaluation JSON text from whichever tier is trusted
+    """
+    try:
+        small_eval = parse_evaluation(_timed("small", small))
+    except Exception:
+        small_eval = None  # Local model down; same as an unusable answer
+
+    reason = escalation_reason(small_eval)
+    cascade_stats.record(reason or "accepted")
+    set_span_attributes(**{"evaluation.tier": "large" if reason else "small",
+                           "evaluation.escalation": reason or "none"})
+    if reason is None:
+        return json.dumps(small_eval)
+
+    try:
+        large_text = _timed("large", large)
+    except Exception:
+        if small_eval is None:
+            raise
+        return json.dumps(small_eval)  # Valid small result beats no result
+
+    large_eval = parse_evaluation(large_text)
+    if small_eval is None:
+        return large_text
+    if large_eval is None:
+        return json.dumps(small_eval)
+    cascade_stats.record_comparison(small_eval, large_eval)
+    return json.dumps(large_eval)
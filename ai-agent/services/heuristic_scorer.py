@@ -0,0 +1,154 @@
+"""
+Heuristic Response Scorer
+Instant, local confidence/clarity/relevance scores for an interview answer,
+shown while the LLM evaluation is in flight and used in its place when that
+evaluation fails. One compiled pattern tokenizes the answer (its first
+~400 words) and a single pass over the tokens counts hedges, assertive phrases, fillers, structure
+markers (one- and two-word cues via dict lookups), sentences and words;
+relevance is the overlap of those words with the question and the resume's
+skills.
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional
+
+STOPWORDS = frozenset("""
+a about after all also am an and any are as at be because been before being but by can could
+did do does doing for from had has have how i if in into is it its just me more most my no not
+of on or our out over so some such than that the their them then there these they this those
+through to too us very was we were what when where which while who why will with would you your
+tell describe explain give example walk share time
+""".split())
+
+# Words (a trailing "." marks a sentence end and is stripped; "node.js" stays whole) and ! / ?
+_TOKENS = re.compile(r"[a-z0-9][a-z0-9+#'.\-]*|[!?]+")
+
+# Answers are scored on their first ~400 words; past that the cues only repeat
+MAX_SCORED_CHARS = 2500
+
+_WORD_CUES = {
+    **dict.fromkeys(("maybe", "perhaps", "probably", "possibly", "might", "hopefully", "guess"), "hedge"),
+    **dict.fromkeys(("definitely", "specifically", "measured", "achieved"), "assertive"),
+    **dict.fromkeys(("um", "umm", "uh", "uhh", "erm", "basically", "literally"), "filler"),
+    **dict.fromkeys(("first", "firstly", "second", "secondly", "third", "then", "next", "finally",
+                     "because", "therefore", "however"), "marker"),
+}
+
+# Two-word cues, keyed by (previous word, word)
+_PAIR_CUES = {
+    **dict.fromkeys((("i", "think"), ("i", "believe"), ("i", "suppose"), ("not", "sure"), ("really", "sure"),
+                     ("kind", "of"), ("sort", "of"), ("don't", "know"), ("not", "certain")), "hedge"),
+    **dict.fromkeys((("i", verb) for verb in ("built", "led", "designed", "implemented", "created", "delivered",
+                                               "owned", "decided", "improved", "reduced", "increased")), "assertive"),
+    **dict.fromkeys((("for", "example"), ("for", "instance"), ("a", "result")), "assertive"),
+    ("you", "know"): "filler",
+    **dict.fromkeys((("so", "that"), ("the", "end")), "marker"),
+}
+_PAIR_STARTS = frozenset(first for first, _ in _PAIR_CUES)
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9+#'\-]*(?:\.[a-z0-9]+)*\+*")
+
+# Sentences in this word range read best when spoken
+IDEAL_SENTENCE_WORDS = (10, 22)
+
+
+def _clamp(value: float) -> int:
+    return int(round(min(95.0, max(15.0, value))))
+
+
+@lru_cache(maxsize=1024)
+def _terms(text: str) -> frozenset:
+    """Content words of a question (cached: the same question is scored once per answer)"""
+    return frozenset(w for w in _WORD.findall(text.lower()) if w not in STOPWORDS and len(w) > 2)
+
+
+@lru_cache(maxsize=256)
+def _skill_terms(skills: tuple) -> tuple:
+    """Each skill as the tuple of words that must all appear in the answer"""
+    parsed = []
+    for skill in skills:
+        words = tuple(_WORD.findall(str(skill).lower()))
+        if words:
+            parsed.append(words)
+    return tuple(parsed)
+
+
+def score_response(response: str, question: str = "", skills: Optional[Iterable[Any]] = None) -> Dict[str, Any]:
+    """
+    Score an answer without calling a model
+
+    Args:
+        response: Candidate's answer
+        question: The question it answers
+        skills: Resume skills/technologies (parsed_resume["skills"] + ["technologies"])
+
+    Returns:
+        Evaluation in the evaluate_response_realtime format, with "provisional": True
+    """
+    counts = {"hedge": 0, "assertive": 0, "filler": 0, "marker": 0}
+    sentences = words = 0
+    terms = set()
+    previous = ""
+    for token in _TOKENS.findall(response[:MAX_SCORED_CHARS].lower()):
+        ends = token[-1] == "."
+        if ends:
+            sentences += 1
+            token = token.rstrip(".")
+        elif token[0] in "!?":
+            sentences += 1
+            previous = ""
+            continue
+        words += 1
+        terms.add(token)
+        cue = _WORD_CUES.get(token)
+        # Only words that can start a two-word cue pay for the pair lookup
+        if previous in _PAIR_STARTS:
+            cue = _PAIR_CUES.get((previous, token)) or cue
+        if cue:
+            counts[cue] += 1
+        previous = "" if ends else token
+    hedges, assertive, fillers, markers = counts["hedge"], counts["assertive"], counts["filler"], counts["marker"]
+    sentences = max(sentences, 1 if words else 0)
+
+    if not words:
+        return _evaluation(15, 15, 15)
+
+    short = words < 12
+    # Cue counts are per ~50 words so a long answer is not sunk by a few hedges
+    per_50 = min(1.0, 50 / words)
+    confidence = 82 - per_50 * (9 * hedges + 6 * fillers) + 4 * min(assertive, 3) - (15 if short else 0)
+
+    per_sentence = words / sentences
+    low, high = IDEAL_SENTENCE_WORDS
+    drift = low - per_sentence if per_sentence < low else max(0.0, per_sentence - high)
+    clarity = 80 - 1.5 * drift + 3 * min(markers, 4) - per_50 * 5 * fillers - (15 if short else 0)
+
+    question_terms = _terms(question) if question else frozenset()
+    overlap = len(question_terms & terms) / len(question_terms) if question_terms else 0.5
+    skill_hits = sum(1 for skill in _skill_terms(tuple(skills or ())) if all(w in terms for w in skill))
+    depth = min(words / 60, 1.0)  # Two or three sentences before relevance can peak
+    relevance = 35 + 35 * overlap + 6 * min(skill_hits, 3) + 12 * depth
+
+    return _evaluation(_clamp(confidence), _clamp(clarity), _clamp(relevance))
+
+
+_FEEDBACK = {
+    "confidence": ("Answers without hedging", "State what you did plainly and cut phrases like \"I think\" or \"maybe\""),
+    "clarity": ("Well-structured answer", "Use shorter sentences and signpost the steps (first, then, finally)"),
+    "relevance": ("Stays on the question", "Tie the answer back to the question with a concrete example from your resume"),
+}
+
+
+def _evaluation(confidence: int, clarity: int, relevance: int) -> Dict[str, Any]:
+    scores = {"confidence": confidence, "clarity": clarity, "relevance": relevance}
+    strongest = max(scores, key=scores.get)
+    weakest = min(scores, key=scores.get)
+    return {
+        **scores,
+        "overall_score": int(round((confidence + clarity + relevance) / 3)),
+        "feedback": f"Provisional score. {_FEEDBACK[weakest][1]}.",
+        "strength": _FEEDBACK[strongest][0],
+        "improvement": _FEEDBACK[weakest][1],
+        "provisional": True,
+    }
@@ -0,0 +1,256 @@
+"""
+Interview Archive
+Keeps every completed interview (questions, conversation, responses and
+analytics) in a local append-only archive. Records are zlib-compressed JSON
+blobs in one data file; a fixed-size index file holds where each blob lives
+plus the fields used for lookups (user, role, completion time, score).
+
+The index is loaded into NumPy columns with secondary indexes per user and
+role and sorted orders for time and score, so listings and exports are range
+scans over the index that only decompress the records actually returned.
+"""
+
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+INDEX_DTYPE = np.dtype([
+    ("completed_at", np.int64),
+    ("offset", np.int64),
+    ("length", np.int32),
+    ("score", np.float32),
+    ("session_id", "S48"),
+    ("user_id", "S64"),
+    ("job_role", "S64"),
+    ("interview_type", "S16"),
+    ("difficulty", "S8"),
+])
+
+SUMMARY_FIELDS = ["session_id", "user_id", "job_role", "interview_type", "difficulty"]
+
+
+def _text(value: bytes) -> str:
+    return value.decode("utf-8", "ignore")
+
+
+def _key(value: Optional[str], size: int) -> bytes:
+    return " ".join((value or "").casefold().split()).encode("utf-8")[:size]
+
+
+class InterviewArchive:
+    """Append-only compressed archive with secondary indexes"""
+
+    def __init__(self, directory: str, compression_level: int = 6):
+        """
+        Args:
+            directory: Holds interviews.dat (records) and interviews.idx (index)
+            compression_level: zlib level for record blobs
+        """
+        self.directory = directory
+        self.compression_level = compression_level
+        self.data_path = os.path.join(directory, "interviews.dat")
+        self.index_path = os.path.join(directory, "interviews.idx")
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        entries = np.fromfile(self.index_path, dtype=INDEX_DTYPE) if os.path.exists(self.index_path) \
+            else np.empty(0, dtype=INDEX_DTYPE)
+        self._size = len(entries)
+        self._entries = np.empty(max(self._size * 2, 1024), dtype=INDEX_DTYPE)
+        self._entries[:self._size] = entries
+        self._rebuild_secondary_indexes()
+
+    @property
+    def _index(self) -> np.ndarray:
+        return self._entries[:self._size]
+
+    # Indexes
+
+    def _rebuild_secondary_indexes(self):
+        self._by_session: Dict[bytes, int] = {}
+        self._by_user: Dict[bytes, List[int]] = {}
+        self._by_role: Dict[bytes, List[int]] = {}
+        for row, entry in enumerate(self._index):
+            self._add_to_secondary(row, entry)
+        self._time_order = None
+        self._score_order = None
+
+    def _add_to_secondary(self, row: int, entry):
+        self._by_session[bytes(entry["session_id"])] = row
+        self._by_user.setdefault(bytes(entry["user_id"]), []).append(row)
+        self._by_role.setdefault(bytes(entry["job_role"]), []).append(row)
+
+    def _sorted_orders(self):
+        # Rebuilt lazily after writes; completions arrive in time order so this is nearly free
+        if self._time_order is None:
+            self._time_order = np.argsort(self._index["completed_at"], kind="stable")
+            self._score_order = np.argsort(self._index["score"], kind="stable")
+        return self._time_order, self._score_order
+
+    # Writes
+
+    def archive(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Store a completed interview
+
+        Args:
+            record: Must contain session_id; user_id, job_role, interview_type,
+                difficulty, completed_at and analytics.score are indexed
+        """
+        completed_at = int(record.get("completed_at") or time.time())
+        record = {**record, "completed_at": completed_at}
+        blob = zlib.compress(json.dumps(record, default=str, separators=(",", ":")).encode("utf-8"),
+                             self.compression_level)
+        score = (record.get("analytics") or {}).get("score")
+
+        entry = np.zeros(1, dtype=INDEX_DTYPE)
+        entry["completed_at"] = completed_at
+        entry["length"] = len(blob)
+        entry["score"] = float(score) if isinstance(score, (int, float)) else np.nan
+        entry["session_id"] = str(record["session_id"]).encode("utf-8")[:48]
+        entry["user_id"] = str(record.get("user_id") or "").encode("utf-8")[:64]
+        entry["job_role"] = _key(record.get("job_role"), 64)
+        entry["interview_type"] = _key(record.get("interview_type"), 16)
+        entry["difficulty"] = _key(record.get("difficulty"), 8)
+
+        with self._lock:
+            with open(self.data_path, "ab") as f:
+                entry["offset"] = f.tell()
+                f.write(blob)
+            # Index last: a crash in between leaves an unreferenced blob, never a dangling entry
+            with open(self.index_path, "ab") as f:
+                f.write(entry.tobytes())
+            row = self._size
+            if row == len(self._entries):
+                grown = np.empty(row * 2, dtype=INDEX_DTYPE)
+                grown[:row] = self._entries
+                self._entries = grown
+            self._entries[row] = entry[0]
+            self._size += 1
+            self._add_to_secondary(row, self._entries[row])
+            self._time_order = None
+            self._score_order = None
+
+        return self._summary(row)
+
+    # Reads
+
+    def _summary(self, row: int) -> Dict[str, Any]:
+        entry = self._index[row]
+        score = float(entry["score"])
+        return {
+            **{field: _text(entry[field]) for field in SUMMARY_FIELDS},
+            "completed_at": int(entry["completed_at"]),
+            "score": None if np.isnan(score) else score,
+            "stored_bytes": int(entry["length"]),
+        }
+
+    def _read(self, rows: np.ndarray) -> Iterator[Dict[str, Any]]:
+        """Decompress records, reading the data file in offset order"""
+        entries = self._index[rows]
+        order = np.argsort(entries["offset"])
+        records = [None] * len(rows)
+        with open(self.data_path, "rb") as f:
+            for position in order:
+                f.seek(int(entries["offset"][position]))
+                records[position] = json.loads(zlib.decompress(f.read(int(entries["length"][position]))))
+        return iter(records)
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Full record of one interview, or None"""
+        with self._lock:
+            row = self._by_session.get(str(session_id).encode("utf-8")[:48])
+        if row is None:
+            return None
+        return next(self._read(np.array([row])))
+
+    def _select(self, user_id: Optional[str], job_role: Optional[str], since: Optional[int],
+                until: Optional[int], min_score: Optional[float], max_score: Optional[float],
+                order_by: str) -> np.ndarray:
+        time_order, score_order = self._sorted_orders()
+        index = self._index
+
+        # Start from the narrowest index and intersect the rest
+        if order_by == "score":
+            scores = index["score"][score_order]
+            lo = 0 if min_score is None else int(np.searchsorted(scores, min_score, side="left"))
+            hi = int(np.searchsorted(scores, np.inf if max_score is None else max_score, side="right"))
+            rows = score_order[lo:hi][::-1]
+            if min_score is None and max_score is None:
+                # Unscored (NaN) interviews sort past +inf; list them after the scored ones
+                rows = np.concatenate([rows, score_order[int(np.searchsorted(scores, np.inf, side="right")):]])
+        else:
+            times = index["completed_at"][time_order]
+            lo = 0 if since is None else int(np.searchsorted(times, since, side="left"))
+            hi = len(times) if until is None else int(np.searchsorted(times, until, side="left"))
+            rows = time_order[lo:hi][::-1]
+
+        mask = np.ones(len(rows), dtype=bool)
+        if user_id:
+            mask &= np.isin(rows, self._by_user.get(str(user_id).encode("utf-8")[:64], []))
+        if job_role:
+            mask &= np.isin(rows, self._by_role.get(_key(job_role, 64), []))
+        if order_by == "score":
+            if since is not None:
+                mask &= index["completed_at"][rows] >= since
+            if until is not None:
+                mask &= index["completed_at"][rows] < until
+        else:
+            if min_score is not None:
+                mask &= index["score"][rows] >= min_score
+            if max_score is not None:
+                mask &= index["score"][rows] <= max_score
+        return rows[mask]
+
+    def query(self, user_id: Optional[str] = None, job_role: Optional[str] = None,
+              since: Optional[int] = None, until: Optional[int] = None,
+              min_score: Optional[float] = None, max_score: Optional[float] = None,
+              order_by: str = "time", limit: int = 50, offset: int = 0) -> Dict[str, Any]:
+        """
+        Summaries of matching interviews, newest (or highest score) first
+
+        Args:
+            user_id: Only this user's interviews
+            job_role: Only this role (case/whitespace-insensitive)
+            since: Completed at or after (epoch seconds)
+            until: Completed before (epoch seconds)
+            min_score: Minimum overall score
+            max_score: Maximum overall score
+            order_by: "time" or "score"
+            limit: Page size
+            offset: Page start
+        """
+        with self._lock:
+            rows = self._select(user_id, job_role, since, until, min_score, max_score, order_by)
+            page = rows[offset:offset + limit]
+            return {
+                "total": int(len(rows)),
+                "interviews": [self._summary(int(row)) for row in page],
+            }
+
+    def iter_records(self, batch_size: int = 200, **filters) -> Iterator[Dict[str, Any]]:
+        """Full records matching query() filters, decompressed in batches (for export and re-analysis)"""
+        with self._lock:
+            rows = self._select(filters.get("user_id"), filters.get("job_role"), filters.get("since"),
+                                filters.get("until"), filters.get("min_score"), filters.get("max_score"),
+                                filters.get("order_by", "time"))
+        for start in range(0, len(rows), batch_size):
+            yield from self._read(rows[start:start + batch_size])
+
+    def __len__(self) -> int:
+        return self._size
+
+
+_interview_archive = None
+
+def get_interview_archive() -> InterviewArchive:
+    """Get or create the global interview archive"""
+    global _interview_archive
+    if _interview_archive is None:
+        _interview_archive = InterviewArchive(os.getenv("INTERVIEW_ARCHIVE_DIR", "./data/interviews"))
+    return _interview_archive
@@ -0,0 +1,204 @@
+"""
+LLM Call Gateway
+Single choke point for chain/LLM invocations so every call is measured
+(latency, errors and token usage per tool and provider) and traced.
+Identical concurrent calls (same model, temperature and normalized prompt)
+are coalesced into one request, and every real request passes the
+provider's rate-limit admission (services/llm_scheduler.py).
+"""
+
+import json
+import os
+import time
+from typing import Any, Hashable, Optional, Tuple
+
+from services.metrics import LLM_CALL_LATENCY, LLM_CALL_ERRORS, LLM_TOKENS, LLM_COALESCED_CALLS
+from services.singleflight import SingleFlight, AsyncSingleFlight
+from services.llm_scheduler import get_llm_scheduler, estimate_tokens, prompt_text, COMPLETION_TOKEN_ESTIMATE
+from services.tracing import start_span, set_span_attributes
+
+SINGLEFLIGHT_ENABLED = os.getenv("LLM_SINGLEFLIGHT", "true").lower() != "false"
+
+_flight = SingleFlight()
+_async_flight = AsyncSingleFlight()
+
+
+def token_usage(response: Any) -> Tuple[int, int]:
+    """Extract (prompt_tokens, completion_tokens) from a LangChain response"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        return int(usage.get("input_tokens", 0) or 0), int(usage.get("output_tokens", 0) or 0)
+
+    metadata = getattr(response, "response_metadata", None) or {}
+
+    # Groq / OpenAI style
+    token_usage_data = metadata.get("token_usage")
+    if token_usage_data:
+        return (
+            int(token_usage_data.get("prompt_tokens", 0) or 0),
+            int(token_usage_data.get("completion_tokens", 0) or 0),
+        )
+
+    # Gemini style
+    gemini_usage = metadata.get("usage_metadata")
+    if gemini_usage:
+        return (
+            int(gemini_usage.get("prompt_token_count", 0) or 0),
+            int(gemini_usage.get("candidates_token_count", 0) or 0),
+        )
+
+    return 0, 0
+
+
+def _span_attributes(tool: str, provider: str, model: str) -> dict:
+    return {"llm.tool": tool, "llm.provider": provider, "llm.model": model}
+
+
+def _record_success(response: Any, tool: str, provider: str, model: str, span) -> int:
+    prompt_tokens, completion_tokens = token_usage(response)
+    span.set_attributes({"llm.prompt_tokens": prompt_tokens, "llm.completion_tokens": completion_tokens})
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, tool=tool, provider=provider, model=model, kind="prompt")
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, tool=tool, provider=provider, model=model, kind="completion")
+    return prompt_tokens + completion_tokens
+
+
+def _admission(inputs: Any, tool: str, provider: str):
+    """(budget, estimated_tokens, priority) for a call, or (None, 0, None) for unlimited providers"""
+    scheduler = get_llm_scheduler()
+    budget = scheduler.budget(provider)
+    if budget.unlimited:
+        return None, 0, None
+    estimated = estimate_tokens(prompt_text(inputs)) + COMPLETION_TOKEN_ESTIMATE
+    return budget, estimated, scheduler.priority_for(tool)
+
+
+def _normalize(value: Any) -> Any:
+    """Hashable form of chain input with whitespace runs collapsed"""
+    if isinstance(value, str):
+        return " ".join(value.split())
+    content = getattr(value, "content", None)
+    if content is not None:
+        return (getattr(value, "type", type(value).__name__), _normalize(content))
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _normalize(v)) for k, v in value.items()))
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def flight_key(chain, inputs: Any, tool: str, provider: str, model: str) -> Optional[Hashable]:
+    """
+    Coalescing key for a call, or None when it must not be shared
+
+    Bare chat models are keyed on model, temperature and prompt only, so the
+    same prompt from different tools is shared; composed chains also key on
+    the chain object since their inputs are template variables.
+    """
+    if not SINGLEFLIGHT_ENABLED:
+        return None
+    model_name = getattr(chain, "model_name", None) or getattr(chain, "model", None) or model
+    temperature = getattr(chain, "temperature", None)
+    try:
+        prompt = _normalize(inputs)
+    except Exception:
+        return None
+    scope = (type(chain).__name__,) if hasattr(chain, "model_name") or hasattr(chain, "model") \
+        else (tool, id(chain))
+    return (provider, str(model_name), temperature, scope, prompt)
+
+
+def _call_chain(chain, inputs: Any, tool: str, provider: str, model: str):
+    with start_span(f"llm.{provider}", _span_attributes(tool, provider, model)) as span:
+        budget, estimated, priority = _admission(inputs, tool, provider)
+        if budget is not None:
+            budget.acquire(priority, estimated)
+        start = time.perf_counter()
+        charged = estimated - COMPLETION_TOKEN_ESTIMATE  # Failed calls keep only the prompt charge
+        try:
+            response = chain.invoke(inputs)
+        except Exception as e:
+            LLM_CALL_ERRORS.inc(tool=tool, provider=provider, model=model, error=type(e).__name__)
+            raise
+        else:
+            charged = _record_success(response, tool, provider, model, span)
+        finally:
+            LLM_CALL_LATENCY.observe(time.perf_counter() - start, tool=tool, provider=provider, model=model)
+            if budget is not None:
+                budget.settle(estimated, charged)
+        return response
+
+
+async def _acall_chain(chain, inputs: Any, tool: str, provider: str, model: str):
+    with start_span(f"llm.{provider}", _span_attributes(tool, provider, model)) as span:
+        budget, estimated, priority = _admission(inputs, tool, provider)
+        if budget is not None:
+            await budget.aacquire(priority, estimated)
+        start = time.perf_counter()
+        charged = estimated - COMPLETION_TOKEN_ESTIMATE  # Failed calls keep only the prompt charge
+        try:
+            response = await chain.ainvoke(inputs)
+        except Exception as e:
+            LLM_CALL_ERRORS.inc(tool=tool, provider=provider, model=model, error=type(e).__name__)
+            raise
+        else:
+            charged = _record_success(response, tool, provider, model, span)
+        finally:
+            LLM_CALL_LATENCY.observe(time.perf_counter() - start, tool=tool, provider=provider, model=model)
+            if budget is not None:
+                budget.settle(estimated, charged)
+        return response
+
+
+def _record_coalesced(tool: str, provider: str, model: str):
+    LLM_COALESCED_CALLS.inc(tool=tool, provider=provider, model=model)
+    set_span_attributes(**{"llm.coalesced": True})
+
+
+def invoke_chain(chain, inputs: Any, *, tool: str, provider: str = "groq", model: str = ""):
+    """
+    Invoke a chain or LLM and record latency, errors and token usage
+
+    Args:
+        chain: Any runnable (prompt | llm chain or a bare chat model)
+        inputs: Input passed to chain.invoke
+        tool: Logical caller name used as the metrics label
+        provider: LLM provider name (groq, gemini, ollama, openai)
+        model: Model identifier
+    """
+    key = flight_key(chain, inputs, tool, provider, model)
+    if key is None:
+        return _call_chain(chain, inputs, tool, provider, model)
+    response, shared = _flight.do(key, lambda: _call_chain(chain, inputs, tool, provider, model))
+    if shared:
+        _record_coalesced(tool, provider, model)
+    return response
+
+
+async def ainvoke_chain(chain, inputs: Any, *, tool: str, provider: str = "groq", model: str = ""):
+    """Async counterpart of invoke_chain"""
+    key = flight_key(chain, inputs, tool, provider, model)
+    if key is None:
+        return await _acall_chain(chain, inputs, tool, provider, model)
+    response, shared = await _async_flight.do(key, lambda: _acall_chain(chain, inputs, tool, provider, model))
+    if shared:
+        _record_coalesced(tool, provider, model)
+    return response
+
+
+def invoke_prompt(prompt, variables: dict, llm, *, tool: str, provider: str = "groq", model: str = ""):
+    """
+    Format a precompiled prompt template and send the messages to the LLM
+
+    Templates keep a static system prefix with variables at the end, so the
+    formatted messages share a byte-identical prefix across calls.
+    """
+    messages = prompt.format_messages(**variables)
+    return invoke_chain(llm, messages, tool=tool, provider=provider, model=model)
+
+
+async def ainvoke_prompt(prompt, variables: dict, llm, *, tool: str, provider: str = "groq", model: str = ""):
+    """Async counterpart of invoke_prompt"""
+    messages = prompt.format_messages(**variables)
+    return await ainvoke_chain(llm, messages, tool=tool, provider=provider, model=model)
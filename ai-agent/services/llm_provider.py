@@ -1,14 +1,17 @@
 """
 Multi-LLM Provider with Automatic Fallback
 Supports: Gemini (primary), Ollama (fallback), OpenAI (backup)
+
+Provider SDKs are imported lazily, on first use, so importing the service
+does not pay for langchain-groq / -google-genai / -openai / -community.
 """
 
 import os
+import threading
 from typing import Optional, Dict, Any
 import logging
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_community.llms import Ollama
-from langchain_openai import ChatOpenAI
+from services.llm_gateway import invoke_chain
+from services.tracing import traced, set_span_attributes
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +36,7 @@ class MultiLLMProvider:
         # 1. Gemini (Primary - Fast and Free)
         if self.gemini_api_key and self.gemini_api_key != 'your-gemini-api-key-here':
             try:
+                from langchain_google_genai import ChatGoogleGenerativeAI
                 self.providers['gemini'] = ChatGoogleGenerativeAI(
                     google_api_key=self.gemini_api_key,
                     model="gemini-1.5-flash",  # Fast model
@@ -46,6 +50,7 @@ class MultiLLMProvider:
         
         # 2. Ollama (Fallback - Local and Free)
         try:
+            from langchain_community.llms import Ollama
             self.providers['ollama'] = Ollama(
                 base_url=self.ollama_base_url,
                 model="llama3.2:3b",  # Lightweight model
@@ -59,6 +64,7 @@ class MultiLLMProvider:
         # 3. OpenAI (Backup - Paid but reliable)
         if self.openai_api_key and self.openai_api_key.startswith('sk-'):
             try:
+                from langchain_openai import ChatOpenAI
                 self.providers['openai'] = ChatOpenAI(
                     api_key=self.openai_api_key,
                     model_name="gpt-3.5-turbo",
@@ -100,6 +106,7 @@ class MultiLLMProvider:
         
         raise RuntimeError("No LLM providers available")
     
+    @traced("MultiLLMProvider.invoke_with_fallback")
     def invoke_with_fallback(self, prompt: str, preferred: Optional[str] = None) -> str:
         """
         Invoke LLM with automatic fallback on failure
@@ -119,18 +126,26 @@ class MultiLLMProvider:
             fallback_order.insert(0, preferred)
         
         last_error = None
+        attempted = []
         
         for provider_name in fallback_order:
             if provider_name not in self.providers:
                 continue
             
+            attempted.append(provider_name)
+            set_span_attributes(**{"llm.fallback_path": ",".join(attempted)})
             try:
                 logger.info(f"🔄 Trying {provider_name}...")
                 provider = self.providers[provider_name]
                 
                 # Invoke based on provider type
                 if hasattr(provider, 'invoke'):
-                    response = provider.invoke(prompt)
+                    response = invoke_chain(
+                        provider, prompt,
+                        tool="invoke_with_fallback",
+                        provider=provider_name,
+                        model=self._model_name(provider)
+                    )
                     if hasattr(response, 'content'):
                         result = response.content
                     else:
@@ -149,6 +164,11 @@ class MultiLLMProvider:
         # All providers failed
         raise RuntimeError(f"All LLM providers failed. Last error: {last_error}")
     
+    @staticmethod
+    def _model_name(provider) -> str:
+        """Best-effort model identifier for metrics labels"""
+        return str(getattr(provider, "model", None) or getattr(provider, "model_name", None) or "")
+    
     def get_available_providers(self) -> list:
         """Get list of available providers"""
         return list(self.providers.keys())
@@ -167,3 +187,118 @@ def get_llm_provider() -> MultiLLMProvider:
     if _llm_provider is None:
         _llm_provider = MultiLLMProvider()
     return _llm_provider
+
+
+# Shared chat clients, keyed by (model, temperature)
+DEFAULT_GROQ_MODEL = "llama3-70b-8192"
+DEFAULT_GEMINI_MODEL = "gemini-1.5-flash"
+DEFAULT_OLLAMA_MODEL = "llama3.2:3b"
+
+_chat_models = {}
+_chat_models_lock = threading.Lock()
+
+def get_groq_llm(model: str = DEFAULT_GROQ_MODEL, temperature: float = 0):
+    """
+    Get a shared ChatGroq client, importing langchain-groq on first use
+    
+    Args:
+        model: Groq model name
+        temperature: Sampling temperature
+    """
+    key = ("groq", model, temperature)
+    llm = _chat_models.get(key)
+    if llm is None:
+        with _chat_models_lock:
+            llm = _chat_models.get(key)
+            if llm is None:
+                from langchain_groq import ChatGroq
+                llm = _chat_models[key] = ChatGroq(
+                    model=model,
+                    temperature=temperature,
+                    api_key=os.getenv("GROQ_API_KEY")
+                )
+    return llm
+
+def get_gemini_llm(model: str = DEFAULT_GEMINI_MODEL, temperature: float = 0.7):
+    """Get a shared Gemini chat client, importing langchain-google-genai on first use"""
+    key = ("gemini", model, temperature)
+    llm = _chat_models.get(key)
+    if llm is None:
+        with _chat_models_lock:
+            llm = _chat_models.get(key)
+            if llm is None:
+                from langchain_google_genai import ChatGoogleGenerativeAI
+                llm = _chat_models[key] = ChatGoogleGenerativeAI(
+                    google_api_key=os.getenv("GEMINI_API_KEY"),
+                    model=model,
+                    temperature=temperature
+                )
+    return llm
+
+def get_ollama_llm(model: str = DEFAULT_OLLAMA_MODEL, temperature: float = 0):
+    """Get a shared local Ollama chat client in JSON mode, importing langchain-community on first use"""
+    key = ("ollama", model, temperature)
+    llm = _chat_models.get(key)
+    if llm is None:
+        with _chat_models_lock:
+            llm = _chat_models.get(key)
+            if llm is None:
+                from langchain_community.chat_models import ChatOllama
+                llm = _chat_models[key] = ChatOllama(
+                    base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
+                    model=model,
+                    temperature=temperature,
+                    format="json"
+                )
+    return llm
+
+
+# (model, temperature) pairs used on the request path
+GROQ_WARMUP_SPECS = [
+    (DEFAULT_GROQ_MODEL, 0),
+    (DEFAULT_GROQ_MODEL, 0.3),
+    (DEFAULT_GROQ_MODEL, 0.7),
+    (DEFAULT_GROQ_MODEL, 0.8),
+]
+GEMINI_WARMUP_SPECS = [(DEFAULT_GEMINI_MODEL, 0.7)]
+
+def _is_configured(value: Optional[str], placeholder_prefix: str = "your") -> bool:
+    return bool(value) and not value.startswith(placeholder_prefix)
+
+def warm_up_providers() -> Dict[str, Any]:
+    """
+    Import and construct clients for configured providers only
+    
+    Intended for startup / readiness hooks so the first live request does
+    not pay SDK import and client construction costs.
+    
+    Returns:
+        Mapping of provider name to "ready" or the error message
+    """
+    status = {}
+    
+    if _is_configured(os.getenv("GROQ_API_KEY")):
+        try:
+            for model, temperature in GROQ_WARMUP_SPECS:
+                get_groq_llm(model, temperature)
+            status["groq"] = "ready"
+        except Exception as e:
+            status["groq"] = str(e)
+    
+    if _is_configured(os.getenv("GEMINI_API_KEY")):
+        try:
+            for model, temperature in GEMINI_WARMUP_SPECS:
+                get_gemini_llm(model, temperature)
+            status["gemini"] = "ready"
+        except Exception as e:
+            status["gemini"] = str(e)
+    
+    # The fallback provider only matters when Ollama or OpenAI is configured
+    if os.getenv("OLLAMA_BASE_URL") or _is_configured(os.getenv("OPENAI_API_KEY")):
+        try:
+            status["fallback"] = ",".join(get_llm_provider().get_available_providers())
+        except Exception as e:
+            status["fallback"] = str(e)
+    
+    logger.info(f"Warm-up complete: {status}")
+    return status
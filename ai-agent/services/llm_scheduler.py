@@ -0,0 +1,317 @@
+"""
+LLM Admission Scheduler
+Per-provider token buckets for requests-per-minute and tokens-per-minute,
+with priority classes so live interview turns are admitted before analytics
+and background insights. Calls wait in a priority queue while the budget
+refills and are shed with LLMOverBudget when the queue is full or the wait
+would exceed their class's limit. Prompt tokens are estimated with tiktoken
+and the bucket is corrected with the provider's reported usage afterwards.
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from services.metrics import LLM_QUEUE_DEPTH, LLM_QUEUE_WAIT, LLM_SHED
+from services.tracing import set_span_attributes
+
+try:
+    import tiktoken
+except ImportError:  # Optional; falls back to ~4 characters per token
+    tiktoken = None
+
+# Limits are opt-in: a provider is unlimited unless LLM_LIMIT_<PROVIDER>_RPM / _TPM
+# (or the limits passed to LLMScheduler) set them; 0 disables a limit
+UNLIMITED = {"rpm": 0, "tpm": 0}
+
+# Class -> (rank, longest queue wait in seconds before shedding)
+PRIORITY_CLASSES = {
+    "interactive": (0, float(os.getenv("LLM_MAX_WAIT_INTERACTIVE", "20"))),
+    "standard": (1, float(os.getenv("LLM_MAX_WAIT_STANDARD", "45"))),
+    "background": (2, float(os.getenv("LLM_MAX_WAIT_BACKGROUND", "10"))),
+}
+
+# Live interview turns and user commands first; analytics next; insights last
+TOOL_PRIORITIES = {
+    "evaluate_response_realtime": "interactive",
+    "generate_followup_question": "interactive",
+    "generate_next_interview_question": "interactive",
+    "generate_interview_questions": "interactive",
+    "adjust_difficulty": "interactive",
+    "parse_resume_structure": "interactive",
+    "create_plan": "interactive",
+    "agent_execute": "interactive",
+    "generate_interview_analytics": "standard",
+    "generate_conversation_summary": "standard",
+    "evaluate_interview_response": "standard",
+    "generate_insights": "background",
+    "suggest_focus_time": "background",
+}
+
+# Set by llm_priority(); overrides TOOL_PRIORITIES for every call made inside the block
+_priority_override = contextvars.ContextVar("llm_priority", default=None)
+
+
+@contextmanager
+def llm_priority(priority: str):
+    """
+    Run the calls made in this block (and threads started with a copy of its
+    context) at the given priority class, whatever tool makes them
+
+    Used by background work that goes through interactive tools, e.g. the
+    instant-start question upgrade.
+    """
+    if priority not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown priority class '{priority}'")
+    token = _priority_override.set(priority)
+    try:
+        yield
+    finally:
+        _priority_override.reset(token)
+
+
+COMPLETION_TOKEN_ESTIMATE = int(os.getenv("LLM_COMPLETION_TOKEN_ESTIMATE", "400"))
+MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "200"))
+POLL_INTERVAL = 0.05
+
+_sequence = itertools.count()  # FIFO order within a priority class
+
+
+class LLMOverBudget(RuntimeError):
+    """Raised when a call is shed instead of queued"""
+
+    def __init__(self, provider: str, priority: str, reason: str, retry_after: float):
+        super().__init__(f"LLM budget for {provider} exhausted ({reason}); "
+                         f"{priority} request shed, retry after {retry_after:.1f}s")
+        self.provider = provider
+        self.priority = priority
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+_encoding = None
+_encoding_failed = False
+
+def estimate_tokens(text: str) -> int:
+    """Prompt token count with tiktoken (cl100k_base), or a character-based estimate"""
+    global _encoding, _encoding_failed
+    if tiktoken is not None and _encoding is None and not _encoding_failed:
+        try:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding_failed = True  # Encoding file unavailable (e.g. offline)
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def prompt_text(inputs: Any) -> str:
+    """Flatten chain input (messages, dict or string) into the text sent to the model"""
+    if isinstance(inputs, str):
+        return inputs
+    if isinstance(inputs, (list, tuple)):
+        return "\n".join(prompt_text(item) for item in inputs)
+    content = getattr(inputs, "content", None)
+    if content is not None:
+        return content if isinstance(content, str) else str(content)
+    if isinstance(inputs, dict):
+        return "\n".join(str(value) for value in inputs.values())
+    return str(inputs)
+
+
+class TokenBucket:
+    """Continuously refilling bucket; capacity is one minute of budget"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount: float) -> float:
+        """Seconds until amount is available (0 if it already is)"""
+        missing = min(amount, self.capacity) - self.level
+        return 0.0 if missing <= 0 else missing / self.rate
+
+
+class ProviderBudget:
+    """RPM and TPM buckets for one provider plus its priority queue"""
+
+    def __init__(self, provider: str, rpm: float, tpm: float):
+        self.provider = provider
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._queue = []  # heap of (rank, seq)
+        self._counts = {name: 0 for name in PRIORITY_CLASSES}
+
+    @property
+    def unlimited(self) -> bool:
+        return self.requests is None and self.tokens is None
+
+    def _wait_time(self, tokens: int) -> float:
+        now = time.monotonic()
+        wait = 0.0
+        if self.requests is not None:
+            self.requests.refill(now)
+            wait = max(wait, self.requests.wait_for(1))
+        if self.tokens is not None:
+            self.tokens.refill(now)
+            wait = max(wait, self.tokens.wait_for(tokens))
+        return wait
+
+    def _debit(self, tokens: int):
+        if self.requests is not None:
+            self.requests.level -= 1
+        if self.tokens is not None:
+            self.tokens.level -= min(tokens, self.tokens.capacity)
+
+    def _enqueue(self, priority: str, tokens: int):
+        if len(self._queue) >= MAX_QUEUE:
+            self._shed(priority, "queue_full", self._wait_time(tokens))
+        # Work queued ahead of a background call means it would wait for all of it anyway
+        if priority == "background" and len(self._queue) >= MAX_QUEUE // 2:
+            self._shed(priority, "queue_full", self._wait_time(tokens))
+        ticket = (PRIORITY_CLASSES[priority][0], next(_sequence))
+        heapq.heappush(self._queue, ticket)
+        self._counts[priority] += 1
+        LLM_QUEUE_DEPTH.set(self._counts[priority], provider=self.provider, priority=priority)
+        return ticket
+
+    def _dequeue(self, ticket, priority: str):
+        self._queue.remove(ticket)
+        heapq.heapify(self._queue)
+        self._counts[priority] -= 1
+        LLM_QUEUE_DEPTH.set(self._counts[priority], provider=self.provider, priority=priority)
+        self._changed.notify_all()
+
+    def _shed(self, priority: str, reason: str, retry_after: float):
+        LLM_SHED.inc(provider=self.provider, priority=priority, reason=reason)
+        raise LLMOverBudget(self.provider, priority, reason, retry_after)
+
+    def _try_admit(self, ticket, priority: str, tokens: int, deadline: float) -> float:
+        """Admit the ticket (returns 0) or return how long to sleep; sheds past the deadline"""
+        wait = self._wait_time(tokens)
+        if self._queue[0] == ticket and wait == 0:
+            self._debit(tokens)
+            self._dequeue(ticket, priority)
+            return 0.0
+        now = time.monotonic()
+        # Shed as soon as the refill alone would outlast the deadline
+        if now + wait > deadline:
+            self._dequeue(ticket, priority)
+            self._shed(priority, "wait_exceeded", wait)
+        return max(min(wait, deadline - now), POLL_INTERVAL) if wait else POLL_INTERVAL
+
+    def acquire(self, priority: str, tokens: int):
+        """Block the calling thread until the call is admitted"""
+        if self.unlimited:
+            return
+        start = time.monotonic()
+        deadline = start + PRIORITY_CLASSES[priority][1]
+        with self._lock:
+            ticket = self._enqueue(priority, tokens)
+            while True:
+                sleep = self._try_admit(ticket, priority, tokens, deadline)
+                if not sleep:
+                    break
+                self._changed.wait(sleep)
+        self._record_wait(priority, start)
+
+    async def aacquire(self, priority: str, tokens: int):
+        """Await admission without holding a worker thread"""
+        if self.unlimited:
+            return
+        start = time.monotonic()
+        deadline = start + PRIORITY_CLASSES[priority][1]
+        with self._lock:
+            ticket = self._enqueue(priority, tokens)
+        try:
+            while True:
+                with self._lock:
+                    sleep = self._try_admit(ticket, priority, tokens, deadline)
+                if not sleep:
+                    break
+                await asyncio.sleep(min(sleep, 0.25))
+        except asyncio.CancelledError:
+            with self._lock:
+                if ticket in self._queue:
+                    self._dequeue(ticket, priority)
+            raise
+        self._record_wait(priority, start)
+
+    def settle(self, estimated: int, actual: int):
+        """Correct the token bucket once the provider reports real usage"""
+        if self.tokens is None or not actual:
+            return
+        with self._lock:
+            # A refund (actual < estimated) never fills the bucket past one minute of budget
+            self.tokens.level = min(self.tokens.capacity, self.tokens.level - (actual - estimated))
+            self._changed.notify_all()
+
+    def _record_wait(self, priority: str, start: float):
+        waited = time.monotonic() - start
+        LLM_QUEUE_WAIT.observe(waited, provider=self.provider, priority=priority)
+        if waited > 0.001:
+            set_span_attributes(**{"llm.queue_wait_ms": round(waited * 1000, 1), "llm.priority": priority})
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._wait_time(0)
+            return {
+                "queued": dict(self._counts),
+                "requests_available": None if self.requests is None else round(self.requests.level, 1),
+                "tokens_available": None if self.tokens is None else round(self.tokens.level),
+            }
+
+
+class LLMScheduler:
+    """Admission control across providers"""
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, float]]] = None):
+        self.limits = limits or {}
+        self._budgets: Dict[str, ProviderBudget] = {}
+        self._lock = threading.Lock()
+
+    def budget(self, provider: str) -> ProviderBudget:
+        budget = self._budgets.get(provider)
+        if budget is None:
+            with self._lock:
+                budget = self._budgets.get(provider)
+                if budget is None:
+                    defaults = self.limits.get(provider, UNLIMITED)
+                    prefix = f"LLM_LIMIT_{provider.upper()}"
+                    budget = self._budgets[provider] = ProviderBudget(
+                        provider,
+                        float(os.getenv(f"{prefix}_RPM", defaults["rpm"])),
+                        float(os.getenv(f"{prefix}_TPM", defaults["tpm"])),
+                    )
+        return budget
+
+    @staticmethod
+    def priority_for(tool: str) -> str:
+        return _priority_override.get() or TOOL_PRIORITIES.get(tool, "standard")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {provider: budget.snapshot() for provider, budget in list(self._budgets.items())}
+
+
+_llm_scheduler = None
+
+def get_llm_scheduler() -> LLMScheduler:
+    """Get or create the global LLM scheduler"""
+    global _llm_scheduler
+    if _llm_scheduler is None:
+        _llm_scheduler = LLMScheduler()
+    return _llm_scheduler
@@ -0,0 +1,292 @@
+"""
+Lightweight Prometheus-style Metrics
+Counters, gauges and histograms rendered in the Prometheus text exposition
+format for the /metrics endpoint. No external client library is required.
+"""
+
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from services.tracing import add_span_event
+
+# Seconds; spans fast local work up to slow 70B generations
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: Optional[Dict[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra.items())
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class for a labelled metric family"""
+
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self):
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter"""
+
+    metric_type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in items]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    metric_type = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in items]
+
+
+class Histogram(_Metric):
+    """Cumulative bucketed distribution with sum and count"""
+
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    def get_count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state["count"] if state else 0
+
+    def _samples(self):
+        with self._lock:
+            items = [(key, list(state["counts"]), state["sum"], state["count"])
+                     for key, state in self._values.items()]
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, {"le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metric families and renders them for scraping"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+# Global registry and service metrics
+REGISTRY = MetricsRegistry()
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by endpoint",
+    ["method", "endpoint", "status"],
+)
+
+LLM_CALL_LATENCY = REGISTRY.histogram(
+    "llm_call_duration_seconds",
+    "LLM call latency by tool and provider",
+    ["tool", "provider", "model"],
+)
+
+LLM_CALL_ERRORS = REGISTRY.counter(
+    "llm_call_errors_total",
+    "Failed LLM calls by tool, provider and error type",
+    ["tool", "provider", "model", "error"],
+)
+
+LLM_TOKENS = REGISTRY.counter(
+    "llm_tokens_total",
+    "Prompt and completion tokens by tool and provider",
+    ["tool", "provider", "model", "kind"],
+)
+
+JSON_PARSE_FALLBACKS = REGISTRY.counter(
+    "llm_json_parse_fallbacks_total",
+    "Times an LLM response could not be parsed and a fallback was used",
+    ["site"],
+)
+
+CACHE_LOOKUPS = REGISTRY.counter(
+    "cache_lookups_total",
+    "In-process cache lookups by cache and result (hit/miss)",
+    ["cache", "result"],
+)
+
+PLAN_STEP_LATENCY = REGISTRY.histogram(
+    "plan_step_duration_seconds",
+    "Plan step execution time by tool and outcome",
+    ["tool", "status"],
+)
+
+LLM_COALESCED_CALLS = REGISTRY.counter(
+    "llm_coalesced_calls_total",
+    "LLM calls served by joining an identical in-flight request",
+    ["tool", "provider", "model"],
+)
+
+LLM_QUEUE_DEPTH = REGISTRY.gauge(
+    "llm_queue_depth",
+    "LLM calls waiting for provider rate-limit budget",
+    ["provider", "priority"],
+)
+
+LLM_QUEUE_WAIT = REGISTRY.histogram(
+    "llm_queue_wait_seconds",
+    "Time LLM calls waited for admission",
+    ["provider", "priority"],
+)
+
+LLM_SHED = REGISTRY.counter(
+    "llm_shed_total",
+    "LLM calls rejected because the provider budget was exhausted",
+    ["provider", "priority", "reason"],
+)
+
+EVALUATION_CASCADE = REGISTRY.counter(
+    "evaluation_cascade_total",
+    "Cascaded response evaluations by outcome (accepted by the small model or the escalation reason)",
+    ["outcome"],
+)
+
+EVALUATION_TIER_AGREEMENT = REGISTRY.counter(
+    "evaluation_tier_agreement_total",
+    "Escalated evaluations where both tiers scored, by whether they landed in the same score band",
+    ["agree"],
+)
+
+EVALUATION_TIER_SCORE_DIFF = REGISTRY.histogram(
+    "evaluation_tier_score_difference",
+    "Absolute overall_score difference between the small and large evaluator",
+    buckets=(2, 5, 10, 15, 20, 30, 50),
+)
+
+ACTIVE_INTERVIEW_SESSIONS = REGISTRY.gauge(
+    "interview_active_sessions",
+    "Interview sessions currently held in memory",
+)
+
+
+def record_json_fallback(site: str):
+    """Count a JSON-parse fallback at the given call site"""
+    JSON_PARSE_FALLBACKS.inc(site=site)
+    add_span_event("json_parse_fallback", site=site)
+
+
+def render_metrics() -> str:
+    """Render all registered metrics in Prometheus text format"""
+    return REGISTRY.render()
@@ -1,20 +1,78 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
+from services.llm_gateway import ainvoke_prompt
+from services.metrics import record_json_fallback
+from services.llm_provider import get_gemini_llm, DEFAULT_GEMINI_MODEL
+from services.cache import TTLCache
+from services.tracing import start_span, set_span_attributes
+from services.activity_store import epoch, events_to_columns, get_activity_store
+from services.activity_analytics import analyze_user, TIME_RANGES, FOCUS_TARGET_HOURS_PER_DAY
+from services.activity_store import EVENT_KINDS
+from services.scheduling import find_free_blocks, describe_block, DAY_SECONDS
+import numpy as np
 import os
 import json
+import time
+import asyncio
+import logging
 from datetime import datetime, timedelta
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
-# Initialize LLM
-llm = ChatGoogleGenerativeAI(
-    google_api_key=os.getenv("GEMINI_API_KEY"),
-    model="gemini-1.5-flash",
-    temperature=0.7
-)
+# Insight reports change a few times a day at most. Entries younger than
+# INSIGHT_FRESH_TTL are served as-is; older ones (up to INSIGHT_STALE_TTL) are
+# served immediately while a background task regenerates them.
+INSIGHT_FRESH_TTL = int(os.getenv("INSIGHT_FRESH_TTL", "3600"))
+INSIGHT_STALE_TTL = int(os.getenv("INSIGHT_STALE_TTL", "21600"))
+INSIGHT_PRECOMPUTE_INTERVAL = int(os.getenv("INSIGHT_PRECOMPUTE_INTERVAL", "1800"))
+INSIGHT_ACTIVE_WINDOW = int(os.getenv("INSIGHT_ACTIVE_WINDOW", "86400"))
+INSIGHT_PRECOMPUTE_ENABLED = os.getenv("INSIGHT_PRECOMPUTE", "true").lower() == "true"
+
+insight_cache = TTLCache("insights", maxsize=int(os.getenv("INSIGHT_CACHE_SIZE", "2048")), ttl=INSIGHT_STALE_TTL)
+_refreshing = set()       # cache keys with a regeneration in flight
+_refresh_tasks = set()    # strong references; the event loop only keeps weak ones
+_active_users = {}        # (user_id, time_range) -> last request (epoch seconds)
+_precompute_task = None
+
+ACTIVITY_FLUSH_INTERVAL = float(os.getenv("ACTIVITY_FLUSH_INTERVAL", "5"))
+_flush_task = None
+
+def _get_llm():
+    """Gemini client, created on the first analytics request"""
+    return get_gemini_llm(DEFAULT_GEMINI_MODEL, temperature=0.7)
+
+# Compiled once at import; system prompts are static so they form a stable cache prefix
+INSIGHTS_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are a productivity analytics AI. Write a productivity report around the activity metrics given in the request.
+    
+    The metrics are exact and already computed (emails, meetings attended and missed,
+    meeting load, focus hours and an overall score). Do not change or invent numbers.
+    
+    Return a JSON object with:
+    - summary: brief summary of the period
+    - achievements: list of top 3 achievements
+    - improvements: list of 3 areas for improvement
+    """),
+    ("user", "Generate insights for user {user_id} for the past {time_range}.\n\nMetrics:\n{metrics}")
+])
+
+FOCUS_TIME_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are a productivity scheduling AI. Explain suggested focus time blocks.
+    
+    The blocks have already been chosen from the user's calendar and are given in the request, in order.
+    For each block write one sentence on why it is a good time for deep work, considering:
+    - User's working hours and preferences
+    - Meetings around the block
+    - Energy levels throughout the day
+    
+    Return a JSON object with a 'reasons' array holding one string per block, in the same order.
+    """),
+    ("user", "Explain focus blocks for user {user_id} with preferences: {preferences}\n\nBlocks:\n{blocks}")
+])
 
 class PatternAnalysisRequest(BaseModel):
     user_id: str
@@ -25,198 +83,322 @@ class InsightGenerationRequest(BaseModel):
     user_id: str
     time_range: str = '24h'
 
+class ActivityEvent(BaseModel):
+    type: str  # 'meeting', 'email_sent', 'email_received', 'focus'
+    start: datetime
+    end: Optional[datetime] = None
+    attended: Optional[bool] = None  # meetings only
+    important: bool = False
+    event_id: str = ""
+    title: str = ""
+    organizer: str = ""
+
+class ActivityIngestRequest(BaseModel):
+    user_id: str
+    events: List[ActivityEvent]
+
+class MissedMeetingsRequest(BaseModel):
+    user_id: str
+    time_range: str = '24h'
+
+class BusyInterval(BaseModel):
+    start: datetime
+    end: datetime
+
 class FocusTimeSuggestionRequest(BaseModel):
     user_id: str
     preferences: Optional[Dict[str, Any]] = None
+    busy: List[BusyInterval] = []  # added to the meetings already in the activity store
+    use_llm: bool = False          # ask Gemini to write the "reason" text
+
+def _analyze(user_id: str, time_range: str) -> Dict[str, Any]:
+    if time_range not in TIME_RANGES:
+        raise HTTPException(status_code=400, detail=f"time_range must be one of {list(TIME_RANGES)}")
+    return analyze_user(user_id, time_range)
+
+@router.post("/activity/events")
+async def ingest_activity(request: ActivityIngestRequest):
+    """Record activity events (meetings, emails, focus blocks) for a user"""
+    try:
+        columns = events_to_columns(event.model_dump() for event in request.events)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # A batch that crosses the flush threshold writes segments; keep that off the event loop
+    count = await asyncio.to_thread(get_activity_store().append, request.user_id, columns)
+    return {
+        "status": "success",
+        "ingested": count
+    }
 
 @router.post("/analyze-patterns")
 async def analyze_patterns(request: PatternAnalysisRequest):
     """Analyze user activity patterns"""
-    try:
-        if request.analysis_type == 'missed_meetings':
-            # Mock data for demonstration - in production, fetch from calendar
-            missed_meetings = [
-                {
-                    "title": "Team Standup",
-                    "time": "9:00 AM",
-                    "organizer": "team@company.com",
-                    "attendees": ["alice@company.com", "bob@company.com"],
-                    "important": False
-                },
-                {
-                    "title": "Client Review Meeting",
-                    "time": "2:00 PM",
-                    "organizer": "client@external.com",
-                    "attendees": ["client@external.com", "manager@company.com"],
-                    "important": True
-                }
-            ]
-            
-            return {
-                "status": "success",
-                "analysis_type": "missed_meetings",
-                "missed_meetings": missed_meetings,
-                "count": len(missed_meetings)
-            }
-        
+    analysis = await asyncio.to_thread(_analyze, request.user_id, request.time_range)
+    metrics = analysis["metrics"]
+    
+    if request.analysis_type == 'missed_meetings':
         return {
             "status": "success",
-            "analysis_type": request.analysis_type,
-            "data": {}
+            "analysis_type": "missed_meetings",
+            "missed_meetings": analysis["missed_meetings"],
+            "count": len(analysis["missed_meetings"])
         }
-        
+    
+    if request.analysis_type == 'focus_time':
+        data = {
+            "focus_time": metrics["focus_time"],
+            "daily_focus_hours": metrics["daily"]["focus_hours"]
+        }
+    elif request.analysis_type == 'productivity':
+        data = metrics
+    else:
+        raise HTTPException(status_code=400, detail=f"Unknown analysis_type '{request.analysis_type}'")
+    
+    return {
+        "status": "success",
+        "analysis_type": request.analysis_type,
+        "time_range": request.time_range,
+        "events": analysis["events"],
+        "data": data
+    }
+
+def _insight_key(user_id: str, time_range: str) -> tuple:
+    """Cache key: user, range and the UTC day the report belongs to"""
+    return user_id, time_range, datetime.utcnow().date().isoformat()
+
+def _report_metrics(metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """Numeric report fields, always computed fresh from the activity store"""
+    return {key: value for key, value in metrics.items() if key != "daily"}
+
+def _fallback_prose(metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """Report text built only from the computed metrics (no LLM, nothing invented)"""
+    days = max(len(metrics["daily"]["focus_hours"]), 1)
+    focus_per_day = metrics["focus_time"] / days
+    
+    achievements = []
+    if focus_per_day >= FOCUS_TARGET_HOURS_PER_DAY:
+        achievements.append(f"Met the {FOCUS_TARGET_HOURS_PER_DAY:g}h/day focus target ({focus_per_day:.1f}h/day)")
+    elif metrics["focus_time"]:
+        achievements.append(f"Logged {metrics['focus_time']}h of focus time")
+    if metrics["meetings_attended"] and not metrics["meetings_missed"]:
+        achievements.append(f"Attended all {metrics['meetings_attended']} meetings")
+    elif metrics["meetings_attended"]:
+        achievements.append(f"Attended {metrics['meetings_attended']} meetings")
+    if metrics["emails_sent"]:
+        achievements.append(f"Sent {metrics['emails_sent']} emails")
+    
+    improvements = []
+    if focus_per_day < FOCUS_TARGET_HOURS_PER_DAY:
+        improvements.append(f"Focus time averaged {focus_per_day:.1f}h/day, "
+                            f"below the {FOCUS_TARGET_HOURS_PER_DAY:g}h target")
+    if metrics["meetings_missed"]:
+        improvements.append(f"{metrics['meetings_missed']} meetings were missed "
+                            f"(attendance {metrics['attendance_rate']:.0%})")
+    if metrics["meeting_load"] > 0.5:
+        improvements.append(f"Meetings took {metrics['meeting_load']:.0%} of working hours")
+    
+    return {
+        "summary": (f"Productivity score {metrics['score']}: {metrics['focus_time']}h of focus time, "
+                    f"{metrics['meetings_attended']} meetings attended and {metrics['meetings_missed']} missed."),
+        "achievements": achievements[:3],
+        "improvements": improvements[:3]
+    }
+
+async def _compute_insights(user_id: str, time_range: str, metrics: Dict[str, Any]):
+    """Ask Gemini to phrase the report; returns (prose, from_llm)"""
+    try:
+        response = await ainvoke_prompt(INSIGHTS_PROMPT, {
+            "user_id": user_id,
+            "time_range": time_range,
+            "metrics": json.dumps(_report_metrics(metrics))
+        }, _get_llm(), tool="generate_insights", provider="gemini", model=DEFAULT_GEMINI_MODEL)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        # The numbers stand on their own; only the wording is lost
+        logger.warning(f"Insight generation failed, using template summary: {e}")
+        return _fallback_prose(metrics), False
+    
+    # Try to parse AI response as JSON
+    try:
+        result = json.loads(response.content)
+        if not isinstance(result, dict):
+            raise ValueError("Insights JSON is not an object")
+        return {
+            "summary": result.get("summary", ""),
+            "achievements": result.get("achievements", []),
+            "improvements": result.get("improvements", [])
+        }, True
+    except (TypeError, ValueError):
+        # Fallback if AI doesn't return valid JSON
+        record_json_fallback("generate_insights")
+        return _fallback_prose(metrics), False
+
+async def _refresh_insights(user_id: str, time_range: str):
+    """Regenerate and cache a report; concurrent refreshes of one key are collapsed"""
+    key = _insight_key(user_id, time_range)
+    if key in _refreshing:
+        return
+    _refreshing.add(key)
+    try:
+        metrics = (await asyncio.to_thread(analyze_user, user_id, time_range))["metrics"]
+        prose, from_llm = await _compute_insights(user_id, time_range, metrics)
+        # Fallback reports are not cached so the next request retries the LLM
+        if from_llm:
+            insight_cache.set(key, {**prose, "generated_at": datetime.utcnow().isoformat()})
+    except Exception as e:
+        logger.warning(f"Insight refresh failed for {user_id}/{time_range}: {e}")
+    finally:
+        _refreshing.discard(key)
 
 @router.post("/generate-insights")
 async def generate_insights(request: InsightGenerationRequest):
     """Generate comprehensive daily insights"""
+    # Numbers come from the analytics engine on every request; only the prose is cached
+    metrics = (await asyncio.to_thread(_analyze, request.user_id, request.time_range))["metrics"]
     try:
-        # Create prompt for AI to generate insights
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are a productivity analytics AI. Generate a comprehensive daily productivity report.
-            
-            Analyze the following metrics and provide insights:
-            - Email activity
-            - Meeting attendance
-            - Focus time utilization
-            - Task completion
-            
-            Return a JSON object with:
-            - score: overall productivity score (0-100)
-            - summary: brief summary of the day
-            - emails_sent: number of emails sent
-            - meetings_attended: number of meetings attended
-            - focus_time: hours of focused work
-            - achievements: list of top 3 achievements
-            - improvements: list of 3 areas for improvement
-            """),
-            ("user", "Generate insights for user {user_id} for the past {time_range}")
-        ])
-        
-        chain = prompt | llm
-        response = await chain.ainvoke({
-            "user_id": request.user_id,
-            "time_range": request.time_range
-        })
+        _active_users[(request.user_id, request.time_range)] = time.time()
+        key = _insight_key(request.user_id, request.time_range)
         
-        # Try to parse AI response as JSON
-        try:
-            insights = json.loads(response.content)
-        except:
-            # Fallback if AI doesn't return valid JSON
-            insights = {
-                "score": 75,
-                "summary": "Good productivity day with balanced focus and collaboration time.",
-                "emails_sent": 12,
-                "meetings_attended": 4,
-                "focus_time": 5.5,
-                "achievements": [
-                    "Completed project milestone",
-                    "Responded to all urgent emails",
-                    "Attended important client meeting"
-                ],
-                "improvements": [
-                    "Reduce meeting time by 30 minutes",
-                    "Block more focus time in the morning",
-                    "Respond to emails in batches"
-                ]
+        cached = insight_cache.get_with_age(key)
+        if cached is not None:
+            prose, age = cached
+            stale = age > INSIGHT_FRESH_TTL
+            if stale:
+                # Serve the stale report now and regenerate off the request path
+                task = asyncio.create_task(_refresh_insights(request.user_id, request.time_range))
+                _refresh_tasks.add(task)
+                task.add_done_callback(_refresh_tasks.discard)
+            set_span_attributes(**{"cache.insights": "stale" if stale else "hit"})
+            return {
+                "status": "success",
+                **_report_metrics(metrics),
+                **prose,
+                "cache": "stale" if stale else "hit"
             }
         
+        set_span_attributes(**{"cache.insights": "miss"})
+        prose, from_llm = await _compute_insights(request.user_id, request.time_range, metrics)
+        if from_llm:
+            insight_cache.set(key, {**prose, "generated_at": datetime.utcnow().isoformat()})
+        
         return {
             "status": "success",
-            **insights
+            **_report_metrics(metrics),
+            **prose,
+            "cache": "miss"
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _precompute_insights_loop():
+    """Periodically refresh reports for recently active users before they go stale"""
+    while True:
+        await asyncio.sleep(INSIGHT_PRECOMPUTE_INTERVAL)
+        cutoff = time.time() - INSIGHT_ACTIVE_WINDOW
+        for (user_id, time_range), last_seen in list(_active_users.items()):
+            if last_seen < cutoff:
+                _active_users.pop((user_id, time_range), None)
+                continue
+            cached = insight_cache.get_with_age(_insight_key(user_id, time_range))
+            # Refresh entries that are missing or will go stale before the next run
+            if cached is None or cached[1] + INSIGHT_PRECOMPUTE_INTERVAL > INSIGHT_FRESH_TTL:
+                with start_span("insights.precompute", {"user_id": user_id, "time_range": time_range}):
+                    await _refresh_insights(user_id, time_range)
+
+async def _flush_activity_loop():
+    """Write buffered activity batches to disk so small ingests do not wait for flush_rows"""
+    while True:
+        await asyncio.sleep(ACTIVITY_FLUSH_INTERVAL)
+        try:
+            await asyncio.to_thread(get_activity_store().flush)
+        except Exception as e:
+            logger.warning(f"Activity flush failed: {e}")
+
+@router.on_event("startup")
+async def start_insight_precompute():
+    global _precompute_task, _flush_task
+    if INSIGHT_PRECOMPUTE_ENABLED:
+        _precompute_task = asyncio.create_task(_precompute_insights_loop())
+    _flush_task = asyncio.create_task(_flush_activity_loop())
+
+@router.on_event("shutdown")
+async def stop_insight_precompute():
+    for task in (_precompute_task, _flush_task):
+        if task is not None:
+            task.cancel()
+    get_activity_store().flush()
+
+def _busy_intervals(user_id: str, extra: List[BusyInterval], horizon_start: int, horizon_days: int):
+    """Meetings and booked focus blocks from the activity store plus request-supplied intervals"""
+    # Look back a day so meetings already in progress still count as busy
+    columns = get_activity_store().query(user_id, horizon_start - DAY_SECONDS,
+                                         horizon_start + horizon_days * DAY_SECONDS)
+    booked = np.isin(columns["kind"], [EVENT_KINDS["meeting"], EVENT_KINDS["focus"]])
+    starts = np.concatenate([columns["start"][booked], [epoch(b.start) for b in extra]]).astype(np.int64)
+    ends = np.concatenate([columns["end"][booked], [epoch(b.end) for b in extra]]).astype(np.int64)
+    return starts, ends
+
+async def _llm_reasons(user_id: str, preferences: Dict[str, Any], blocks: List[Dict[str, Any]]):
+    """Reason text from Gemini, or None if it fails or returns the wrong shape"""
+    try:
+        response = await ainvoke_prompt(FOCUS_TIME_PROMPT, {
+            "user_id": user_id,
+            "preferences": json.dumps(preferences),
+            "blocks": json.dumps(blocks)
+        }, _get_llm(), tool="suggest_focus_time", provider="gemini", model=DEFAULT_GEMINI_MODEL)
+    except Exception as e:
+        # Counted in LLM_CALL_ERRORS by the gateway; the template reasons stand in
+        logger.warning(f"Focus time reasons from LLM failed: {e}")
+        return None
+    try:
+        result = json.loads(response.content)
+        reasons = result.get("reasons", []) if isinstance(result, dict) else None
+        if isinstance(reasons, list) and len(reasons) == len(blocks):
+            return reasons
+    except (TypeError, ValueError) as e:
+        logger.warning(f"Focus time reasons from LLM were not valid JSON: {e}")
+    record_json_fallback("suggest_focus_time")
+    return None
+
 @router.post("/suggest-focus-time")
 async def suggest_focus_time(request: FocusTimeSuggestionRequest):
     """Suggest optimal focus time blocks"""
     try:
         preferences = request.preferences or {}
+        horizon_start = int(time.time())
+        horizon_days = int(preferences.get("horizon_days", 7))
         
-        # Create prompt for AI to suggest focus time
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are a productivity scheduling AI. Suggest optimal focus time blocks.
-            
-            Consider:
-            - User's working hours and preferences
-            - Typical meeting patterns
-            - Energy levels throughout the day
-            - Minimum 2-hour blocks for deep work
-            
-            Return a JSON object with a 'suggestions' array containing:
-            - duration: hours
-            - time: description (e.g., "tomorrow morning")
-            - start: time (e.g., "09:00")
-            - end: time (e.g., "11:00")
-            - reason: why this time is optimal
-            """),
-            ("user", "Suggest focus time for user {user_id} with preferences: {preferences}")
-        ])
-        
-        chain = prompt | llm
-        response = await chain.ainvoke({
-            "user_id": request.user_id,
-            "preferences": json.dumps(preferences)
-        })
+        busy_starts, busy_ends = await asyncio.to_thread(
+            _busy_intervals, request.user_id, request.busy, horizon_start, horizon_days
+        )
+        suggestions = find_free_blocks(busy_starts, busy_ends, horizon_start, preferences)
         
-        # Try to parse AI response
-        try:
-            result = json.loads(response.content)
-            suggestions = result.get("suggestions", [])
-        except:
-            # Fallback suggestions
-            suggestions = [
-                {
-                    "duration": 2,
-                    "time": "tomorrow morning",
-                    "start": "09:00",
-                    "end": "11:00",
-                    "reason": "Morning hours typically have fewer meetings and higher energy levels"
-                },
-                {
-                    "duration": 2,
-                    "time": "tomorrow afternoon",
-                    "start": "14:00",
-                    "end": "16:00",
-                    "reason": "Post-lunch period with minimal scheduled meetings"
-                }
-            ]
+        reasons = None
+        if request.use_llm and suggestions:
+            reasons = await _llm_reasons(request.user_id, preferences, suggestions)
+        for index, block in enumerate(suggestions):
+            block["reason"] = reasons[index] if reasons else describe_block(block)
         
         return {
             "status": "success",
             "suggestions": suggestions
         }
         
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid preferences: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/detect-missed-meetings")
-async def detect_missed_meetings(request: dict):
+async def detect_missed_meetings(request: MissedMeetingsRequest):
     """Detect meetings that were missed"""
-    try:
-        user_id = request.get("user_id")
-        
-        # In production, this would analyze calendar and activity logs
-        # For now, return mock data
-        missed = [
-            {
-                "meeting_id": "meet_123",
-                "title": "Weekly Team Sync",
-                "scheduled_time": "2024-01-14T10:00:00Z",
-                "organizer": "manager@company.com",
-                "importance": "medium"
-            }
-        ]
-        
-        return {
-            "status": "success",
-            "missed_meetings": missed,
-            "count": len(missed)
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    missed = (await asyncio.to_thread(_analyze, request.user_id, request.time_range))["missed_meetings"]
+    for meeting in missed:
+        meeting["importance"] = "high" if meeting["important"] else "medium"
+    
+    return {
+        "status": "success",
+        "missed_meetings": missed,
+        "count": len(missed)
+    }
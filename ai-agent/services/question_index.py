@@ -0,0 +1,305 @@
+"""
+Resume Similarity Question Index
+Keeps a cosine-similarity index over parsed resume profiles (skills,
+technologies, projects, roles) together with the questions generated for
+them. A new resume for the same role and difficulty that lands within the
+similarity threshold of a stored one reuses its questions, re-personalized
+to the new resume's own project, company and skill names, instead of paying
+for another generation call.
+
+Only the hashed profile vector, the question text and the project, company
+and skill names personalization needs are stored; project descriptions and
+experience entries never leave the request. Entries expire after a TTL and
+the index keeps at most max_entries, oldest dropped first.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from services.metrics import CACHE_LOOKUPS
+
+DIMENSIONS = 1024
+
+# Feature weights: the stack dominates, project/company names only nudge
+FEATURE_WEIGHTS = {"skill": 1.0, "project_tech": 0.5, "experience_role": 0.5, "project_word": 0.25}
+
+
+def _norm(term: Any) -> str:
+    return " ".join(str(term or "").casefold().split())
+
+
+def _role_key(job_role: str, difficulty: str, interview_type: str) -> str:
+    return f"{_norm(job_role)}|{_norm(difficulty)}|{_norm(interview_type)}"
+
+
+def profile_features(parsed_resume: Dict[str, Any]) -> Dict[str, float]:
+    """Weighted sparse features of a parsed resume"""
+    features: Dict[str, float] = {}
+
+    def add(kind: str, term: Any):
+        term = _norm(term)
+        if term:
+            key = f"{kind}:{term}"
+            features[key] = max(features.get(key, 0.0), FEATURE_WEIGHTS[kind])
+
+    for skill in list(parsed_resume.get("skills") or []) + list(parsed_resume.get("technologies") or []):
+        add("skill", skill)
+    for project in parsed_resume.get("projects") or []:
+        for tech in project.get("technologies") or []:
+            add("project_tech", tech)
+        for word in re.findall(r"[a-z0-9+#.]{3,}", _norm(project.get("description"))):
+            add("project_word", word)
+    for job in parsed_resume.get("experience") or []:
+        add("experience_role", job.get("role"))
+    return features
+
+
+def embed(features: Dict[str, float]) -> np.ndarray:
+    """Hash features into a unit-length dense vector"""
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    for feature, weight in features.items():
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], "little") % DIMENSIONS
+        sign = 1.0 if digest[4] & 1 else -1.0
+        vector[bucket] += sign * weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _names(parsed_resume: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Names a question may mention, per kind, in resume order"""
+    skills = []
+    for skill in list(parsed_resume.get("skills") or []) + list(parsed_resume.get("technologies") or []):
+        if skill and _norm(skill) not in {_norm(s) for s in skills}:
+            skills.append(str(skill))
+    return {
+        "project": [str(p.get("name")) for p in parsed_resume.get("projects") or []
+                    if p.get("name") and _norm(p.get("name")) != "project"],
+        "company": [str(e.get("company")) for e in parsed_resume.get("experience") or []
+                    if e.get("company") and _norm(e.get("company")) != "company"],
+        "skill": skills,
+    }
+
+
+def _sparse(vector: np.ndarray) -> Dict[str, list]:
+    buckets = np.flatnonzero(vector)
+    return {"buckets": buckets.tolist(), "weights": [round(float(w), 6) for w in vector[buckets]]}
+
+
+def _dense(sparse: Dict[str, list]) -> np.ndarray:
+    vector = np.zeros(DIMENSIONS, dtype=np.float32)
+    vector[np.asarray(sparse["buckets"], dtype=np.int64)] = sparse["weights"]
+    return vector
+
+
+def personalize(questions: List[Dict[str, Any]], source_names: Dict[str, List[str]],
+                target_names: Dict[str, List[str]], difficulty: str) -> List[Dict[str, Any]]:
+    """
+    Re-point questions written for the source resume at the target resume
+
+    Project and company names are swapped positionally, skills the target
+    lacks are swapped for target skills the source did not have. A question
+    that still names something the target resume does not contain is dropped.
+
+    Args:
+        source_names, target_names: _names() of the stored and the new resume
+    """
+    target_terms = {_norm(name) for names in target_names.values() for name in names}
+    replacements: Dict[str, str] = {}
+    for kind in ("project", "company"):
+        for i, name in enumerate(source_names[kind]):
+            if _norm(name) not in target_terms and i < len(target_names[kind]):
+                replacements[name] = target_names[kind][i]
+    spare_skills = iter([s for s in target_names["skill"]
+                         if _norm(s) not in {_norm(x) for x in source_names["skill"]}])
+    for name in source_names["skill"]:
+        if _norm(name) not in target_terms:
+            substitute = next(spare_skills, None)
+            if substitute:
+                replacements[name] = substitute
+
+    missing = [name for names in source_names.values() for name in names
+               if _norm(name) not in target_terms and name not in replacements]
+    personalized = []
+    for question in questions:
+        text = question["question"]
+        # Longest names first so "React Native" is not half-replaced by "React"
+        for name in sorted(replacements, key=len, reverse=True):
+            text = re.sub(rf"(?<!\w){re.escape(name)}(?!\w)", replacements[name], text, flags=re.IGNORECASE)
+        if any(re.search(rf"(?<!\w){re.escape(name)}(?!\w)", text, re.IGNORECASE) for name in missing):
+            continue
+        personalized.append({**question, "question": text, "difficulty": difficulty})
+    return personalized
+
+
+def validate_questions(questions: Any) -> Optional[List[Dict[str, Any]]]:
+    """Questions in the generator's format, or None if they are not worth storing"""
+    if not isinstance(questions, list) or not questions:
+        return None
+    valid = [q for q in questions if isinstance(q, dict) and isinstance(q.get("question"), str)
+             and len(q["question"].strip()) > 15]
+    return valid if len(valid) == len(questions) else None
+
+
+def _entry(key: str, parsed_resume: Dict[str, Any], questions: List[Dict[str, Any]],
+           created_at: int) -> Dict[str, Any]:
+    """What is stored for a resume: its hashed vector and the names personalization needs, not the resume"""
+    return {
+        "key": key,
+        "vector": _sparse(embed(profile_features(parsed_resume))),
+        "names": _names(parsed_resume),
+        "questions": questions,
+        "created_at": created_at,
+    }
+
+
+class QuestionIndex:
+    """NumPy cosine index of resume profiles and their generated questions"""
+
+    def __init__(self, path: Optional[str] = None, threshold: float = 0.8, capacity: int = 256,
+                 max_entries: int = 5000, ttl: int = 30 * 86400):
+        """
+        Args:
+            path: JSONL file entries are appended to and reloaded from; None keeps it in memory
+            threshold: Minimum cosine similarity for reuse
+            capacity: Initial matrix rows (doubles as needed)
+            max_entries: Entries kept; past it the oldest tenth is dropped and the file rewritten
+            ttl: Seconds an entry may be reused for
+        """
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._capacity = capacity
+        self._reset()
+
+        if path and os.path.exists(path):
+            entries, rewrite = [], False
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        if "resume" in entry:
+                            # Older entries kept the parsed resume; reduce them and rewrite the file
+                            entry = _entry(entry["key"], entry["resume"], entry["questions"], entry["created_at"])
+                            rewrite = True
+                        entries.append(entry)
+                    except (ValueError, KeyError, TypeError):
+                        continue  # Torn last line after a crash
+            for entry in self._live(entries, self.max_entries):
+                self._append(entry)
+            if rewrite or len(self._entries) < len(entries):
+                self._rewrite()
+
+    def _reset(self):
+        self._vectors = np.zeros((self._capacity, DIMENSIONS), dtype=np.float32)
+        self._rows_by_key: Dict[str, List[int]] = {}
+        self._entries: List[Dict[str, Any]] = []
+
+    def _live(self, entries: List[Dict[str, Any]], keep: int) -> List[Dict[str, Any]]:
+        """The newest `keep` unexpired entries, in insertion order"""
+        cutoff = time.time() - self.ttl
+        live = [e for e in entries if e["created_at"] >= cutoff]
+        return live[-keep:] if keep > 0 else []
+
+    def _append(self, entry: Dict[str, Any]):
+        row = len(self._entries)
+        if row == len(self._vectors):
+            self._vectors = np.concatenate([self._vectors, np.zeros_like(self._vectors)])
+        self._vectors[row] = _dense(entry["vector"])
+        self._rows_by_key.setdefault(entry["key"], []).append(row)
+        self._entries.append(entry)
+
+    def _rewrite(self):
+        """Replace the file with the entries in memory"""
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        temp = f"{self.path}.tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            for entry in self._entries:
+                f.write(json.dumps(entry, default=str) + "\n")
+        os.replace(temp, self.path)
+
+    def find(self, parsed_resume: Dict[str, Any], job_role: str, difficulty: str, interview_type: str,
+             num_questions: int) -> Optional[Dict[str, Any]]:
+        """
+        Reusable questions for a resume, or None
+
+        Returns:
+            {"questions", "similarity", "source_created_at"} with questions re-personalized
+        """
+        key = _role_key(job_role, difficulty, interview_type)
+        vector = embed(profile_features(parsed_resume))
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            rows = np.array(self._rows_by_key.get(key, []), dtype=np.int64)
+            if not len(rows) or not vector.any():
+                CACHE_LOOKUPS.inc(cache="question_reuse", result="miss")
+                return None
+            similarities = self._vectors[rows] @ vector
+            order = np.argsort(similarities)[::-1]
+            candidates = [(float(similarities[i]), self._entries[rows[i]]) for i in order
+                          if similarities[i] >= self.threshold and self._entries[rows[i]]["created_at"] >= cutoff]
+
+        # Closest first; skip a match whose questions do not survive re-personalization
+        names = _names(parsed_resume)
+        for similarity, entry in candidates[:3]:
+            questions = personalize(entry["questions"], entry["names"], names, difficulty)
+            if len(questions) >= num_questions:
+                CACHE_LOOKUPS.inc(cache="question_reuse", result="hit")
+                return {
+                    "questions": questions[:num_questions],
+                    "similarity": round(similarity, 4),
+                    "source_created_at": entry["created_at"],
+                }
+        CACHE_LOOKUPS.inc(cache="question_reuse", result="miss")
+        return None
+
+    def add(self, parsed_resume: Dict[str, Any], job_role: str, difficulty: str, interview_type: str,
+            questions: List[Dict[str, Any]]) -> bool:
+        """Store generated questions for a resume; returns False if they were not valid"""
+        questions = validate_questions(questions)
+        if questions is None or not profile_features(parsed_resume):
+            return False
+        entry = _entry(_role_key(job_role, difficulty, interview_type), parsed_resume, questions, int(time.time()))
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # Drop the expired and the oldest tenth in one rewrite rather than one per add
+                kept = self._live(self._entries, self.max_entries - max(self.max_entries // 10, 1))
+                self._reset()
+                for kept_entry in kept:
+                    self._append(kept_entry)
+                self._rewrite()
+            if self.path:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, default=str) + "\n")
+            self._append(entry)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_question_index = None
+
+def get_question_index() -> QuestionIndex:
+    """Get or create the global question index"""
+    global _question_index
+    if _question_index is None:
+        _question_index = QuestionIndex(
+            os.getenv("QUESTION_INDEX_PATH", "./data/questions/index.jsonl"),
+            threshold=float(os.getenv("QUESTION_REUSE_THRESHOLD", "0.8")),
+            max_entries=int(os.getenv("QUESTION_INDEX_MAX_ENTRIES", "5000")),
+            ttl=int(os.getenv("QUESTION_INDEX_TTL", str(30 * 86400)))
+        )
+    return _question_index
@@ -0,0 +1,24 @@
+"""
+Fast JSON Responses
+JSONResponse rendered with orjson when it is installed (several times
+faster than the stdlib encoder on large session payloads), falling back to
+the default encoder otherwise.
+"""
+
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse serialized with orjson"""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
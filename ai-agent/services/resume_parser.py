@@ -1,44 +1,15 @@
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
+from services.llm_gateway import invoke_prompt
+from services.llm_provider import get_groq_llm, DEFAULT_GROQ_MODEL
+from services.metrics import record_json_fallback
+from services.tracing import traced
 import os
 import json
 import re
 
-def parse_resume_structure(resume_text: str) -> dict:
-    """
-    Parse resume text into structured sections using Groq LLM.
-    
-    Extracts:
-    - Skills (programming languages, frameworks, tools)
-    - Projects (name, description, technologies, role)
-    - Experience (company, role, duration, responsibilities)
-    - Education (degree, institution, year)
-    - Technologies (specific tech stack)
-    
-    Args:
-        resume_text: Raw text extracted from resume PDF
-        
-    Returns:
-        Dictionary with structured resume data
-    """
-    if not resume_text or len(resume_text.strip()) < 50:
-        return {
-            "raw_text": resume_text,
-            "skills": [],
-            "projects": [],
-            "experience": [],
-            "education": [],
-            "technologies": []
-        }
-    
-    llm = ChatGroq(
-        model="llama3-70b-8192",
-        temperature=0.3,  # Lower temperature for more consistent parsing
-        api_key=os.getenv("GROQ_API_KEY")
-    )
-    
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", """You are an expert resume parser. Extract structured information from the resume text.
+# Compiled once at import; static system prefix, resume text last
+RESUME_PARSE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are an expert resume parser. Extract structured information from the resume text.
 
 CRITICAL: Return ONLY valid JSON, no markdown, no explanations, no code blocks.
 
@@ -62,42 +33,78 @@ Extract the following sections:
 5. **technologies**: Array of all technologies/tools mentioned (deduplicated from skills and projects)
 
 Return ONLY this JSON structure:
-{
+{{
   "skills": ["skill1", "skill2"],
   "projects": [
-    {
+    {{
       "name": "Project Name",
       "description": "Brief description",
       "technologies": ["tech1", "tech2"],
       "role": "Developer/Lead/etc"
-    }
+    }}
   ],
   "experience": [
-    {
+    {{
       "company": "Company Name",
       "role": "Job Title",
       "duration": "2022-2024",
       "responsibilities": ["resp1", "resp2"]
-    }
+    }}
   ],
   "education": [
-    {
+    {{
       "degree": "Degree Name",
       "institution": "University Name",
       "year": "2024"
-    }
+    }}
   ],
   "technologies": ["tech1", "tech2"]
-}
+}}
 
 If a section is not found in the resume, use an empty array []."""),
-        ("user", f"Resume Text:\n\n{resume_text}")
-    ])
+    ("user", "Resume Text:\n\n{resume_text}")
+])
+
+@traced("resume.parse_structure")
+def parse_resume_structure(resume_text: str) -> dict:
+    """
+    Parse resume text into structured sections using Groq LLM.
     
-    try:
-        chain = prompt | llm
-        response = chain.invoke({})
+    Extracts:
+    - Skills (programming languages, frameworks, tools)
+    - Projects (name, description, technologies, role)
+    - Experience (company, role, duration, responsibilities)
+    - Education (degree, institution, year)
+    - Technologies (specific tech stack)
+    
+    Args:
+        resume_text: Raw text extracted from resume PDF
         
+    Returns:
+        Dictionary with structured resume data (regex fallback if the reply is not valid JSON)
+    
+    Raises:
+        Provider errors and LLMOverBudget propagate; only an unparseable reply falls back
+    """
+    if not resume_text or len(resume_text.strip()) < 50:
+        return {
+            "raw_text": resume_text,
+            "skills": [],
+            "projects": [],
+            "experience": [],
+            "education": [],
+            "technologies": []
+        }
+    
+    response = invoke_prompt(
+        RESUME_PARSE_PROMPT,
+        {"resume_text": resume_text},
+        get_groq_llm(temperature=0.3),  # Lower temperature for more consistent parsing
+        tool="parse_resume_structure",
+        model=DEFAULT_GROQ_MODEL
+    )
+    
+    try:
         # Clean the response - remove markdown code blocks if present
         content = response.content.strip()
         
@@ -117,6 +124,8 @@ If a section is not found in the resume, use an empty array []."""),
         
         # Parse JSON
         parsed_data = json.loads(content)
+        if not isinstance(parsed_data, dict):
+            raise ValueError("Resume JSON is not an object")
         
         # Add raw text
         parsed_data["raw_text"] = resume_text
@@ -129,30 +138,51 @@ If a section is not found in the resume, use an empty array []."""),
         
         return parsed_data
         
-    except Exception as e:
+    except ValueError as e:
         print(f"Resume parsing error: {e}")
+        record_json_fallback("parse_resume_structure")
         # Fallback: Basic regex-based extraction
         return _fallback_parse(resume_text)
 
 
+# Common technology keywords
+TECH_KEYWORDS = [
+    "Python", "JavaScript", "Java", "C++", "C#", "Ruby", "Go", "Rust",
+    "React", "Angular", "Vue", "Node.js", "Express", "Django", "Flask",
+    "MongoDB", "PostgreSQL", "MySQL", "Redis", "Docker", "Kubernetes",
+    "AWS", "Azure", "GCP", "Git", "Jenkins", "CI/CD", "REST", "GraphQL",
+    "HTML", "CSS", "TypeScript", "Swift", "Kotlin", "PHP", "SQL"
+]
+
+# Keywords that are also everyday words only count with their usual capitalization
+_CASE_SENSITIVE_KEYWORDS = {"Go", "Rust", "Ruby", "Swift", "Express", "REST", "Git"}
+
+_TECH_PATTERNS = [
+    (tech, re.compile(rf"(?<![\w.+#]){re.escape(tech)}(?![\w+#])",
+                      0 if tech in _CASE_SENSITIVE_KEYWORDS else re.IGNORECASE))
+    for tech in TECH_KEYWORDS
+]
+
+
+def detect_skills(resume_text: str) -> list:
+    """Technology keywords found in the resume, in order of first mention (no LLM call)"""
+    found = []
+    for tech, pattern in _TECH_PATTERNS:
+        match = pattern.search(resume_text or "")
+        if match:
+            found.append((match.start(), tech))
+    return [tech for _, tech in sorted(found)]
+
+
 def _fallback_parse(resume_text: str) -> dict:
     """Fallback parser using simple regex patterns"""
     
-    # Common technology keywords
-    tech_keywords = [
-        "Python", "JavaScript", "Java", "C++", "C#", "Ruby", "Go", "Rust",
-        "React", "Angular", "Vue", "Node.js", "Express", "Django", "Flask",
-        "MongoDB", "PostgreSQL", "MySQL", "Redis", "Docker", "Kubernetes",
-        "AWS", "Azure", "GCP", "Git", "Jenkins", "CI/CD", "REST", "GraphQL",
-        "HTML", "CSS", "TypeScript", "Swift", "Kotlin", "PHP", "SQL"
-    ]
-    
     # Extract technologies mentioned
     technologies = []
     skills = []
     text_upper = resume_text.upper()
     
-    for tech in tech_keywords:
+    for tech in TECH_KEYWORDS:
         if tech.upper() in text_upper:
             technologies.append(tech)
             skills.append(tech)
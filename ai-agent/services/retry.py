@@ -0,0 +1,83 @@
+"""
+Async Retry with Backoff
+Retries only transient failures (throttling, timeouts, connection and 5xx
+errors) with exponential backoff and full jitter, awaiting between attempts
+instead of blocking a worker thread.
+"""
+
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+# Matched by class name so provider SDKs (groq, openai, google) need not be imported
+RETRYABLE_ERROR_NAMES = {
+    "RateLimitError",
+    "APITimeoutError",
+    "APIConnectionError",
+    "InternalServerError",
+    "ServiceUnavailable",
+    "ResourceExhausted",
+    "DeadlineExceeded",
+    "ReadTimeout",
+    "ConnectTimeout",
+}
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an error is transient and worth retrying"""
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status in RETRYABLE_STATUS_CODES
+
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def backoff_delay(attempt: int, base_delay: float = 0.5, max_delay: float = 8.0) -> float:
+    """Full-jitter exponential backoff for the given 0-based retry number"""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+async def retry_async(func: Callable[[], Awaitable[Any]], max_retries: int = 2,
+                      base_delay: float = 0.5, max_delay: float = 8.0) -> Tuple[Any, List[Dict[str, Any]]]:
+    """
+    Await func() until it succeeds, fails with a non-retryable error or runs out of retries
+
+    Args:
+        func: Zero-argument coroutine function to call on every attempt
+        max_retries: Retries after the first attempt
+        base_delay: Backoff base in seconds
+        max_delay: Upper bound for a single backoff in seconds
+
+    Returns:
+        (result, attempts) where attempts holds the timing of every try.
+        The last error is re-raised with an `attempts` attribute attached.
+    """
+    attempts = []
+    for attempt in range(max_retries + 1):
+        start = time.perf_counter()
+        try:
+            result = await func()
+            attempts.append({"attempt": attempt + 1, "duration": time.perf_counter() - start, "error": None})
+            return result, attempts
+        except Exception as e:
+            retryable = is_retryable(e)
+            record = {
+                "attempt": attempt + 1,
+                "duration": time.perf_counter() - start,
+                "error": f"{type(e).__name__}: {e}",
+                "retryable": retryable,
+            }
+            attempts.append(record)
+            if not retryable or attempt == max_retries:
+                e.attempts = attempts
+                raise
+            record["backoff"] = backoff_delay(attempt, base_delay, max_delay)
+            await asyncio.sleep(record["backoff"])
@@ -0,0 +1,165 @@
+"""
+Focus Time Scheduler
+Finds free blocks in a user's calendar: busy intervals and the hours outside
+the working day are merged with one sorted sweep, and the gaps between
+merged intervals that are long enough are ranked as focus-time candidates.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
+
+DEFAULT_PREFERENCES = {
+    "working_hours": {"start": "09:00", "end": "17:00"},
+    "work_days": [0, 1, 2, 3, 4],  # Monday=0
+    "min_block_hours": 2,
+    "horizon_days": 7,
+    "preferred_time": "morning",   # morning / afternoon / any
+    "max_suggestions": 3,
+    "timezone": "UTC",
+}
+
+DAY_SECONDS = 86400
+QUARTER_HOUR = 900
+
+
+def _minutes(clock: str) -> int:
+    hours, minutes = clock.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _tzinfo(name: Optional[str]):
+    if not name or name.upper() == "UTC" or ZoneInfo is None:
+        return timezone.utc
+    try:
+        return ZoneInfo(name)
+    except Exception:
+        return timezone.utc
+
+
+def merge_intervals(starts: np.ndarray, ends: np.ndarray):
+    """
+    Merge overlapping [start, end) intervals with a sorted sweep
+
+    Returns:
+        (merged_starts, merged_ends) sorted by start
+    """
+    if len(starts) == 0:
+        return starts, ends
+    order = np.argsort(starts, kind="stable")
+    starts, ends = starts[order], ends[order]
+    reach = np.maximum.accumulate(ends)
+    # A new group starts wherever an interval begins after everything before it ended
+    new_group = np.empty(len(starts), dtype=bool)
+    new_group[0] = True
+    new_group[1:] = starts[1:] > reach[:-1]
+    group_starts = np.flatnonzero(new_group)
+    group_ends = np.append(group_starts[1:], len(starts)) - 1
+    return starts[group_starts], reach[group_ends]
+
+
+def _off_hours(horizon_start: int, horizon_end: int, prefs: Dict[str, Any], tz):
+    """
+    Intervals outside working hours (and whole non-working days) across the horizon
+
+    Returns:
+        (starts, ends, local_midnights)
+    """
+    work_start = _minutes(prefs["working_hours"]["start"]) * 60
+    work_end = _minutes(prefs["working_hours"]["end"]) * 60
+    work_days = set(prefs["work_days"])
+
+    local_day = datetime.fromtimestamp(horizon_start, tz).replace(hour=0, minute=0, second=0, microsecond=0)
+    day_start = int(local_day.timestamp())
+    starts, ends, midnights = [], [], []
+    while day_start < horizon_end:
+        # Re-anchor at local midnight so DST changes do not drift the working window
+        next_day = (local_day + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        day_end = int(next_day.timestamp())
+        midnights.append(day_start)
+        if local_day.weekday() in work_days:
+            starts += [day_start, day_start + work_end]
+            ends += [day_start + work_start, day_end]
+        else:
+            starts.append(day_start)
+            ends.append(day_end)
+        local_day, day_start = next_day, day_end
+    return (np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64),
+            np.array(midnights, dtype=np.int64))
+
+
+def find_free_blocks(busy_starts: np.ndarray, busy_ends: np.ndarray, horizon_start: int,
+                     preferences: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Ranked free blocks of at least min_block_hours inside working hours
+
+    Args:
+        busy_starts: Busy interval starts (epoch seconds)
+        busy_ends: Busy interval ends (epoch seconds)
+        horizon_start: Earliest time a block may start (epoch seconds)
+        preferences: Overrides for DEFAULT_PREFERENCES
+    """
+    prefs = {**DEFAULT_PREFERENCES, **(preferences or {})}
+    tz = _tzinfo(prefs.get("timezone"))
+    horizon_end = horizon_start + int(prefs["horizon_days"]) * DAY_SECONDS
+    min_seconds = int(float(prefs["min_block_hours"]) * 3600)
+
+    off_starts, off_ends, midnights = _off_hours(horizon_start, horizon_end, prefs, tz)
+    starts = np.concatenate([np.asarray(busy_starts, dtype=np.int64), off_starts, [horizon_start - 1, horizon_end]])
+    ends = np.concatenate([np.asarray(busy_ends, dtype=np.int64), off_ends, [horizon_start, horizon_end + 1]])
+    merged_starts, merged_ends = merge_intervals(starts, ends)
+
+    # Gaps between consecutive merged busy intervals are free
+    gap_starts = np.maximum(merged_ends[:-1], horizon_start)
+    gap_ends = np.minimum(merged_starts[1:], horizon_end)
+    lengths = gap_ends - gap_starts
+    keep = lengths >= min_seconds
+    gap_starts, gap_ends, lengths = gap_starts[keep], gap_ends[keep], lengths[keep]
+    if len(gap_starts) == 0:
+        return []
+
+    # Place each block on a quarter hour, in the preferred part of the day when the gap allows
+    block_starts = -(-gap_starts // QUARTER_HOUR) * QUARTER_HOUR
+    block_starts = np.where(block_starts + min_seconds > gap_ends, gap_starts, block_starts)
+    noon = midnights[np.searchsorted(midnights, block_starts, side="right") - 1] + 12 * 3600
+    preferred = prefs.get("preferred_time", "any")
+    if preferred == "afternoon":
+        shift = (block_starts < noon) & (noon + min_seconds <= gap_ends)
+        block_starts = np.where(shift, noon, block_starts)
+        mismatch = block_starts < noon
+    elif preferred == "morning":
+        mismatch = block_starts >= noon
+    else:
+        mismatch = np.zeros(len(block_starts), dtype=bool)
+
+    # Rank: preferred part of the day first, then sooner, then longer
+    order = np.lexsort((-lengths, block_starts, mismatch))[: int(prefs["max_suggestions"])]
+
+    blocks = []
+    for i in order:
+        start = datetime.fromtimestamp(int(block_starts[i]), tz)
+        end = start + timedelta(seconds=min_seconds)
+        blocks.append({
+            "duration": round(min_seconds / 3600, 2),
+            "time": f"{start.strftime('%A')} {'morning' if start.hour < 12 else 'afternoon'}",
+            "start": start.strftime("%H:%M"),
+            "end": end.strftime("%H:%M"),
+            "start_at": start.isoformat(),
+            "end_at": end.isoformat(),
+            "available_hours": round(float(lengths[i]) / 3600, 2),
+        })
+    return blocks
+
+
+def describe_block(block: Dict[str, Any]) -> str:
+    """Template reason used when the LLM is not asked for one"""
+    if block["available_hours"] > block["duration"]:
+        return (f"Part of a {block['available_hours']}h stretch with no meetings on {block['time']}, "
+                f"leaving room for a {block['duration']}h deep-work block")
+    return f"Free {block['duration']}h window on {block['time']} with no meetings"
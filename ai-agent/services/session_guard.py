@@ -0,0 +1,101 @@
+"""
+Interview Session Guard
+Serializes turns within an interview session and replays idempotent
+requests. Each session gets an asyncio lock so overlapping calls (a proxy
+retry, a double submit) run one after another instead of racing on the
+agent's question index; a turn that carries an Idempotency-Key stores its
+result so a replay returns it without touching the agent or any LLM.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from services.cache import TTLCache
+from services.tracing import set_span_attributes
+
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", "86400"))
+
+_idempotency_cache = TTLCache(
+    "idempotency",
+    maxsize=int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000")),
+    ttl=IDEMPOTENCY_TTL,
+)
+
+# session_id -> [lock, waiters]; entries are dropped when nobody holds or waits
+_session_locks: Dict[str, list] = {}
+
+
+@asynccontextmanager
+async def session_lock(session_id: str):
+    """Hold the session's lock for the duration of one turn"""
+    entry = _session_locks.setdefault(session_id, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0 and _session_locks.get(session_id) is entry:
+            del _session_locks[session_id]
+
+
+def _fingerprint(payload: Any) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def replayed_turn(session_id: str, operation: str, idempotency_key: Optional[str], payload: Any) -> Optional[Any]:
+    """
+    Stored result of an earlier turn with this key, or None (call with the session lock held)
+
+    Raises:
+        HTTPException: 422 when the key was used for a different request
+    """
+    if not idempotency_key:
+        return None
+    stored = _idempotency_cache.get((session_id, operation, idempotency_key))
+    if stored is None:
+        return None
+    if stored[0] != _fingerprint(payload):
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+    set_span_attributes(**{"interview.idempotent_replay": True})
+    return stored[1]
+
+
+def store_turn(session_id: str, operation: str, idempotency_key: Optional[str], payload: Any, result: Any):
+    """Remember a successful turn's result for replays"""
+    if idempotency_key:
+        _idempotency_cache.set((session_id, operation, idempotency_key), (_fingerprint(payload), result))
+
+
+async def run_turn(session_id: str, operation: str, idempotency_key: Optional[str],
+                   payload: Any, func: Callable[[], Any]) -> Tuple[Any, bool]:
+    """
+    Run a session turn under the session lock, replaying stored results
+
+    Args:
+        session_id: Interview session
+        operation: Endpoint name (start, respond, complete); keys are scoped to it
+        idempotency_key: Client-supplied key; None disables replay for this call
+        payload: Request body, used to reject a key reused for a different request
+        func: Blocking turn handler, run in the threadpool
+
+    Returns:
+        (result, replayed)
+    """
+    async with session_lock(session_id):
+        stored = replayed_turn(session_id, operation, idempotency_key, payload)
+        if stored is not None:
+            return stored, True
+
+        result = await run_in_threadpool(func)
+
+        # Only successful turns are stored, so a failed turn can be retried with the same key
+        store_turn(session_id, operation, idempotency_key, payload, result)
+        return result, False
@@ -0,0 +1,95 @@
+"""
+Request Coalescing (singleflight)
+Concurrent callers asking for the same key share one in-flight call: the
+first caller runs it, the rest wait for its result or exception. Used by the
+LLM gateway so identical prompts sent at the same moment cost one request.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent blocking calls across threads"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run func once for all concurrent callers with the same key
+
+        Returns:
+            (result, shared) where shared is True for callers that waited on another's call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            shared = call is not None
+            if not shared:
+                call = self._calls[key] = _Call()
+        if shared:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # Forget the key before waking waiters so later callers start a fresh call
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+class AsyncSingleFlight:
+    """Coalesces concurrent coroutines on one event loop"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, list] = {}  # key -> [task, waiters]
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Await func once for all concurrent callers with the same key
+
+        The shared call runs as its own task; it is cancelled only when every
+        waiter has been cancelled (e.g. all clients disconnected).
+
+        Returns:
+            (result, shared) where shared is True for callers that joined an existing call
+        """
+        key = (id(asyncio.get_running_loop()), key)
+        entry = self._calls.get(key)
+        shared = entry is not None
+        if not shared:
+            task = asyncio.ensure_future(func())
+            entry = self._calls[key] = [task, 0]
+            task.add_done_callback(lambda _, key=key, entry=entry: self._forget(key, entry))
+        entry[1] += 1
+        try:
+            return await asyncio.shield(entry[0]), shared
+        except asyncio.CancelledError:
+            if entry[1] == 1 and not entry[0].done():
+                entry[0].cancel()
+            raise
+        finally:
+            entry[1] -= 1
+
+    def _forget(self, key: Hashable, entry: list):
+        if self._calls.get(key) is entry:
+            del self._calls[key]
@@ -0,0 +1,247 @@
+"""
+Lightweight Tracing
+OpenTelemetry-compatible spans: W3C trace-context ids, `traceparent` header
+propagation and parent/child nesting via contextvars. Finished spans go to an
+in-memory exporter (queryable per trace id) and/or a console exporter, so
+tracing works offline without a collector.
+
+Configure with TRACE_EXPORTER=memory|console|memory,console|none (default: memory).
+"""
+
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_TRACEPARENT_RE = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """A timed operation within a trace"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_time", "end_time",
+                 "attributes", "events", "status", "_start_perf", "_end_perf")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str] = None,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start_time = time.time()
+        self.end_time = None
+        self.attributes = dict(attributes or {})
+        self.events = []
+        self.status = "ok"
+        self._start_perf = time.perf_counter()
+        self._end_perf = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        self.attributes.update(attributes)
+
+    def add_event(self, name: str, **attributes):
+        self.events.append({"name": name, "timestamp": time.time(), "attributes": attributes})
+
+    def record_exception(self, error: BaseException):
+        self.status = "error"
+        self.add_event("exception", type=type(error).__name__, message=str(error))
+
+    def end(self):
+        if self._end_perf is None:
+            self._end_perf = time.perf_counter()
+            self.end_time = time.time()
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self._end_perf is None:
+            return None
+        return (self._end_perf - self._start_perf) * 1000
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration_ms": round(self.duration_ms, 3) if self.duration_ms is not None else None,
+            "status": self.status,
+            "attributes": self.attributes,
+            "events": self.events,
+        }
+
+
+class InMemorySpanExporter:
+    """Keeps finished spans for the most recent traces"""
+
+    def __init__(self, max_traces: int = 500):
+        self.max_traces = max_traces
+        self._traces = OrderedDict()
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        with self._lock:
+            spans = self._traces.get(span.trace_id)
+            if spans is None:
+                spans = self._traces[span.trace_id] = []
+                if len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+            spans.append(span)
+
+    def get_trace(self, trace_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            spans = list(self._traces.get(trace_id, []))
+        return sorted((span.to_dict() for span in spans), key=lambda s: s["start_time"])
+
+    def recent_trace_ids(self, limit: int = 20) -> List[str]:
+        with self._lock:
+            return list(self._traces.keys())[-limit:][::-1]
+
+    def clear(self):
+        with self._lock:
+            self._traces.clear()
+
+
+class ConsoleSpanExporter:
+    """Logs each finished span as one JSON line"""
+
+    def export(self, span: Span):
+        logger.info("span %s", json.dumps(span.to_dict(), default=str))
+
+
+class Tracer:
+    """Creates spans and hands finished ones to the configured exporters"""
+
+    def __init__(self, exporters=None):
+        self.exporters = list(exporters or [])
+
+    @contextmanager
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None,
+                   traceparent: Optional[str] = None):
+        """
+        Start a span as a child of the current span
+
+        Args:
+            name: Span name
+            attributes: Initial span attributes
+            traceparent: Remote W3C parent; used only when there is no local parent
+        """
+        parent = _current_span.get()
+        if parent is not None:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        else:
+            remote = parse_traceparent(traceparent)
+            trace_id, parent_id = remote if remote else (secrets.token_hex(16), None)
+
+        span = Span(name, trace_id, parent_id, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+            for exporter in self.exporters:
+                try:
+                    exporter.export(span)
+                except Exception as e:
+                    logger.warning(f"Span export failed: {e}")
+
+
+def parse_traceparent(header: Optional[str]):
+    """Parse a W3C traceparent header into (trace_id, parent_span_id)"""
+    if not header:
+        return None
+    match = _TRACEPARENT_RE.match(header.strip().lower())
+    if not match:
+        return None
+    version, trace_id, span_id, _ = match.groups()
+    if version == "ff" or trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return trace_id, span_id
+
+
+def current_span() -> Optional[Span]:
+    """Return the active span, if any"""
+    return _current_span.get()
+
+
+def set_span_attributes(**attributes):
+    """Attach attributes to the active span (no-op outside a span)"""
+    span = _current_span.get()
+    if span is not None:
+        span.set_attributes(attributes)
+
+
+def add_span_event(name: str, **attributes):
+    """Record an event on the active span (no-op outside a span)"""
+    span = _current_span.get()
+    if span is not None:
+        span.add_event(name, **attributes)
+
+
+def _build_exporters():
+    exporters = []
+    memory = None
+    for name in os.getenv("TRACE_EXPORTER", "memory").split(","):
+        name = name.strip().lower()
+        if name == "memory":
+            memory = InMemorySpanExporter()
+            exporters.append(memory)
+        elif name == "console":
+            exporters.append(ConsoleSpanExporter())
+    return exporters, memory
+
+
+_exporters, memory_exporter = _build_exporters()
+tracer = Tracer(_exporters)
+
+
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None, traceparent: Optional[str] = None):
+    """Start a span on the global tracer"""
+    return tracer.start_span(name, attributes, traceparent)
+
+
+def traced(name: Optional[str] = None, **attributes):
+    """Decorator that wraps a sync or async function in a span"""
+
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with start_span(span_name, attributes):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with start_span(span_name, attributes):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
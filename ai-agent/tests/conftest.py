@@ -0,0 +1,26 @@
+"""
+Shared fixtures. The service's file-backed stores are pointed at a temporary
+directory before main is imported, and no test calls a real LLM provider.
+"""
+
+import os
+import sys
+import tempfile
+
+_DATA_DIR = tempfile.mkdtemp(prefix="ai-agent-tests-")
+os.environ.setdefault("COHORT_SCORES_PATH", os.path.join(_DATA_DIR, "cohort", "scores.bin"))
+os.environ.setdefault("INTERVIEW_ARCHIVE_DIR", os.path.join(_DATA_DIR, "interviews"))
+os.environ.setdefault("QUESTION_INDEX_PATH", os.path.join(_DATA_DIR, "questions", "index.jsonl"))
+os.environ.setdefault("ACTIVITY_STORE_DIR", os.path.join(_DATA_DIR, "activity"))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client():
+    import main
+    with TestClient(main.app) as test_client:
+        yield test_client
@@ -0,0 +1,72 @@
+"""/command holds a gated plan under a plan_id and confirming runs exactly that plan"""
+
+import pytest
+from langchain_core.tools import tool
+
+import agents.executor as executor
+import agents.planner as planner
+from schemas.base import ActionStep, EnhancedPlan
+
+sent = []
+
+
+@tool
+def send_email(to: str, body: str) -> str:
+    """Send an email"""
+    sent.append((to, body))
+    return f"sent to {to}"
+
+
+class FakePlanner:
+    def __init__(self):
+        self.calls = 0
+
+    def create_plan(self, command, context=None):
+        self.calls += 1
+        # The LLM claims low risk; the registry knows send_email is high risk
+        return EnhancedPlan(original_command=command, steps=[ActionStep(
+            tool_name="send_email", tool_input={"to": "team@example.com", "body": f"plan {self.calls}"},
+            reasoning="asked to send", risk_level="low")])
+
+
+@pytest.fixture
+def fake_planner(monkeypatch):
+    sent.clear()
+    fake = FakePlanner()
+    monkeypatch.setattr(executor, "get_groq_llm", lambda **kwargs: object())
+    monkeypatch.setattr(executor, "get_automation_tools", lambda: [send_email])
+    monkeypatch.setattr(executor, "_agent_system", None)
+    monkeypatch.setattr(planner, "get_planner_agent", lambda: fake)
+    return fake
+
+
+def test_hold_confirm_take_round_trip(client, fake_planner):
+    held = client.post("/command", json={"command": "email the team", "user_id": "u1"}).json()
+    assert held["status"] == "requires_confirmation"
+    assert held["plan"]["overall_risk"] == "high"
+    assert held["plan_id"] and not sent
+
+    confirmed = client.post("/command", json={"command": "email the team", "user_id": "u1",
+                                              "confirmed": True, "plan_id": held["plan_id"]})
+    assert confirmed.status_code == 200
+    assert confirmed.json()["status"] != "requires_confirmation"
+    # The stored plan ran; the planner was not asked for a new one
+    assert sent == [("team@example.com", "plan 1")]
+    assert fake_planner.calls == 1
+
+    # A plan_id is single use
+    again = client.post("/command", json={"command": "email the team", "user_id": "u1",
+                                          "confirmed": True, "plan_id": held["plan_id"]})
+    assert again.status_code == 404
+
+
+def test_confirm_rejects_missing_or_foreign_plan(client, fake_planner):
+    held = client.post("/command", json={"command": "email the team", "user_id": "u1"}).json()
+
+    missing = client.post("/command", json={"command": "email the team", "user_id": "u1", "confirmed": True})
+    assert missing.status_code == 400
+
+    foreign = client.post("/command", json={"command": "email the team", "user_id": "u2",
+                                            "confirmed": True, "plan_id": held["plan_id"]})
+    assert foreign.status_code == 404
+    assert not sent
@@ -0,0 +1,38 @@
+"""Priority overrides and token-bucket settlement in the LLM scheduler"""
+
+import threading
+
+import pytest
+
+from services.llm_scheduler import LLMScheduler, ProviderBudget, llm_priority
+
+
+def test_llm_priority_overrides_tool_priority_inside_the_block():
+    assert LLMScheduler.priority_for("generate_interview_questions") == "interactive"
+    with llm_priority("background"):
+        assert LLMScheduler.priority_for("generate_interview_questions") == "background"
+    assert LLMScheduler.priority_for("generate_interview_questions") == "interactive"
+
+
+def test_llm_priority_does_not_leak_into_other_threads():
+    seen = []
+    with llm_priority("background"):
+        thread = threading.Thread(target=lambda: seen.append(LLMScheduler.priority_for("create_plan")))
+        thread.start()
+        thread.join()
+    assert seen == ["interactive"]
+
+
+def test_llm_priority_rejects_unknown_class():
+    with pytest.raises(ValueError):
+        with llm_priority("urgent"):
+            pass
+
+
+def test_settle_refund_is_clamped_at_capacity():
+    budget = ProviderBudget("groq", rpm=0, tpm=1000)
+    budget.acquire("interactive", 100)
+    budget.settle(estimated=100, actual=10)
+    assert budget.tokens.level <= budget.tokens.capacity
+    budget.settle(estimated=5000, actual=1)
+    assert budget.tokens.level == budget.tokens.capacity
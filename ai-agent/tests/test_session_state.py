@@ -0,0 +1,28 @@
+"""GET /interview/session/{id} never creates a session and answers 304 for an unchanged view"""
+
+import agents.interview_agent as interview_agent
+
+
+def test_unknown_session_is_404_and_not_created(client):
+    response = client.get("/interview/session/no-such-session")
+    assert response.status_code == 404
+    assert "no-such-session" not in interview_agent._interview_sessions
+
+
+def test_known_session_etag_round_trip(client, monkeypatch):
+    monkeypatch.setitem(interview_agent._interview_sessions, "s1", interview_agent.InterviewAgent())
+
+    first = client.get("/interview/session/s1")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert client.get("/interview/session/s1", headers={"If-None-Match": etag}).status_code == 304
+    # A different page of the same state is a different representation
+    assert client.get("/interview/session/s1?limit=5", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_socket_state_of_unknown_session_is_an_error(client):
+    with client.websocket_connect("/ws/interview/no-such-session") as socket:
+        socket.send_json({"type": "state", "id": 1})
+        assert socket.receive_json() == {"type": "error", "status": 404, "id": 1,
+                                         "detail": "Interview session not found; start it again"}
+    assert "no-such-session" not in interview_agent._interview_sessions
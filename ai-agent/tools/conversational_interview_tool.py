@@ -1,11 +1,147 @@
-from langchain.tools import tool
-from langchain_groq import ChatGroq
+from langchain_core.tools import tool
 from langchain_core.prompts import ChatPromptTemplate
+from services.llm_gateway import invoke_prompt
+from services.llm_provider import get_groq_llm, get_ollama_llm, DEFAULT_GROQ_MODEL
+from services.evaluation_cascade import run_cascade, CASCADE_ENABLED, CASCADE_SMALL_MODEL
+from services.tracing import traced
 from typing import Dict, List
 import os
 import json
 
+# Compiled once at import with static system prefixes; see tools/interview_tool.py
+
+FOLLOWUP_QUESTION_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are an expert interviewer. The interview type, current difficulty and the candidate's resume are given in the request.
+
+Generate a follow-up question that:
+1. Digs deeper into what the candidate just said
+2. References their resume (specific projects, skills, technologies, experiences)
+3. Asks for concrete examples from their listed experience
+4. Probes technical details if they mentioned a technology from their resume
+5. Challenges them to elaborate on claims made in their resume
+
+Question Style Examples:
+- "You mentioned [TECHNOLOGY] in your answer. I see it's also in your resume. How did you specifically use it in [PROJECT]?"
+- "That's interesting. In your resume, you listed [SKILL]. Can you give me a specific example of when you used it?"
+- "You worked on [PROJECT] according to your resume. How does what you just described relate to that project?"
+
+CRITICAL: The follow-up must feel natural and reference something from their resume or previous answer.
+
+Return ONLY a JSON object, using the given interview type as category and the given difficulty:
+{{
+    "question": "Your follow-up question here that references resume items",
+    "category": "hr/technical/behavioral/situational/general",
+    "difficulty": "easy/medium/hard",
+    "reasoning": "Why this follow-up makes sense based on their answer and resume"
+}}"""),
+    ("user", """Interview Type: {interview_type}
+Current Difficulty: {current_difficulty}
+
+Resume Context:
+{resume_context}
+
+Conversation History:
+{conversation_history}
+
+Last Response: {last_response}""")
+])
+
+REALTIME_EVALUATION_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are an expert interviewer evaluating an interview response. The interview type, job role and the candidate's resume are given in the request.
+
+Evaluate the response on THREE key metrics:
+
+1. **Confidence** (0-100): How certain and decisive does the candidate sound?
+   - High (80-100): Definitive statements, no hedging, clear assertions
+   - Medium (50-79): Some uncertainty, occasional hedging
+   - Low (0-49): Very uncertain, excessive "I think", "maybe", "probably"
+
+2. **Clarity** (0-100): How well-structured and easy to follow is the communication?
+   - High (80-100): Logical flow, concise, well-organized, easy to understand
+   - Medium (50-79): Somewhat clear but could be more concise
+   - Low (0-49): Rambling, unclear, poorly structured
+
+3. **Relevance** (0-100): How well does the answer address the question and align with their resume?
+   - High (80-100): Directly answers question, provides resume-backed examples, demonstrates claimed skills
+   - Medium (50-79): Partially relevant, some alignment with resume
+   - Low (0-49): Off-topic, doesn't align with resume claims, vague
+
+CRITICAL: If the question asks about something from their resume, check if their answer demonstrates actual knowledge of that skill/project/technology.
+
+Return ONLY a JSON object:
+{{
+    "confidence": 0-100,
+    "clarity": 0-100,
+    "relevance": 0-100,
+    "overall_score": 0-100,
+    "feedback": "Brief constructive feedback (1-2 sentences)",
+    "strength": "What they did well",
+    "improvement": "One specific thing to improve",
+    "resume_alignment": "How well their answer aligns with resume claims (if applicable)"
+}}"""),
+    ("user", """Interview Type: {interview_type}
+Job Role: {job_role}
+
+Resume Context (for alignment check):
+{resume_context}
+
+Question: {question}
+
+Candidate Response: {response}""")
+])
+
+DIFFICULTY_ADJUSTMENT_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are an adaptive interview system analyzer.
+
+Analyze the conversation history and evaluation scores to determine if difficulty should be adjusted.
+The current difficulty is given in the request.
+
+Rules:
+- If average scores are consistently above 80: Increase difficulty
+- If average scores are consistently below 50: Decrease difficulty
+- If scores are between 50-80: Maintain current difficulty
+- Consider the trend (improving vs declining)
+
+Difficulty levels: easy, medium, hard
+
+Return ONLY a JSON object:
+{{
+    "recommended_difficulty": "easy/medium/hard",
+    "should_change": true/false,
+    "reasoning": "Why this adjustment makes sense",
+    "average_performance": 0-100
+}}"""),
+    ("user", """Current difficulty: {current_difficulty}
+
+Conversation History with Scores:
+{conversation_history}""")
+])
+
+CONVERSATION_SUMMARY_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are an interview analyst summarizing an interview. The interview type is given in the request.
+
+Analyze the conversation and provide:
+1. Key topics discussed
+2. Candidate's main strengths shown
+3. Areas that need more exploration
+4. Overall interview flow quality
+
+Return ONLY a JSON object:
+{{
+    "key_topics": ["topic1", "topic2", "topic3"],
+    "demonstrated_strengths": ["strength1", "strength2"],
+    "areas_to_explore": ["area1", "area2"],
+    "flow_quality": "excellent/good/fair/poor",
+    "summary": "2-3 sentence summary of the interview"
+}}"""),
+    ("user", """Interview Type: {interview_type}
+
+Interview Conversation:
+{conversation_history}""")
+])
+
 @tool
+@traced("tool.generate_followup_question")
 def generate_followup_question(
     conversation_history: str,
     last_response: str,
@@ -24,49 +160,19 @@ def generate_followup_question(
         current_difficulty: Current difficulty level
         resume_context: Structured resume information
     """
-    llm = ChatGroq(
-        model="llama3-70b-8192",
-        temperature=0.8,
-        api_key=os.getenv("GROQ_API_KEY")
-    )
-    
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", f"""You are an expert interviewer conducting a {interview_type} interview.
-        
-        Generate a follow-up question that:
-        1. Digs deeper into what the candidate just said
-        2. References their resume (specific projects, skills, technologies, experiences)
-        3. Asks for concrete examples from their listed experience
-        4. Probes technical details if they mentioned a technology from their resume
-        5. Challenges them to elaborate on claims made in their resume
-        
-        Resume Context:
-        {resume_context if resume_context else "No structured context available"}
-        
-        Question Style Examples:
-        - "You mentioned [TECHNOLOGY] in your answer. I see it's also in your resume. How did you specifically use it in [PROJECT]?"
-        - "That's interesting. In your resume, you listed [SKILL]. Can you give me a specific example of when you used it?"
-        - "You worked on [PROJECT] according to your resume. How does what you just described relate to that project?"
-        
-        CRITICAL: The follow-up must feel natural and reference something from their resume or previous answer.
-        
-        Return ONLY a JSON object:
-        {{
-            "question": "Your follow-up question here that references resume items",
-            "category": "{interview_type}",
-            "difficulty": "{current_difficulty}",
-            "reasoning": "Why this follow-up makes sense based on their answer and resume"
-        }}"""),
-        ("user", f"Conversation History:\n{conversation_history}\n\nLast Response: {last_response}")
-    ])
-    
-    chain = prompt | llm
-    response = chain.invoke({})
+    response = invoke_prompt(FOLLOWUP_QUESTION_PROMPT, {
+        "interview_type": interview_type,
+        "current_difficulty": current_difficulty,
+        "resume_context": resume_context if resume_context else "No structured context available",
+        "conversation_history": conversation_history,
+        "last_response": last_response
+    }, get_groq_llm(temperature=0.8), tool="generate_followup_question", model=DEFAULT_GROQ_MODEL)
     
     return response.content
 
 
 @tool
+@traced("tool.evaluate_response_realtime")
 def evaluate_response_realtime(
     question: str,
     response: str,
@@ -85,58 +191,30 @@ def evaluate_response_realtime(
         job_role: Target job role
         resume_context: Structured resume information
     """
-    llm = ChatGroq(
-        model="llama3-70b-8192",
-        temperature=0.3,
-        api_key=os.getenv("GROQ_API_KEY")
-    )
-    
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", f"""You are an expert interviewer evaluating a {interview_type} interview response for a {job_role} position.
-
-Evaluate the response on THREE key metrics:
-
-1. **Confidence** (0-100): How certain and decisive does the candidate sound?
-   - High (80-100): Definitive statements, no hedging, clear assertions
-   - Medium (50-79): Some uncertainty, occasional hedging
-   - Low (0-49): Very uncertain, excessive "I think", "maybe", "probably"
-
-2. **Clarity** (0-100): How well-structured and easy to follow is the communication?
-   - High (80-100): Logical flow, concise, well-organized, easy to understand
-   - Medium (50-79): Somewhat clear but could be more concise
-   - Low (0-49): Rambling, unclear, poorly structured
-
-3. **Relevance** (0-100): How well does the answer address the question and align with their resume?
-   - High (80-100): Directly answers question, provides resume-backed examples, demonstrates claimed skills
-   - Medium (50-79): Partially relevant, some alignment with resume
-   - Low (0-49): Off-topic, doesn't align with resume claims, vague
-
-Resume Context (for alignment check):
-{resume_context if resume_context else "No structured context available"}
-
-CRITICAL: If the question asks about something from their resume, check if their answer demonstrates actual knowledge of that skill/project/technology.
-
-Return ONLY a JSON object:
-{{
-    "confidence": 0-100,
-    "clarity": 0-100,
-    "relevance": 0-100,
-    "overall_score": 0-100,
-    "feedback": "Brief constructive feedback (1-2 sentences)",
-    "strength": "What they did well",
-    "improvement": "One specific thing to improve",
-    "resume_alignment": "How well their answer aligns with resume claims (if applicable)"
-}}"""),
-        ("user", f"Question: {question}\n\nCandidate Response: {response}")
-    ])
-    
-    chain = prompt | llm
-    response_obj = chain.invoke({})
+    variables = {
+        "interview_type": interview_type,
+        "job_role": job_role,
+        "resume_context": resume_context if resume_context else "No structured context available",
+        "question": question,
+        "response": response
+    }
+    large = lambda: invoke_prompt(
+        REALTIME_EVALUATION_PROMPT, variables, get_groq_llm(temperature=0.3),
+        tool="evaluate_response_realtime", model=DEFAULT_GROQ_MODEL
+    ).content
+    if not CASCADE_ENABLED:
+        return large()
     
-    return response_obj.content
+    # Small local model first; the 70B model only for answers it cannot settle
+    small = lambda: invoke_prompt(
+        REALTIME_EVALUATION_PROMPT, variables, get_ollama_llm(CASCADE_SMALL_MODEL, temperature=0.3),
+        tool="evaluate_response_realtime", provider="ollama", model=CASCADE_SMALL_MODEL
+    ).content
+    return run_cascade(small, large)
 
 
 @tool
+@traced("tool.adjust_difficulty")
 def adjust_difficulty(
     conversation_history: str,
     current_difficulty: str = "medium"
@@ -151,44 +229,16 @@ def adjust_difficulty(
     Returns:
         JSON with recommended difficulty and reasoning
     """
-    llm = ChatGroq(
-        model="llama3-70b-8192",
-        temperature=0.3,
-        api_key=os.getenv("GROQ_API_KEY")
-    )
-    
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", f"""You are an adaptive interview system analyzer.
-        
-        Analyze the conversation history and evaluation scores to determine if difficulty should be adjusted.
-        
-        Current difficulty: {current_difficulty}
-        
-        Rules:
-        - If average scores are consistently above 80: Increase difficulty
-        - If average scores are consistently below 50: Decrease difficulty
-        - If scores are between 50-80: Maintain current difficulty
-        - Consider the trend (improving vs declining)
-        
-        Difficulty levels: easy, medium, hard
-        
-        Return ONLY a JSON object:
-        {{
-            "recommended_difficulty": "easy/medium/hard",
-            "should_change": true/false,
-            "reasoning": "Why this adjustment makes sense",
-            "average_performance": 0-100
-        }}"""),
-        ("user", f"Conversation History with Scores:\n{conversation_history}")
-    ])
-    
-    chain = prompt | llm
-    response = chain.invoke({})
+    response = invoke_prompt(DIFFICULTY_ADJUSTMENT_PROMPT, {
+        "current_difficulty": current_difficulty,
+        "conversation_history": conversation_history
+    }, get_groq_llm(temperature=0.3), tool="adjust_difficulty", model=DEFAULT_GROQ_MODEL)
     
     return response.content
 
 
 @tool
+@traced("tool.generate_conversation_summary")
 def generate_conversation_summary(
     conversation_history: str,
     interview_type: str = "general"
@@ -203,34 +253,10 @@ def generate_conversation_summary(
     Returns:
         JSON with conversation summary and insights
     """
-    llm = ChatGroq(
-        model="llama3-70b-8192",
-        temperature=0.3,
-        api_key=os.getenv("GROQ_API_KEY")
-    )
-    
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", f"""You are an interview analyst summarizing a {interview_type} interview.
-        
-        Analyze the conversation and provide:
-        1. Key topics discussed
-        2. Candidate's main strengths shown
-        3. Areas that need more exploration
-        4. Overall interview flow quality
-        
-        Return ONLY a JSON object:
-        {{
-            "key_topics": ["topic1", "topic2", "topic3"],
-            "demonstrated_strengths": ["strength1", "strength2"],
-            "areas_to_explore": ["area1", "area2"],
-            "flow_quality": "excellent/good/fair/poor",
-            "summary": "2-3 sentence summary of the interview"
-        }}"""),
-        ("user", f"Interview Conversation:\n{conversation_history}")
-    ])
-    
-    chain = prompt | llm
-    response = chain.invoke({})
+    response = invoke_prompt(CONVERSATION_SUMMARY_PROMPT, {
+        "interview_type": interview_type,
+        "conversation_history": conversation_history
+    }, get_groq_llm(temperature=0.3), tool="generate_conversation_summary", model=DEFAULT_GROQ_MODEL)
     
     return response.content
 
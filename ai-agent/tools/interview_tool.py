@@ -1,11 +1,159 @@
-from langchain.tools import tool
-from langchain_groq import ChatGroq
+from langchain_core.tools import tool
 from langchain_core.prompts import ChatPromptTemplate
+from services.llm_gateway import invoke_prompt
+from services.llm_provider import get_groq_llm, DEFAULT_GROQ_MODEL
+from services.tracing import traced
 from typing import List, Dict
 import os
 import json
 
+# Prompts are compiled once at import. System messages are static so every call
+# shares a byte-identical prefix (provider prompt/KV caching); per-call values
+# are only substituted into the trailing user message.
+
+QUESTION_GENERATION_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are an expert technical interviewer. Generate interview questions STRICTLY based on the candidate's resume.
+The number of questions, their difficulty and the target job role are given at the end of the request.
+
+CRITICAL RULES - FOLLOW EXACTLY:
+1. ONLY ask about skills, technologies, projects, and experiences EXPLICITLY mentioned in the resume
+2. ALWAYS reference specific items from the resume by name
+3. DO NOT ask generic questions that could apply to anyone
+4. Start questions with phrases like:
+   - "I see you worked on [PROJECT NAME]..."
+   - "You mentioned [TECHNOLOGY] in your resume..."
+   - "In your role at [COMPANY]..."
+   - "Your resume shows experience with [SKILL]..."
+
+Question Types to Include:
+- Project Deep-Dives: Ask about specific projects, their architecture, challenges, your role
+- Technology Probing: Ask how they used specific technologies they listed
+- Experience-Based: Ask about responsibilities and achievements at companies they worked at
+- Problem-Solving: Ask how they solved specific problems in their listed projects
+
+Example Good Questions:
+- "I see you built an E-commerce Platform using React and Node.js. Can you walk me through the architecture and your specific contributions?"
+- "You mentioned Docker in your skills. How did you use Docker in your [PROJECT NAME] project?"
+- "At [COMPANY], you worked as a [ROLE]. Can you describe a challenging problem you solved there?"
+
+Example BAD Questions (DO NOT USE):
+- "Tell me about yourself" (too generic)
+- "What are your strengths?" (not resume-specific)
+- "Where do you see yourself in 5 years?" (not technical or resume-based)
+
+Return ONLY a JSON array of questions with this format, using the requested difficulty:
+[
+    {{"question": "I see you worked on [SPECIFIC PROJECT]. Can you explain...", "category": "technical/behavioral/project", "difficulty": "easy/medium/hard"}},
+    ...
+]"""),
+    ("user", """Resume Context:
+{resume_context}
+
+Resume:
+{resume_text}
+
+Job Role: {job_role}
+Difficulty: {difficulty}
+Number of questions: {num_questions}""")
+])
+
+NEXT_QUESTION_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are an expert interviewer running a live interview. Ask the NEXT question only.
+The job role, interview type, difficulty, the candidate's resume and the interview so far are given at the end of the request.
+
+RULES:
+1. Reference specific projects, skills, technologies or experience from the resume by name
+2. Do NOT repeat or rephrase any question already asked
+3. Use what the candidate has answered so far: cover a resume area not yet discussed, or go deeper where an answer was thin
+4. Keep the question to one or two sentences at the given difficulty
+
+Return ONLY a JSON object:
+{{"question": "Your next question", "category": "technical/behavioral/project", "difficulty": "easy/medium/hard"}}"""),
+    ("user", """Resume Context:
+{resume_context}
+
+Job Role: {job_role}
+Interview Type: {interview_type}
+Difficulty: {difficulty}
+
+Questions already asked:
+{asked_questions}
+
+Recent answers:
+{recent_answers}""")
+])
+
+RESPONSE_EVALUATION_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are an expert interviewer evaluating a candidate's response for the job role given in the request.
+
+Evaluate the response on:
+1. Technical accuracy (if applicable)
+2. Communication clarity
+3. Problem-solving approach
+4. Completeness of answer
+5. Relevance to the question
+
+Provide:
+- Score (0-10)
+- Brief feedback (2-3 sentences)
+- Strengths
+- Areas for improvement
+
+Return as JSON:
+{{
+    "score": 0-10,
+    "feedback": "...",
+    "strengths": ["...", "..."],
+    "improvements": ["...", "..."]
+}}"""),
+    ("user", """Resume Context: {resume_context}
+
+Job Role: {job_role}
+
+Question: {question}
+
+Candidate Response: {response}""")
+])
+
+INTERVIEW_ANALYTICS_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are an expert interview analyst. Generate comprehensive analytics for the interview given in the request.
+
+Provide:
+1. Overall score (0-100)
+2. Detailed feedback (3-4 sentences)
+3. Skill-wise breakdown (technical, communication, problem-solving)
+4. Areas for improvement (3-5 specific points)
+5. Recommended resources (3-5 specific resources/topics)
+6. Resume vs Performance alignment
+7. Readiness score for the role (0-100)
+
+Return as JSON:
+{{
+    "score": 0-100,
+    "feedback": "...",
+    "skill_breakdown": {{
+        "technical": 0-100,
+        "communication": 0-100,
+        "problem_solving": 0-100,
+        "domain_knowledge": 0-100
+    }},
+    "areas_of_improvement": ["...", "...", "..."],
+    "recommended_resources": ["...", "...", "..."],
+    "resume_alignment": "...",
+    "readiness_score": 0-100,
+    "next_steps": "..."
+}}"""),
+    ("user", """Resume:
+{resume_text}
+
+Job Role: {job_role}
+
+Interview Data:
+{questions_and_responses}""")
+])
+
 @tool
+@traced("tool.generate_interview_questions")
 def generate_interview_questions(
     resume_text: str,
     job_role: str,
@@ -24,59 +172,51 @@ def generate_interview_questions(
         num_questions: Number of questions to generate
         resume_context: Structured resume context (skills, projects, experience)
     """
-    llm = ChatGroq(
-        model="llama3-70b-8192",
-        temperature=0.7,
-        api_key=os.getenv("GROQ_API_KEY")
-    )
+    response = invoke_prompt(QUESTION_GENERATION_PROMPT, {
+        "resume_context": resume_context if resume_context else "See resume text below",
+        "resume_text": resume_text,
+        "job_role": job_role,
+        "difficulty": difficulty,
+        "num_questions": num_questions
+    }, get_groq_llm(temperature=0.7), tool="generate_interview_questions", model=DEFAULT_GROQ_MODEL)
     
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", f"""You are an expert technical interviewer. Generate {num_questions} {difficulty} 
-        interview questions for a {job_role} position STRICTLY based on the candidate's resume.
-        
-        CRITICAL RULES - FOLLOW EXACTLY:
-        1. ONLY ask about skills, technologies, projects, and experiences EXPLICITLY mentioned in the resume
-        2. ALWAYS reference specific items from the resume by name
-        3. DO NOT ask generic questions that could apply to anyone
-        4. Start questions with phrases like:
-           - "I see you worked on [PROJECT NAME]..."
-           - "You mentioned [TECHNOLOGY] in your resume..."
-           - "In your role at [COMPANY]..."
-           - "Your resume shows experience with [SKILL]..."
-        
-        Question Types to Include:
-        - Project Deep-Dives: Ask about specific projects, their architecture, challenges, your role
-        - Technology Probing: Ask how they used specific technologies they listed
-        - Experience-Based: Ask about responsibilities and achievements at companies they worked at
-        - Problem-Solving: Ask how they solved specific problems in their listed projects
-        
-        Resume Context:
-        {resume_context if resume_context else "See resume text below"}
-        
-        Example Good Questions:
-        - "I see you built an E-commerce Platform using React and Node.js. Can you walk me through the architecture and your specific contributions?"
-        - "You mentioned Docker in your skills. How did you use Docker in your [PROJECT NAME] project?"
-        - "At [COMPANY], you worked as a [ROLE]. Can you describe a challenging problem you solved there?"
-        
-        Example BAD Questions (DO NOT USE):
-        - "Tell me about yourself" (too generic)
-        - "What are your strengths?" (not resume-specific)
-        - "Where do you see yourself in 5 years?" (not technical or resume-based)
-        
-        Return ONLY a JSON array of questions with this format:
-        [
-            {{"question": "I see you worked on [SPECIFIC PROJECT]. Can you explain...", "category": "technical/behavioral/project", "difficulty": "{difficulty}"}},
-            ...
-        ]"""),
-        ("user", f"Resume:\n{resume_text}\n\nJob Role: {job_role}")
-    ])
+    return response.content
+
+@tool
+@traced("tool.generate_next_interview_question")
+def generate_next_interview_question(
+    resume_context: str,
+    job_role: str,
+    interview_type: str = "general",
+    difficulty: str = "medium",
+    asked_questions: str = "",
+    recent_answers: str = ""
+) -> str:
+    """
+    Generates the single next interview question, conditioned on the interview so far.
+    Input size stays bounded (recent answers only), so each call costs the same however long the interview runs.
     
-    chain = prompt | llm
-    response = chain.invoke({})
+    Args:
+        resume_context: Structured resume context (skills, projects, experience)
+        job_role: Target job role
+        interview_type: Type of interview (hr, technical, behavioral, situational, general)
+        difficulty: Question difficulty (easy, medium, hard)
+        asked_questions: Questions already asked, one per line
+        recent_answers: The last few Q&A exchanges
+    """
+    response = invoke_prompt(NEXT_QUESTION_PROMPT, {
+        "resume_context": resume_context if resume_context else "No structured context available",
+        "job_role": job_role,
+        "interview_type": interview_type,
+        "difficulty": difficulty,
+        "asked_questions": asked_questions if asked_questions else "None yet",
+        "recent_answers": recent_answers if recent_answers else "None yet"
+    }, get_groq_llm(temperature=0.7), tool="generate_next_interview_question", model=DEFAULT_GROQ_MODEL)
     
     return response.content
 
 @tool
+@traced("tool.evaluate_interview_response")
 def evaluate_interview_response(
     question: str,
     response: str,
@@ -92,44 +232,17 @@ def evaluate_interview_response(
         job_role: Target job role
         resume_context: Optional resume context for evaluation
     """
-    llm = ChatGroq(
-        model="llama3-70b-8192",
-        temperature=0.3,
-        api_key=os.getenv("GROQ_API_KEY")
-    )
-    
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", f"""You are an expert interviewer evaluating responses for a {job_role} position.
-        
-        Evaluate the response on:
-        1. Technical accuracy (if applicable)
-        2. Communication clarity
-        3. Problem-solving approach
-        4. Completeness of answer
-        5. Relevance to the question
-        
-        Provide:
-        - Score (0-10)
-        - Brief feedback (2-3 sentences)
-        - Strengths
-        - Areas for improvement
-        
-        Return as JSON:
-        {{
-            "score": 0-10,
-            "feedback": "...",
-            "strengths": ["...", "..."],
-            "improvements": ["...", "..."]
-        }}"""),
-        ("user", f"Question: {question}\n\nCandidate Response: {response}\n\nResume Context: {resume_context}")
-    ])
-    
-    chain = prompt | llm
-    response_obj = chain.invoke({})
+    response_obj = invoke_prompt(RESPONSE_EVALUATION_PROMPT, {
+        "resume_context": resume_context,
+        "job_role": job_role,
+        "question": question,
+        "response": response
+    }, get_groq_llm(temperature=0.3), tool="evaluate_interview_response", model=DEFAULT_GROQ_MODEL)
     
     return response_obj.content
 
 @tool
+@traced("tool.generate_interview_analytics")
 def generate_interview_analytics(
     questions_and_responses: str,
     resume_text: str,
@@ -143,45 +256,11 @@ def generate_interview_analytics(
         resume_text: Candidate's resume text
         job_role: Target job role
     """
-    llm = ChatGroq(
-        model="llama3-70b-8192",
-        temperature=0.3,
-        api_key=os.getenv("GROQ_API_KEY")
-    )
-    
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", f"""You are an expert interview analyst. Generate comprehensive analytics for this {job_role} interview.
-        
-        Provide:
-        1. Overall score (0-100)
-        2. Detailed feedback (3-4 sentences)
-        3. Skill-wise breakdown (technical, communication, problem-solving)
-        4. Areas for improvement (3-5 specific points)
-        5. Recommended resources (3-5 specific resources/topics)
-        6. Resume vs Performance alignment
-        7. Readiness score for the role (0-100)
-        
-        Return as JSON:
-        {{
-            "score": 0-100,
-            "feedback": "...",
-            "skill_breakdown": {{
-                "technical": 0-100,
-                "communication": 0-100,
-                "problem_solving": 0-100,
-                "domain_knowledge": 0-100
-            }},
-            "areas_of_improvement": ["...", "...", "..."],
-            "recommended_resources": ["...", "...", "..."],
-            "resume_alignment": "...",
-            "readiness_score": 0-100,
-            "next_steps": "..."
-        }}"""),
-        ("user", f"Interview Data:\n{questions_and_responses}\n\nResume:\n{resume_text}\n\nJob Role: {job_role}")
-    ])
-    
-    chain = prompt | llm
-    response = chain.invoke({})
+    response = invoke_prompt(INTERVIEW_ANALYTICS_PROMPT, {
+        "resume_text": resume_text,
+        "job_role": job_role,
+        "questions_and_responses": questions_and_responses
+    }, get_groq_llm(temperature=0.3), tool="generate_interview_analytics", model=DEFAULT_GROQ_MODEL)
     
     return response.content
 
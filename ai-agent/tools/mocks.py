@@ -1,7 +1,19 @@
-from tools.email_tool import get_email_tools
-from tools.calendar_tool import get_calendar_tools
 from tools.interview_tool import get_interview_tools
 
+try:
+    from tools.email_tool import get_email_tools
+except ImportError:
+    # Email integration is optional; the interview service runs without it
+    def get_email_tools():
+        return []
+
+try:
+    from tools.calendar_tool import get_calendar_tools
+except ImportError:
+    # Calendar integration is optional; the interview service runs without it
+    def get_calendar_tools():
+        return []
+
 def get_tools():
     """Returns all available tools for the agent"""
     tools = []
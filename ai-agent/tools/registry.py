@@ -0,0 +1,68 @@
+"""
+Tool Registry
+Name-indexed view over the agent's LangChain tools with the description
+block for the agent prompt rendered once, plus per-tool metadata.
+"""
+
+from typing import Any, Dict, List, Optional
+
+# risk_level mirrors the planner's assessment; read_only tools have no side effects.
+# Read-only tools with a cache_ttl (seconds) may be served from ToolResultCache;
+# mutating tools invalidate cached results of the same domain for the same user.
+DEFAULT_TOOL_METADATA = {
+    "send_email": {"risk_level": "high", "read_only": False, "domain": "email"},
+    "schedule_meeting": {"risk_level": "medium", "read_only": False, "domain": "calendar"},
+    "cancel_meeting": {"risk_level": "medium", "read_only": False, "domain": "calendar"},
+    "reschedule_meeting": {"risk_level": "medium", "read_only": False, "domain": "calendar"},
+    "draft_email": {"risk_level": "low", "read_only": True, "domain": "email", "cache_ttl": 0},
+    "summarize_email": {"risk_level": "low", "read_only": True, "domain": "email", "cache_ttl": 600},
+    "check_calendar_conflicts": {"risk_level": "low", "read_only": True, "domain": "calendar", "cache_ttl": 120},
+}
+
+# Unknown tools are treated as mutating until someone says otherwise
+UNKNOWN_TOOL_METADATA = {"risk_level": "medium", "read_only": False, "domain": None}
+
+RISK_LEVELS = ("low", "medium", "high")
+
+
+class ToolRegistry:
+    """Index of tools by name"""
+
+    def __init__(self, tools: List[Any], metadata: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Args:
+            tools: LangChain tools
+            metadata: Per-tool overrides merged over DEFAULT_TOOL_METADATA
+        """
+        self._tools = {tool.name: tool for tool in tools}
+        self._metadata = {**DEFAULT_TOOL_METADATA, **(metadata or {})}
+        self.descriptions = "\n".join(f"- {tool.name}: {tool.description}" for tool in tools)
+
+    def get(self, name: str) -> Optional[Any]:
+        return self._tools.get(name)
+
+    def metadata(self, name: str) -> Dict[str, Any]:
+        return self._metadata.get(name, UNKNOWN_TOOL_METADATA)
+
+    def risk_level(self, name: str, claimed: Optional[str] = None) -> str:
+        """The higher of the tool's registered risk and the level the planner claimed for it"""
+        registered = self.metadata(name).get("risk_level", "medium")
+        if claimed not in RISK_LEVELS:
+            return registered
+        return max(registered, claimed, key=RISK_LEVELS.index)
+
+    def is_cacheable(self, name: str) -> bool:
+        meta = self.metadata(name)
+        return meta.get("risk_level") == "low" and meta.get("read_only", False) and meta.get("cache_ttl", 0) > 0
+
+    def names(self) -> List[str]:
+        return list(self._tools)
+
+    def tools(self) -> List[Any]:
+        return list(self._tools.values())
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def __len__(self) -> int:
+        return len(self._tools)
@@ -0,0 +1,72 @@
+"""
+Tool Result Cache
+Serves repeated calls to read-only tools (calendar conflict checks, email
+summaries) from a per-user TTL cache. Running a mutating tool drops the
+user's cached results for that tool's domain.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from typing import Any
+
+from services.cache import TTLCache
+from services.tracing import set_span_attributes
+from tools.registry import ToolRegistry
+
+
+class ToolResultCache:
+    """Caches tool outputs according to ToolRegistry metadata"""
+
+    def __init__(self, registry: ToolRegistry, maxsize: int = None):
+        """
+        Args:
+            registry: Registry providing tools and their metadata
+            maxsize: Maximum cached results across all users
+        """
+        self.registry = registry
+        self.cache = TTLCache("tool_result", maxsize=maxsize or int(os.getenv("TOOL_CACHE_SIZE", "1024")))
+        # Bumped on every invalidation so a read that overlapped a write is not stored
+        self._generations = {}
+
+    @staticmethod
+    def _fingerprint(tool_input: Any) -> str:
+        payload = json.dumps(tool_input, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def invalidate_domain(self, user_id: str, domain: str) -> int:
+        """Drop a user's cached results for one domain (email, calendar)"""
+        self._generations[(user_id, domain)] = self._generations.get((user_id, domain), 0) + 1
+        return self.cache.invalidate_where(lambda key: key[0] == user_id and key[1] == domain)
+
+    async def ainvoke(self, tool: Any, tool_input: Any, user_id: str = "default") -> Any:
+        """
+        Invoke a tool, using the cache when its metadata allows
+
+        Args:
+            tool: LangChain tool to run
+            tool_input: Input passed to tool.invoke
+            user_id: Owner of the cached result
+        """
+        meta = self.registry.metadata(tool.name)
+        domain = meta.get("domain")
+
+        if not self.registry.is_cacheable(tool.name):
+            # The worker thread inherits the span context
+            result = await asyncio.to_thread(tool.invoke, tool_input)
+            if not meta.get("read_only", False) and domain:
+                self.invalidate_domain(user_id, domain)
+            return result
+
+        key = (user_id, domain, tool.name, self._fingerprint(tool_input))
+        cached = self.cache.get_with_age(key)
+        set_span_attributes(**{"cache.tool_hit": cached is not None})
+        if cached is not None:
+            return cached[0]
+
+        generation = self._generations.get((user_id, domain), 0)
+        result = await asyncio.to_thread(tool.invoke, tool_input)
+        if self._generations.get((user_id, domain), 0) == generation:
+            self.cache.set(key, result, ttl=meta["cache_ttl"])
+        return result
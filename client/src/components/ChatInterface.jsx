@@ -61,12 +61,15 @@ export default function ChatInterface({ initialInput = '' }) {
 
         try {
             const response = await api.post('/agents/command', { command });
-            const { plan, result, status, requires_confirmation, risk_level } = response.data;
+            const { plan, plan_id, result, status } = response.data;
+            const risk_level = response.data.risk_level || plan?.overall_risk;
 
-            if (requires_confirmation && status === 'awaiting_confirmation') {
+            // The AI service holds the plan under plan_id; confirming runs exactly that plan
+            if (status === 'requires_confirmation') {
                 setPendingAction({
                     command,
                     plan,
+                    plan_id,
                     risk_level,
                     result
                 });
@@ -106,6 +109,7 @@ export default function ChatInterface({ initialInput = '' }) {
         try {
             const response = await api.post('/agents/command', {
                 command: pendingAction.command,
+                plan_id: pendingAction.plan_id,
                 confirmed
             });
 
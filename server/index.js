@@ -5,6 +5,7 @@ const cors = require('cors');
 const fs = require('fs');
 const path = require('path');
 const { errorHandler, notFoundHandler, logger } = require('./middleware/errorHandler');
+const { traceContext } = require('./middleware/tracing');
 
 const app = express();
 const PORT = process.env.PORT || 5000;
@@ -21,6 +22,7 @@ dirs.forEach(dir => {
 app.use(cors());
 app.use(express.json());
 app.use(express.urlencoded({ extended: true }));
+app.use(traceContext);
 
 // Database Connection
 mongoose.connect(process.env.MONGODB_URI)
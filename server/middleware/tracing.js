@@ -0,0 +1,33 @@
+const crypto = require('crypto');
+
+const TRACEPARENT_RE = /^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$/;
+
+/**
+ * Build a W3C traceparent header for a new span in the given trace
+ */
+const newTraceparent = (traceId) => {
+    const spanId = crypto.randomBytes(8).toString('hex');
+    return `00-${traceId || crypto.randomBytes(16).toString('hex')}-${spanId}-01`;
+};
+
+/**
+ * Middleware that continues an incoming trace (or starts one) and
+ * attaches it to req.traceId so calls to the AI service can propagate it
+ */
+const traceContext = (req, res, next) => {
+    const incoming = (req.headers.traceparent || '').toLowerCase();
+    const match = TRACEPARENT_RE.exec(incoming);
+
+    req.traceId = match ? match[1] : crypto.randomBytes(16).toString('hex');
+    res.setHeader('X-Trace-Id', req.traceId);
+    next();
+};
+
+/**
+ * Headers to send with each AI service request; every hop gets its own span id
+ */
+const aiServiceHeaders = (req) => ({
+    traceparent: newTraceparent(req.traceId)
+});
+
+module.exports = { traceContext, aiServiceHeaders };
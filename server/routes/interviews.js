@@ -2,16 +2,33 @@ const express = require('express');
 const router = express.Router();
 const { requireAuth } = require('../middleware/auth');
 const upload = require('../middleware/upload');
+const { aiServiceHeaders } = require('../middleware/tracing');
 const InterviewSession = require('../models/InterviewSession');
 const { parseResume } = require('../services/resumeParser');
 const axios = require('axios');
 const fs = require('fs').promises;
 
 const AI_SERVICE_URL = process.env.AI_SERVICE_URL || 'http://localhost:8000';
+// Opt-in: the default upfront generation is what reuses questions across similar resumes
+const INSTANT_START = process.env.INTERVIEW_INSTANT_START === 'true';
+const LAZY_QUESTIONS = process.env.INTERVIEW_LAZY_QUESTIONS === 'true';
 
 // Require auth
 router.use(requireAuth);
 
+// Start the AI service's side of a session; it keeps the resume and role for the later turns
+const startAiSession = (req, session) => axios.post(`${AI_SERVICE_URL}/interview/start`, {
+    session_id: session._id.toString(),
+    resume_text: session.resumeText,
+    job_role: session.jobRole,
+    difficulty: session.currentDifficulty || session.difficulty,
+    interview_type: session.interviewType,
+    // Candidates get a bank question immediately; resume-based questions replace the queue when ready
+    instant: INSTANT_START,
+    // Questions are generated one turn ahead, conditioned on the answers so far
+    lazy: LAZY_QUESTIONS
+}, { headers: aiServiceHeaders(req) });
+
 router.post('/start', upload.single('resume'), async (req, res) => {
     try {
         const { jobRole, difficulty, interviewType, jobDescription } = req.body;
@@ -60,20 +77,14 @@ router.post('/start', upload.single('resume'), async (req, res) => {
 
         // Start interview with AI service
         try {
-            const aiResponse = await axios.post(`${AI_SERVICE_URL}/interview/start`, {
-                session_id: session._id.toString(),
-                resume_text: resumeText,
-                job_role: jobRole || "Software Engineer",
-                difficulty: difficulty || "medium",
-                interview_type: interviewType || "general"
-            });
+            const aiResponse = await startAiSession(req, session);
 
             res.json({
                 ...session.toObject(),
                 first_question: aiResponse.data
             });
         } catch (aiError) {
-            console.error("AI service error:", aiError.message);
+            console.error("AI service error:", aiError.message, `trace=${req.traceId}`);
             // Fallback if AI service is down
             res.json({
                 ...session.toObject(),
@@ -101,6 +112,9 @@ router.post('/:id/respond', async (req, res) => {
         const session = await InterviewSession.findById(id);
         if (!session) return res.status(404).json({ error: "Session not found" });
 
+        // One key per turn: a double submit or proxy retry of this turn replays the AI service's stored result
+        const idempotencyKey = req.get('Idempotency-Key') || `${id}:turn:${session.transcript.length}`;
+
         // Capture the last question before adding user response
         const lastQuestion = session.transcript.length > 0
             ? session.transcript[session.transcript.length - 1]?.content || ""
@@ -115,11 +129,10 @@ router.post('/:id/respond', async (req, res) => {
         // Get next question and evaluation from AI
         try {
             const aiResponse = await axios.post(`${AI_SERVICE_URL}/interview/respond`, {
+                // The AI service keeps the resume and role from /interview/start
                 session_id: id,
-                response: response,
-                resume_text: session.resumeText,
-                job_role: session.jobRole
-            });
+                response: response
+            }, { headers: { ...aiServiceHeaders(req), 'Idempotency-Key': idempotencyKey } });
 
             // Store evaluation metrics
             if (aiResponse.data.evaluation) {
@@ -155,7 +168,18 @@ router.post('/:id/respond', async (req, res) => {
             await session.save();
             res.json(aiResponse.data);
         } catch (aiError) {
-            console.error("AI service error:", aiError.message);
+            if (aiError.response?.status === 404) {
+                // The AI service lost the session (restart or eviction). The answer was given to a
+                // question it no longer knows, so it is not replayed into a new interview.
+                session.status = 'abandoned';
+                session.transcript.pop();
+                await session.save();
+                return res.status(410).json({
+                    error: "Interview session expired; start a new interview",
+                    code: 'SESSION_EXPIRED'
+                });
+            }
+            console.error("AI service error:", aiError.message, `trace=${req.traceId}`);
             await session.save();
             res.json({
                 evaluation: {
@@ -234,13 +258,12 @@ router.post('/:id/end', async (req, res) => {
         try {
             const aiResponse = await axios.post(`${AI_SERVICE_URL}/interview/complete`, {
                 session_id: id,
-                resume_text: session.resumeText,
-                job_role: session.jobRole
-            });
+                user_id: session.userId.toString()
+            }, { headers: { ...aiServiceHeaders(req), 'Idempotency-Key': req.get('Idempotency-Key') || `${id}:complete` } });
 
             session.analysis = aiResponse.data.analytics;
         } catch (aiError) {
-            console.error("AI analytics error:", aiError.message);
+            console.error("AI analytics error:", aiError.message, `trace=${req.traceId}`);
 
             // Calculate fallback analytics with conversational metrics
             const avgConfidence = session.evaluationMetrics.confidence.length > 0